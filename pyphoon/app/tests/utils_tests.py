@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from os import remove
+from os.path import exists
+from pyphoon.io.h5 import write_h5_dataset_file
+from pyphoon.app.utils import load_h5datachunks
+
+
+class TestUtilsMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk_filename = 'temp_chunk.h5'
+        self.data = {'data': np.random.rand(4, 8, 8),
+                     'class': [2, np.nan, 3, 4],
+                     'idx': ['a', 'b', 'c', 'd']}
+        write_h5_dataset_file(self.data, self.chunk_filename,
+                              compression='gzip')
+
+    def tearDown(self):
+        if exists(self.chunk_filename):
+            remove(self.chunk_filename)
+
+    def test_load_h5datachunks(self):
+        images, labels = load_h5datachunks('.', [self.chunk_filename],
+                                           features=['data', 'class'],
+                                           crop=4)
+        # Samples without class are filtered out
+        self.assertEqual(labels[0].tolist(), [2, 3, 4])
+        self.assertEqual(images[0].shape, (3, 4, 4))
+        self.assertTrue(np.array_equal(images[0],
+                                       self.data['data'][[0, 2, 3], 2:6,
+                                                         2:6]))
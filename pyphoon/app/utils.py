@@ -88,8 +88,8 @@ def load_h5datachunks(dataset_dir, chunk_filenames, features,
 
             # Load class labels
             try:
-                Y_chunk = f.get('class').value
-            except:
+                Y_chunk = f['class'][()]
+            except KeyError:
                 raise Exception("Weird file. Could not find field with key "
                                 "class. Make sure the datachunk " + join(
                                  dataset_dir, chunk_filename) + " has a field "
@@ -116,16 +116,18 @@ def load_h5datachunks(dataset_dir, chunk_filenames, features,
                     if feature not in data:
                         data[feature] = []
 
+                    # Selection and crop are read as an HDF5 hyperslab,
+                    # hence filtered out samples are never loaded
                     if feature == 'class':
                         data[feature].append(Y_chunk[valid_samples])
                     elif feature == 'data' and crop:
                         base = int(crop / 2)
                         data[feature].append(
-                            f.get(feature).value[valid_samples]
-                            [:, base:base + crop, base:base + crop]
+                            f[feature][valid_samples, base:base + crop,
+                                       base:base + crop]
                         )
                     else:
-                        data[feature].append(f.get(feature).value[valid_samples])
+                        data[feature].append(f[feature][valid_samples])
 
         print(" file", chunk_filename, "read") if verbose else 0
 
@@ -261,8 +263,25 @@ class DataGeneratorFromChunklist:
         base = int(self.crop / 2)
         return X[:, base:base + self.crop, base:base + self.crop]
 
-    def feed(self, X, Y=None, shuffle_batches=True, shuffle_samples=True):
+    def _read_batch(self, X, pos):
+        """ Reads the samples at positions **pos** from a memory-mapped
+        chunk, cropping and preprocessing only these samples.
         """
+        if self.crop:
+            base = int(self.crop / 2)
+            x = X[pos, base:base + self.crop, base:base + self.crop]
+        else:
+            x = X[pos]
+        if self.preprocess_algorithm:
+            x = self.preprocess_algorithm(x)
+        return x
+
+    def feed(self, X, Y=None, shuffle_batches=True, shuffle_samples=True):
+        """ Memory-mapped chunks (see
+        :func:`~pyphoon.io.cache.load_chunk_cache`) are read batch by batch,
+        so that only the samples of the current batch are paged in. In that
+        case, cropping and preprocessing are applied per batch.
+
         :param X: Sample data.
         :type X: list
         :param Y: Label data.
@@ -293,21 +312,25 @@ class DataGeneratorFromChunklist:
             if Y:
                 _Y = Y[idx]
 
+            # Memory-mapped chunks are only paged in batch by batch
+            lazy = isinstance(_X, np.memmap)
+
             # Preprocess batch if needed
-            if self.preprocess_algorithm:
+            if self.preprocess_algorithm and not lazy:
                 _X = self.preprocess_algorithm(_X)
 
             # Shuffle batch data
             n_samples = len(_X)
+            pos = np.arange(n_samples)
             if shuffle_samples:
-                pos = np.arange(n_samples)
                 np.random.shuffle(pos)
-                _X = _X[pos]
+                if not lazy:
+                    _X = _X[pos]
                 if Y:
                     _Y = _Y[pos]
 
             # Crop image if needed
-            if self.crop:
+            if self.crop and not lazy:
                 _X = self._crop(_X)
             # Encode target values
             if self.target_enc:
@@ -327,6 +350,11 @@ class DataGeneratorFromChunklist:
                     print(x)
                     print('************************************************')
                     print(y)
+                elif lazy:
+                    x = self._read_batch(
+                        _X, pos[i * self.batch_sz:(i + 1) * self.batch_sz])
+                    if Y:
+                        y = _Y[i * self.batch_sz:(i + 1) * self.batch_sz]
                 else:
                     x = _X[i * self.batch_sz:(i + 1) * self.batch_sz]
                     if Y:
@@ -92,4 +92,64 @@ def correct_corrupted_pixels_1(images, index, pos, detect_fct, params,
         c_p = 0
         region_p = 0
 
-    return (c_n*region_n + c_p*region_p)/(c_n + c_p)
\ No newline at end of file
+    return (c_n*region_n + c_p*region_p)/(c_n + c_p)
+
+def correct_corrupted_pixels_2(images, mask, display=False):
+    """Corrects all corrupted pixels of a typhoon sequence at once. As in
+    :func:`correct_corrupted_pixels_1`, each corrupted pixel is interpolated
+    from the nearest earlier and later frames where that pixel is not
+    corrupted, weighting each of them by *exp(-(d-1))* (*d*: distance in
+    frames, capped at 14). If no such frame exists in one direction, the
+    value 270 is used instead. Unlike :func:`correct_corrupted_pixels_1`,
+    earlier frames are taken before being corrected, hence all frames are
+    corrected in a single pass.
+
+    :param images: *TxWxH* array with the image frames.
+    :type images: numpy.array
+    :param mask: *TxWxH* boolean array with True values in corrupted pixels
+        (see :func:`~pyphoon.clean_satellite.detection.detect_corrupted_frames`).
+    :type mask: numpy.array
+    :param display: Set to True if execution information should be printed.
+    :type display: True
+    :return: Array with the corrected pixel values, in the order given by
+        ``images[mask]``.
+    :rtype: numpy.array
+    """
+    images = np.asarray(images)
+    T = len(images)
+    pixels = images.reshape(T, -1)
+    t, p = np.nonzero(mask.reshape(T, -1))
+    print(" correcting", len(t), "pixels") if display else 0
+
+    # Runs of consecutive corrupted frames of each pixel. The nearest valid
+    # frames are those right before and after the run
+    order = np.argsort(p, kind='stable')
+    t_run, p_run = t[order], p[order]
+    n = len(t_run)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = (p_run[1:] != p_run[:-1]) | (t_run[1:] != t_run[:-1] + 1)
+    ends = np.ones(n, dtype=bool)
+    ends[:-1] = starts[1:]
+    first = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    last = np.minimum.accumulate(np.where(ends, np.arange(n), n)[::-1])[::-1]
+    previous = np.empty(n, dtype=np.int64)
+    following = np.empty(n, dtype=np.int64)
+    previous[order] = t_run[first] - 1
+    following[order] = t_run[last] + 1
+
+    # BACKWARD
+    found = previous >= 0
+    region_n = np.where(found, pixels[np.maximum(previous, 0), p], 270)
+    c_n = np.where(found, np.exp(-np.minimum(t - previous - 1, 13)),
+                   np.where(t > 0, np.exp(-np.minimum(t - 1, 13)), 0))
+
+    # FORWARD
+    found = following < T
+    region_p = np.where(found, pixels[np.minimum(following, T - 1), p], 270)
+    c_p = np.where(found, np.exp(-np.minimum(following - t - 1, 13)),
+                   np.where(t < T - 1, np.exp(-np.minimum(T - t - 2, 13)),
+                            0))
+
+    c = c_n + c_p
+    return np.where(c > 0, (c_n*region_n + c_p*region_p)/np.where(c > 0, c, 1),
+                    270)
@@ -2,6 +2,8 @@
 This submodule contains different methods to detect corrupted images. The
 standard notation is ``detect_corrupted_pixels_<method index>``.
 """
+
+import numpy as np
 # TODO: Generic method able to call specific detection methods. See decorators
 ################################################################################
 # Detection methods
@@ -13,25 +15,52 @@ def detect_corrupted_pixels_1(image_frame, params):
     approach. It forces all pixels to be within the range defined by
     [min_th, max_th].
 
-    :param image_frame: Image frame
+    :param image_frame: Image frame. A stack of image frames (e.g. a *TxWxH*
+        array) can be given as well.
     :type image_frame: numpy.array
-    :param params: Should contain two keys:
+    :param params: Can contain two keys:
 
-        *   *min_th*: Minimum tolerated pixel intensity (temperature) value.
-        *   *max_th*: Maximum tolerated pixel intensity (temperature) value.
+        *   *min_th*: Minimum tolerated pixel intensity (temperature) value,
+            default 160.
+        *   *max_th*: Maximum tolerated pixel intensity (temperature) value,
+            default 310.
     :type params: dict
     :return: Matrix of the same size as **image_frame**. Elements with value
         True indicate that pixel values in the original image at that position
         are corrupted.
     :rtype: numpy.array
     """
-    if 'min_th' not in params:
-        params['min_th'] = 160
-    elif type(params['min_th']) is not int:
-        raise Exception("Invalid type for params['min_th']. It should be int.")
-    if 'max_th' not in params:
-        params['max_th'] = 310
-    elif type(params['max_th']) is not int:
-        raise Exception("Invalid type for params['max_th']. It should be int.")
-
-    return (image_frame < params['min_th']) + (image_frame > params['max_th'])
\ No newline at end of file
+    return (image_frame < params.get('min_th', 160)) | \
+        (image_frame > params.get('max_th', 310))
+
+
+################################################################################
+# Batch detection
+################################################################################
+def detect_corrupted_frames(images, detect_fct, params):
+    """ Detects the corrupted pixels of all frames of a typhoon sequence.
+    If **images** is an array, **detect_fct** is applied once to the whole
+    stack, hence it should work element-wise (as
+    :func:`detect_corrupted_pixels_1` does).
+
+    :param images: *TxWxH* array or list with image arrays.
+    :type images: numpy.array or list
+    :param detect_fct: Callable function that detects corrupted values from
+        an array according to some given rules.
+    :type detect_fct: callable
+    :param params: Parameters for detection function.
+    :type params: dict
+    :return: Tuple with two elements:
+
+        *   *TxWxH* boolean array with the corrupted pixels of each frame.
+        *   Number of corrupted pixels of each frame.
+    :rtype: tuple
+    """
+    if isinstance(images, np.ndarray):
+        mask = detect_fct(images, params)
+    elif len(images) > 0:
+        mask = np.stack([detect_fct(image, params) for image in images])
+    else:
+        mask = np.zeros((0, 0, 0), dtype=bool)
+    counts = np.count_nonzero(mask.reshape(len(mask), -1), axis=1)
+    return mask, counts
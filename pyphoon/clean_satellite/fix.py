@@ -1,5 +1,14 @@
-import copy
-from pyphoon.clean_satellite.utils import generate_image_ids, get_sample_distance
+import csv
+from os import listdir, makedirs
+from os.path import isdir, join, exists, getsize
+from time import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from pyphoon.clean_satellite.utils import generate_image_ids
+from pyphoon.clean_satellite.detection import detect_corrupted_frames
+from pyphoon.io.h5 import read_source_images_bulk, write_image, \
+    get_h5_filenames
+from pyphoon.io.utils import ids2dates, imagefilenames2ids, dates2ids
 ################################################################################
 # Main Class: FixAlgorithm
 ################################################################################
@@ -16,7 +25,10 @@ class TyphoonListImageFixAlgorithm(object):
         :mod:`~pyphoon.clean_satellite.correction`)
     :type correct_fct: callable
     :param generate_fct: Method used to fill gaps in a sequence (more details in
-        :mod:`~pyphoon.clean_satellite.generation`)
+        :mod:`~pyphoon.clean_satellite.generation`). It is called once per
+        sequence with the indices of the frames around all gaps, the output
+        sequence and the positions of the new frames in it (see
+        :func:`~pyphoon.clean_satellite.generation.generate_new_frames_1`).
     :type generate_fct: callable
     :param detect_params: Parameters required to assist the detection method.
         More details can be found in the specific detection method (see from
@@ -27,11 +39,18 @@ class TyphoonListImageFixAlgorithm(object):
         temporal gap of more than **n_frames_th** hours no new image frames
         are generated.
     :type n_frames_th: int
+    :param batch_correction: Set to True if **correct_fct** corrects all
+        frames of a sequence in a single call, given the image stack and the
+        mask with the corrupted pixels (e.g.
+        :func:`~pyphoon.clean_satellite.correction.correct_corrupted_pixels_2`).
+    :type batch_correction: bool, default False
     """
     def __init__(self, detect_fct=None, correct_fct=None,
-                 generate_fct=None, detect_params=None, n_frames_th=None):
+                 generate_fct=None, detect_params=None, n_frames_th=None,
+                 batch_correction=False):
         self.detect_fct = detect_fct
         self.correct_fct = correct_fct
+        self.batch_correction = batch_correction
         self.generate_fct = generate_fct
         self.detect_params = detect_params
         self.n_frames_th = n_frames_th
@@ -46,60 +65,76 @@ class TyphoonListImageFixAlgorithm(object):
         if generate_fct:
             self.generation = True
         else:
-            self.generation = True
+            self.generation = False
         self.index_offset = {}
 
-    def apply(self, images, images_ids):
+    def apply(self, images, images_ids, inplace=False):
         """ Applies the defined fix algorithm to all image samples in
-        **images**.
+        **images**. Original and generated frames are written into a single
+        preallocated array. Positions of the corrected and generated frames
+        are stored in class attribute **fixed_indices** as index arrays.
 
-        :param images: List of image frames.
-        :type images: list
+        :param images: *TxWxH* array (or list) of image frames.
+        :type images: numpy.array
         :param images_ids: List of image ids.
         :type images_ids: list
+        :param inplace: Set to True to correct the corrupted frames within
+            **images** itself (only if **images** is an array). If no frames
+            are generated, **images** is then returned without any copy.
+        :type inplace: bool, default False
         :return: Tuple with two elements:
 
-            *   New list of images.
+            *   New array of images.
             *   New list of the corresponding ids.
         :rtype: tuple
         """
-        images_new = copy.deepcopy(images)
-        images_ids_new = copy.deepcopy(images_ids)
+        images = np.asarray(images)
+        gaps = self._get_gaps(images_ids) if self.generate_fct is not None \
+            else np.zeros(len(images), dtype=int)
+        positions = np.arange(len(images)) + np.cumsum(gaps)
+        n_generated = int(gaps.sum())
+
+        # Output array, with the original frames at positions
+        if inplace:
+            images_new = images
+            frames = images
+        elif n_generated == 0:
+            images_new = images.copy()
+            frames = images_new
+        else:
+            images_new = self._allocate(images, positions, n_generated)
+            frames = [images_new[p] for p in positions]
 
         # Detect and correct corrupted frames
         if self.detect_fct is not None and self.correct_fct is not None:
-            indices = self.detect_and_correct(images_new, images_ids_new)
+            indices = np.array(self.detect_and_correct(images, images_ids,
+                                                       out=frames), dtype=int)
             self.fixed_indices['original']['corrected'] = indices
+            self.fixed_indices['fixed']['corrected'] = positions[indices]
             self.correction = True
+        if inplace and n_generated > 0:
+            images_new = self._allocate(images, positions, n_generated)
+
         # Generate synthetic images
+        images_ids_new = list(images_ids)
         if self.generate_fct is not None:
-            indices = self.generate(images_new, images_ids_new)
+            images_ids_new, indices = self._fill_gaps(images_new, images_ids,
+                                                      positions, gaps)
             self.fixed_indices['original']['generated'] = indices['original']
             self.fixed_indices['fixed']['generated'] = indices['fixed']
-
             self.generation = True
-            # Update indices from corrected frames
-            self.fixed_indices['fixed']['corrected'] = self._update_idx_cor()
-        else:
-            self.fixed_indices['fixed']['corrected'] = self.fixed_indices[
-                'original']['corrected']
 
         return images_new, images_ids_new
 
-    def _update_idx_cor(self):
-        indices = copy.deepcopy(self.fixed_indices['original']['corrected'])
-
-        if indices is not None:
-            for i in range(len(indices)):
-                old_offset = 0
-                for position, offset in self.index_offset.items():
-                    if indices[i] >= position:
-                        old_offset = offset
-                    else:
-                        break
-                indices[i] += old_offset
-
-        return indices
+    @staticmethod
+    def _allocate(images, positions, n_generated):
+        """ Allocates the output array and copies the original frames to
+        their **positions**.
+        """
+        images_new = np.empty((len(images) + n_generated,) + images.shape[1:],
+                              dtype=images.dtype)
+        images_new[positions] = images
+        return images_new
 
     def clear(self):
         """ Resets the list of corrected/generated frame ids.
@@ -113,10 +148,29 @@ class TyphoonListImageFixAlgorithm(object):
     ############################################################################
     # Detect/Correct
     ############################################################################
-    def detect_and_correct(self, images, images_ids):
+    def detect(self, images):
+        """ Detects the corrupted pixels of all image frames in **images** at
+        once, using the method specified by class attribute **detect_fct**.
+
+        .. seealso::
+            :func:`~pyphoon.clean_satellite.detection.detect_corrupted_frames`
+
+        :param images: *TxWxH* array or list with image arrays.
+        :type images: numpy.array or list
+        :return: Tuple with two elements:
+
+            *   *TxWxH* boolean array with the corrupted pixels of each frame.
+            *   Number of corrupted pixels of each frame.
+        :rtype: tuple
+        """
+        return detect_corrupted_frames(images, self.detect_fct,
+                                       self.detect_params)
+
+    def detect_and_correct(self, images, images_ids, out=None):
         """ Detects and tries to correct irregularities found in the image
         frames in the list **images** using the methods specified by class
-        attributes **detect_fct** and **correct_fct**, respectively.
+        attributes **detect_fct** and **correct_fct**, respectively. Only
+        frames with corrupted pixels are passed to the correction method.
 
         :param images: List with image arrays. Each element of the list must
             be an array of 2 dimensions.
@@ -124,6 +178,10 @@ class TyphoonListImageFixAlgorithm(object):
         :param images_ids: Image ids.
         **images**.
         :type images_ids: list
+        :param out: Frames where the corrected pixels are written, holding
+            a copy of **images**. By default, **images** are corrected in
+            place.
+        :type out: list or numpy.array, default None
         :return: Ids of the corrected images
         :rtype: list
 
@@ -131,22 +189,27 @@ class TyphoonListImageFixAlgorithm(object):
                     :mod:`pyphoon.clean_satellite.correction`
 
         """
-        new_indices = []
-
-        for index in range(len(images)):
-
-            # GET AFFECTED AREA
-            pos = self.detect_fct(images[index],
-                                  params=self.detect_params)
-
-            # CORRECT AREA
-            if True in pos:
-                # Correct frame
-                images[index][pos] = \
-                    self.correct_fct(images, index, pos, images_ids,
-                                     self.detect_fct, params=self.detect_params)
-                new_indices.append(index)
-        return new_indices
+        if out is None:
+            out = images
+
+        # GET AFFECTED AREAS
+        mask, counts = self.detect(images)
+        new_indices = np.flatnonzero(counts)
+
+        # CORRECT AREAS
+        if self.batch_correction:
+            if len(new_indices) > 0:
+                values = self.correct_fct(np.asarray(images), mask)
+                values = np.split(values, np.cumsum(counts[new_indices])[:-1])
+                for index, _values in zip(new_indices, values):
+                    out[index][mask[index]] = _values
+        else:
+            for index in new_indices:
+                pos = mask[index]
+                out[index][pos] = \
+                    self.correct_fct(out, index, pos, self.detect_fct,
+                                     params=self.detect_params)
+        return new_indices.tolist()
 
     ############################################################################
     # Generate
@@ -155,110 +218,273 @@ class TyphoonListImageFixAlgorithm(object):
         """ Fills the gaps in the given typhoon sequence using the method
         specified by class attribute **generate_fct**.
 
-        :param images: List of image frames.
-        :type images: list
+        :param images: *TxWxH* array (or list) of image frames.
+        :type images: numpy.array
         :param images_ids: List of image ids.
         :type images_ids: list
-        :return: Dictionary with the ids of the new generated frames. Keys:
+        :return: Tuple with three elements:
+
+            *   New array of images.
+            *   New list of the corresponding ids.
+            *   Dictionary with the positions of the new generated frames.
+                Keys:
 
-            *   *original*: Frame position in original image list.
-            *   *fixed*: Frame position in fixed image list.
-        :rtype: dict
+                *   *original*: Position in the original image array of the
+                    frame preceding the gap.
+                *   *fixed*: Frame position in the new image array.
+        :rtype: tuple
 
         .. seealso:: :mod:`~pyphoon.clean_satellite.generation`
         """
-        images_original = copy.deepcopy(images)
-        images_ids_original = copy.deepcopy(images_ids)
-
-        new_ids = []
-        new_indices = {'original': [], 'fixed': []}
-        n_frames_cum = 0  # index shift in new typhoon sequence
-        for index in range(len(images_original)):
-            if index != 0:
-                n_frames_cum, _new_ids, _new_indices = \
-                    self._generate(images_original, images_ids_original,
-                                   images, index, n_frames_cum)
-                if _new_ids:
-                    new_ids.extend(_new_ids)
-                    new_indices['original'].extend(_new_indices['original'])
-                    new_indices['fixed'].extend(_new_indices['fixed'])
-                    self.index_offset[index] = n_frames_cum
-
-        images_ids[:] = sorted(images_ids + new_ids)
-        return new_indices
-
-    def _generate(self, images_original, images_original_ids, images_new,
-                  index, n_frames_cum):
-        """ Checks if there is a temporal gap between frames at positions
-        index-1  and index. If there is a gap and it is within the tolerable
-        range, it proceeds to generate new frames through interpolation of
-        temporal-nearby frames.
-
-        :param images_original: Original list of image data.
-        :type images_original: list
-        :param images_original_ids: Original list of image ids.
-        :type images_original_ids: listcat
-        :param images_new: New list where new synthetic frames will be added.
-        :type images_new: list
-        :param index: We check if there are any temporal gaps between frame
-            at position ``index-1`` and ``index`` from sequence
-            ``typhoon_sequence_raw``.
-        :type index: int
-        :param n_frames_cum: Total number of frames added to the sequence so
-            far.
-        :type n_frames_cum: int
+        images = np.asarray(images)
+        gaps = self._get_gaps(images_ids)
+        positions = np.arange(len(images)) + np.cumsum(gaps)
+        images_new = self._allocate(images, positions, int(gaps.sum()))
+        images_ids_new, indices = self._fill_gaps(images_new, images_ids,
+                                                  positions, gaps)
+        return images_new, images_ids_new, indices
+
+    def _get_gaps(self, images_ids):
+        """ Computes the number of frames to generate before each frame, i.e.
+        the temporal gap between frames at positions index-1 and index (in
+        slots of 1h), provided that it is within the tolerable range.
+
+        :param images_ids: List of image ids.
+        :type images_ids: list
+        :return: Number of frames to generate before each frame.
+        :rtype: numpy.array
         """
+        gaps = np.zeros(len(images_ids), dtype=int)
+        if len(images_ids) > 1:
+            frame_dist = np.diff(ids2dates(images_ids)).astype(int) - 1
+            gaps[1:] = np.where((frame_dist > 0) &
+                                (frame_dist < self.n_frames_th), frame_dist, 0)
+        return gaps
+
+    def _fill_gaps(self, images_new, images_ids, positions, gaps):
+        """ Generates the new frames of each gap through interpolation of
+        the frames around it, writing them into **images_new**.
+
+        :param images_new: Array where original frames are already stored
+            at **positions**.
+        :type images_new: numpy.array
+        :param images_ids: Original list of image ids.
+        :type images_ids: list
+        :param positions: Position of each original frame in **images_new**.
+        :type positions: numpy.array
+        :param gaps: Number of frames to generate before each original frame.
+        :type gaps: numpy.array
+        :return: Tuple with two elements:
 
-        # Define list for new image ids and indices
-        new_frames_ids = []
-        new_indices = {'original': [], 'fixed': []}
-
-        # Distance in hours between frame at position index and frame at
-        # index - 1
-        frame_dist = get_sample_distance(images_original_ids[index-1],
-                                         images_original_ids[index]) - 1
-
-        # Fill gap only if frame distance is below a certain threshold
-        if 0 < frame_dist < self.n_frames_th:
-            # Generate new frames
-            new_frames = self.generate_fct(images_original, index - 1, index,
-                                           n_frames=frame_dist)
-            # Generate ids for new frames
-            new_frames_ids = generate_image_ids(images_original_ids[index-1],
-                                                images_original_ids[index],
-                                                n_frames=frame_dist)
-            # Get indices for generated ids
-            index_cum = index + n_frames_cum
-            new_indices['original'] = [index - 1 for i in new_frames_ids]
-            new_indices['fixed'] = [index_cum + i for i in range(len(
-                new_frames_ids))]
-
-            # Insert new image frames and ids
-            images_new[index + n_frames_cum:index + n_frames_cum] = \
-                new_frames
-
-            n_frames_cum += frame_dist
-        elif frame_dist >= self.n_frames_th:
-            pass
-            # print(index, frame_dist)
-        return n_frames_cum, new_frames_ids, new_indices
+            *   New list of image ids.
+            *   Dictionary with the positions of the generated frames (see
+                :func:`generate`).
+        :rtype: tuple
+        """
+        images_ids_new = np.empty(len(images_new), dtype=object)
+        images_ids_new[positions] = images_ids
+        self.index_offset = {}
+        indices = np.flatnonzero(gaps)
+        generated = np.ones(len(images_new), dtype=bool)
+        generated[positions] = False
+        if len(indices) > 0:
+            # All gaps at once, written straight into the output array
+            self.generate_fct(images_new, positions[indices - 1],
+                              positions[indices], n_frames=gaps[indices],
+                              out=images_new,
+                              out_indices=np.flatnonzero(generated))
+        for index in indices:
+            p_0, p_1 = positions[index - 1], positions[index]
+            images_ids_new[p_0 + 1:p_1] = generate_image_ids(
+                images_ids[index - 1], images_ids[index],
+                n_frames=gaps[index])
+            self.index_offset[index] = positions[index] - index
+
+        indices = {
+            'original': np.repeat(np.arange(len(gaps)) - 1, gaps),
+            'fixed': np.flatnonzero(generated)
+        }
+        return images_ids_new.tolist(), indices
 
 
 ################################################################################
 # Other stuff
 ################################################################################
+_worker_fix_algorithm = None
+
+_manifest_fields = ['folder', 'n_frames', 'n_corrected', 'n_generated', 'time']
+
+
+def _init_fix_worker(fix_algorithm):
+    global _worker_fix_algorithm
+    _worker_fix_algorithm = fix_algorithm
+
+
+def _run_fix_job(args):
+    return fix_sequence(_worker_fix_algorithm, *args)
+
+
+def fix_sequence(fix_algorithm, images_orig_dir, folder,
+                 images_corrected_dir=None, images_generated_dir=None,
+                 image_filenames=None, images_ids=None):
+    """ Corrects and/or generates the images of a single typhoon sequence
+    (see :func:`generate_new_image_dataset`).
+
+    :param fix_algorithm: Algorithm used to correct/generate the images.
+    :type fix_algorithm:
+        :class:`~pyphoon.clean_satellite.fix.TyphoonListImageFixAlgorithm`
+    :param images_orig_dir: Directory of the original image data.
+    :type images_orig_dir: str
+    :param folder: Folder of the typhoon sequence.
+    :type folder: str
+    :param images_corrected_dir: Directory for the corrected image data.
+    :type images_corrected_dir: str, default None
+    :param images_generated_dir: Directory for the generated image data.
+    :type images_generated_dir: str, default None
+    :param image_filenames: Sorted filenames of the sequence images. If not
+        used, the sequence folder is listed.
+    :type image_filenames: list, default None
+    :param images_ids: Ids of the sequence images. If not used, they are
+        obtained from **image_filenames**.
+    :type images_ids: list, default None
+    :return: Report of the sequence, with keys *folder*, *n_frames*,
+        *n_corrected*, *n_generated*, *time* (in seconds), *filenames* (list
+        with the corrected files written), *sizes* (their sizes in bytes),
+        *generated_filenames* and *generated_sizes* (same for the generated
+        files).
+    :rtype: dict
+    """
+    start = time()
+    path_to_folder = join(images_orig_dir, folder)
+    if image_filenames is None:
+        image_filenames = get_h5_filenames(path_to_folder)
+    report = {'folder': folder, 'n_frames': len(image_filenames),
+              'n_corrected': 0, 'n_generated': 0, 'filenames': [],
+              'sizes': [], 'generated_filenames': [], 'generated_sizes': []}
+    if len(image_filenames) > 0:
+        # Load images
+        images = read_source_images_bulk(path_to_folder,
+                                         filenames=image_filenames)
+        if images_ids is None:
+            images_ids = imagefilenames2ids(image_filenames).tolist()
+
+        # Correct images using algorithm
+        images_corrected, images_ids_corrected = fix_algorithm.apply(
+            images, images_ids, inplace=True)
+
+        # 1) Store corrected images in a original-data-like-wise folder
+        # hierarchy
+        if images_corrected_dir:
+            corrected_indices_orig = fix_algorithm.fixed_indices['original'][
+                'corrected']
+            corrected_indices_fix = fix_algorithm.fixed_indices['fixed'][
+                'corrected']
+            full_path = join(images_corrected_dir, folder)
+            if len(corrected_indices_orig) > 0 and not exists(full_path):
+                makedirs(full_path)
+            for i, j in zip(corrected_indices_orig, corrected_indices_fix):
+                path_to_file = join(full_path, image_filenames[i])
+                write_image(path_to_file=path_to_file,
+                            image=images_corrected[j])
+                report['filenames'].append(image_filenames[i])
+                report['sizes'].append(getsize(path_to_file))
+            report['n_corrected'] = len(corrected_indices_orig)
+
+        # 2) Store generated images in a original-data-like-wise folder
+        # hierarchy
+        if images_generated_dir:
+            generated_indices_orig = fix_algorithm.fixed_indices['original'][
+                'generated']
+            generated_indices_fix = fix_algorithm.fixed_indices['fixed'][
+                'generated']
+            full_path = join(images_generated_dir, folder)
+            if len(generated_indices_orig) > 0 and not exists(full_path):
+                makedirs(full_path)
+            for i, j in zip(generated_indices_orig, generated_indices_fix):
+                filename_1 = images_ids_corrected[j].split('_')[1]+"-"
+                filename_2 = "-".join(image_filenames[i].split("-")[1:])
+                image_filename = filename_1 + filename_2
+                path_to_file = join(full_path, image_filename)
+                write_image(path_to_file=path_to_file,
+                            image=images_corrected[j])
+                report['generated_filenames'].append(image_filename)
+                report['generated_sizes'].append(getsize(path_to_file))
+            report['n_generated'] = len(generated_indices_orig)
+
+        fix_algorithm.clear()
+    report['time'] = time() - start
+    return report
+
+
+def _get_sequence_index(images):
+    """ Gets the sorted filenames and the ids of the images of each sequence
+    folder from an images DataFrame (see
+    :attr:`pyphoon.db.pd_manager.PDManager.images`).
+
+    :return: Dictionary mapping each folder to a tuple (filenames, ids).
+    :rtype: dict
+    """
+    if images.empty:
+        return {}
+    images = images.sort_index()
+    ids = dates2ids(images.index.get_level_values('obs_time').values,
+                    images.index.get_level_values('seq_no').values)
+    directories = images['directory'].values
+    filenames = images['filename'].values
+    starts = np.concatenate(([0], np.flatnonzero(
+        directories[1:] != directories[:-1]) + 1))
+    ends = np.append(starts[1:], len(directories))
+    return {directories[i_0]: (filenames[i_0:i_1].tolist(),
+                               ids[i_0:i_1].tolist())
+            for i_0, i_1 in zip(starts, ends)}
+
+
+def read_manifest(manifest_file):
+    """ Reads the reports of the sequences completed by
+    :func:`generate_new_image_dataset`.
+
+    :param manifest_file: Path to the manifest (CSV) file.
+    :type manifest_file: str
+    :return: List with the report of each completed sequence.
+    :rtype: list
+    """
+    if not exists(manifest_file):
+        return []
+    with open(manifest_file, 'r', newline='') as f:
+        return list(csv.DictReader(f))
+
 
 def generate_new_image_dataset(images_orig_dir, fix_algorithm,
                                images_corrected_dir=None,
                                images_generated_dir=None,
                                display=False,
-                               folders=None):
+                               folders=None,
+                               n_workers=1,
+                               manifest_file=None,
+                               pd_manager=None):
     """ Inspects the original image data (assuming architecture explained in
     section `Data <data.html>`_ and corrects the detected corrupted images
     and/or generates the missing image data according to the algorithm
     defined by **fix_algorithm**. Note that only the new corrected/generated
     images are stored.
 
+    Sequences can be processed in parallel by a pool of processes, each of
+    them with its own copy of **fix_algorithm**. If **manifest_file** is
+    given, the report of each completed sequence is appended to it, and
+    sequences already listed there are skipped, so that interrupted runs
+    can be resumed.
+
+    If **pd_manager** is given, its **images** DataFrame is used as the index
+    of the original image data: sequence folders, filenames and ids are
+    taken from it instead of listing the folders. The files written are
+    then registered into its **corrected** and **generated** DataFrames (see
+    :func:`~pyphoon.db.pd_manager.PDManager.register_corrected_images` and
+    :func:`~pyphoon.db.pd_manager.PDManager.register_generated_images`), so
+    there is no need to scan the new images with
+    :func:`~pyphoon.db.pd_manager.PDManager.add_corrected_images` and
+    :func:`~pyphoon.db.pd_manager.PDManager.add_generated_images`. Note that
+    sequences skipped because of **manifest_file** are not registered.
+
     :param images_orig_dir: Directory of the original image data.
     :type images_orig_dir: str
     :param fix_algorithm: Algorithm used to correct/generate the images.
@@ -274,6 +500,18 @@ def generate_new_image_dataset(images_orig_dir, fix_algorithm,
     :param folders: List of the typhoon sequences to generate/correct. If not
         used, all sequences are used.
     :type folders: list, default None.
+    :param n_workers: Number of worker processes. If None, the default of
+        :class:`concurrent.futures.ProcessPoolExecutor` is used.
+    :type n_workers: int, default 1
+    :param manifest_file: Path to the manifest (CSV) file with the completed
+        sequences (see :func:`read_manifest`).
+    :type manifest_file: str, default None
+    :param pd_manager: Manager with the original images loaded in its
+        **images** DataFrame.
+    :type pd_manager: :class:`~pyphoon.db.pd_manager.PDManager`, default None
+    :return: List with the report of each sequence processed in this call
+        (see :func:`fix_sequence`), in order of completion.
+    :rtype: list
 
     :raises: Exception
     """
@@ -289,61 +527,65 @@ def generate_new_image_dataset(images_orig_dir, fix_algorithm,
         raise Exception('Path for generated images is given but fix algorithm '
                         'does not implement a generation method.')
 
-    from os import listdir, makedirs
-    from os.path import isdir, join, exists
-    from pyphoon.io.h5 import read_source_images, write_image
-    from pyphoon.io.utils import get_image_ids, get_h5_filenames
-
-    # Get folders
-    if folders is None:
+    # Get folders (and their images if an index is given)
+    index = {}
+    if pd_manager is not None:
+        index = _get_sequence_index(pd_manager.images)
+        if folders is None:
+            folders = sorted(index)
+    elif folders is None:
         folders = sorted([f for f in listdir(images_orig_dir) if isdir(join(
             images_orig_dir, f))])
-    # Iterate over all folders
-    count = 0
-    for folder in folders[185:]:
-        print(folder, count) if display else 0
-        count += 1
-        # Load images
-        images = read_source_images(join(images_orig_dir, folder))
-        images_ids = get_image_ids(join(images_orig_dir, folder))
-        image_filenames = get_h5_filenames(join(images_orig_dir, folder))
-
-        # Correct images using algorithm
-        images_corrected, images_ids_corrected = fix_algorithm.apply(images,
-                                                                     images_ids)
-        # 1) Get indices of corrected images
-        if images_corrected_dir:
-            corrected_indices_orig = fix_algorithm.fixed_indices['original'][
-                'corrected']
-            corrected_indices_fix = fix_algorithm.fixed_indices['fixed'][
-                'corrected']
-            # Store corrected images in a original-data-like-wise folder
-            # hierarchy
-            for i, j in zip(corrected_indices_orig, corrected_indices_fix):
-                full_path = join(images_corrected_dir, folder)
-                if not exists(full_path):
-                    makedirs(full_path)
-                #print(" saving", folder, j)
-                write_image(path_to_file=join(full_path, image_filenames[i]),
-                            image=images_corrected[j])
-
-        # 2) Get indices of generated images
-        if images_generated_dir:
-            generated_indices_orig = fix_algorithm.fixed_indices['original'][
-                'generated']
-            generated_indices_fix = fix_algorithm.fixed_indices['fixed'][
-                'generated']
-
-            # Store generated images in a original-data-like-wise folder
-            # hierarchy
-            for i, j in zip(generated_indices_orig, generated_indices_fix):
-                full_path = join(images_generated_dir, folder)
-                if not exists(full_path):
-                    makedirs(full_path)
-                filename_1 = images_ids_corrected[j].split('_')[1]+"-"
-                filename_2 = "-".join(image_filenames[i].split("-")[1:])
-                image_filename = filename_1 + filename_2
-                write_image(path_to_file=join(full_path, image_filename),
-                            image=images_corrected[j])
-
-        fix_algorithm.clear()
\ No newline at end of file
+    if manifest_file is not None:
+        completed = {report['folder'] for report in
+                     read_manifest(manifest_file)}
+        folders = [f for f in folders if f not in completed]
+    jobs = [(images_orig_dir, folder, images_corrected_dir,
+             images_generated_dir) + index.get(folder, (None, None))
+            for folder in folders]
+
+    reports = []
+    manifest = None
+    if manifest_file is not None:
+        new_manifest = not exists(manifest_file)
+        manifest = open(manifest_file, 'a', newline='')
+        writer = csv.DictWriter(manifest, fieldnames=_manifest_fields,
+                                extrasaction='ignore')
+        if new_manifest:
+            writer.writeheader()
+
+    def _complete(report):
+        reports.append(report)
+        print(report['folder'], len(reports), '/', len(jobs), '- frames:',
+              report['n_frames'], 'corrected:', report['n_corrected'],
+              'generated:', report['n_generated'],
+              '({0:.1f}s)'.format(report['time'])) if display else 0
+        if manifest is not None:
+            writer.writerow(report)
+            manifest.flush()
+
+    try:
+        if n_workers == 1:
+            for args in jobs:
+                _complete(fix_sequence(fix_algorithm, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers,
+                                     initializer=_init_fix_worker,
+                                     initargs=(fix_algorithm,)) as executor:
+                futures = [executor.submit(_run_fix_job, args) for args in
+                           jobs]
+                for future in as_completed(futures):
+                    _complete(future.result())
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    if pd_manager is not None:
+        pd_manager.register_corrected_images({
+            report['folder']: (report['filenames'], report['sizes'])
+            for report in reports if report['filenames']})
+        pd_manager.register_generated_images({
+            report['folder']: (report['generated_filenames'],
+                               report['generated_sizes'])
+            for report in reports if report['generated_filenames']})
+    return reports
@@ -4,6 +4,8 @@ synthetic images. The standard notation is ``generate_new_frames_<method
 index>``.
 """
 
+import numpy as np
+
 
 ################################################################################
 # Fill-Gaps methods
@@ -11,25 +13,76 @@ index>``.
 
 
 def generate_new_frames_1(images, frame_idx_0, frame_idx_1,
-                          n_frames=1):
-    """ Linearly interpolates two frames from a typhoon sequence.
+                          n_frames=1, dtype=None, out=None, out_indices=None):
+    """ Linearly interpolates two frames from a typhoon sequence. Several
+    gaps can be filled at once by giving one **frame_idx_0**,
+    **frame_idx_1** and **n_frames** per gap: the new frames of all gaps are
+    computed in a single broadcast operation, weighting the frames around
+    each gap with a *(N, 1, 1)* array (*N*: total number of new frames).
 
-    :param images: List with image arrays. Each element of the list must be an
-            array of 2 dimensions.
-    :type images: list
-    :param frame_idx_0: First frame index.
-    :type frame_idx_0: int
-    :param frame_idx_1: Second frame index.
-    :type frame_idx_1: int
-    :param n_frames: Number of frames to generate using interpolation.
-    :type n_frames: int
-    :return: List with the new generated frames.
-    :rtype: list
+    :param images: List with image arrays or *TxWxH* array. Each image must
+        be an array of 2 dimensions.
+    :type images: list or numpy.array
+    :param frame_idx_0: First frame index (one per gap).
+    :type frame_idx_0: int or numpy.array
+    :param frame_idx_1: Second frame index (one per gap).
+    :type frame_idx_1: int or numpy.array
+    :param n_frames: Number of frames to generate using interpolation (one
+        per gap).
+    :type n_frames: int or numpy.array
+    :param dtype: Type of the new frames. Integer types are rounded. By
+        default, the type of **out** if used, otherwise the type of the
+        images if they are floats and float64 if not.
+    :type dtype: numpy.dtype, default None
+    :param out: Array where the new frames are written, of size *NxWxH* or,
+        if **out_indices** is used, e.g. the whole output sequence.
+    :type out: numpy.array, default None
+    :param out_indices: Positions in **out** of the *N* new frames, e.g. the
+        positions of the gaps in the output sequence.
+    :type out_indices: numpy.array, default None
+    :return: Array **out**, with the new frames of all gaps one after the
+        other unless **out_indices** is used.
+    :rtype: numpy.array
     """
-    frame_0 = images[frame_idx_0]
-    frame_1 = images[frame_idx_1]
-    frames_new = [((n_frames-n)*frame_0 + (n+1)*frame_1) / (n_frames+1) for
-                  n in range(n_frames)]
+    frame_idx_0 = np.atleast_1d(frame_idx_0)
+    frame_idx_1 = np.atleast_1d(frame_idx_1)
+    n_frames = np.broadcast_to(n_frames, frame_idx_0.shape)
+    if isinstance(images, np.ndarray):
+        frames_0, frames_1 = images[frame_idx_0], images[frame_idx_1]
+    else:
+        frames_0 = np.stack([np.asarray(images[i]) for i in frame_idx_0])
+        frames_1 = np.stack([np.asarray(images[i]) for i in frame_idx_1])
+    if dtype is None:
+        if out is not None:
+            dtype = out.dtype
+        elif np.issubdtype(frames_0.dtype, np.floating):
+            dtype = frames_0.dtype
+        else:
+            dtype = np.float64
+    dtype = np.dtype(dtype)
+    work_dtype = dtype if np.issubdtype(dtype, np.floating) else np.float32
+    total = int(n_frames.sum())
+    if out is None:
+        out = np.empty((total,) + frames_0.shape[1:], dtype=dtype)
+
+    # Gap of each new frame and weight of the second frame of its gap
+    gap = np.repeat(np.arange(len(n_frames)), n_frames)
+    step = np.arange(total) - np.repeat(np.cumsum(n_frames) - n_frames,
+                                        n_frames) + 1
+    weights = (step / (n_frames[gap] + 1)).astype(work_dtype).reshape(
+        (total,) + (1,) * (frames_0.ndim - 1))
+    direct = out_indices is None and out.dtype == work_dtype
+    frames = out if direct else np.empty((total,) + frames_0.shape[1:],
+                                         dtype=work_dtype)
+    np.multiply(np.subtract(frames_1, frames_0, dtype=work_dtype)[gap],
+                weights, out=frames)
+    frames += frames_0[gap]
+    if not np.issubdtype(dtype, np.floating):
+        np.rint(frames, out=frames)
+    if out_indices is not None:
+        out[out_indices] = frames
+    elif not direct:
+        out[...] = frames
     # TODO: Reduce number of different values appearing in all elements in
     # frames_new
-    return frames_new
\ No newline at end of file
+    return out
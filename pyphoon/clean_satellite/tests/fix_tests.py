@@ -0,0 +1,216 @@
+import unittest
+import numpy as np
+import pandas as pd
+from os import makedirs, listdir
+from os.path import join, exists
+from shutil import rmtree
+from tempfile import mkdtemp
+from pyphoon.io.h5 import write_image
+from pyphoon.clean_satellite.correction import correct_corrupted_pixels_1, \
+    correct_corrupted_pixels_2
+from pyphoon.clean_satellite.detection import detect_corrupted_pixels_1, \
+    detect_corrupted_frames
+from pyphoon.clean_satellite.generation import generate_new_frames_1
+from pyphoon.clean_satellite.fix import TyphoonListImageFixAlgorithm, \
+    generate_new_image_dataset, read_manifest
+from pyphoon.db.pd_manager import PDManager
+
+
+class TestFixMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.params = {'min_th': 160, 'max_th': 310}
+        self.fix_algorithm = TyphoonListImageFixAlgorithm(
+            detect_fct=detect_corrupted_pixels_1,
+            correct_fct=correct_corrupted_pixels_1,
+            generate_fct=generate_new_frames_1,
+            detect_params=self.params,
+            n_frames_th=3
+        )
+        # Sequence of 6 frames, frame 2 has two corrupted pixels and frame 4
+        # one
+        self.images = np.full((6, 4, 4), 250.)
+        self.images += np.arange(6)[:, None, None]
+        self.images[2, 0, 0] = 0
+        self.images[2, 1, 1] = 400
+        self.images[4, 3, 3] = 100
+        self.images_ids = ['200717_20071006{0:02d}'.format(h) for h in
+                           [0, 1, 2, 3, 4, 5]]
+
+    def test_detect_corrupted_frames(self):
+        mask, counts = detect_corrupted_frames(self.images,
+                                               detect_corrupted_pixels_1,
+                                               self.params)
+        self.assertEqual(mask.shape, self.images.shape)
+        self.assertEqual(counts.tolist(), [0, 0, 2, 0, 1, 0])
+        mask_list, counts_list = detect_corrupted_frames(
+            list(self.images), detect_corrupted_pixels_1, self.params)
+        self.assertTrue((mask == mask_list).all())
+        self.assertEqual(self.params, {'min_th': 160, 'max_th': 310})
+
+    def test_detect_and_correct(self):
+        images = list(self.images.copy())
+        indices = self.fix_algorithm.detect_and_correct(images,
+                                                        self.images_ids)
+        self.assertEqual(indices, [2, 4])
+        _, counts = detect_corrupted_frames(np.array(images),
+                                            detect_corrupted_pixels_1,
+                                            self.params)
+        self.assertEqual(counts.sum(), 0)
+        self.assertAlmostEqual(images[2][0, 0], 252.)
+
+    def test_correct_corrupted_pixels_2(self):
+        mask, _ = detect_corrupted_frames(self.images,
+                                          detect_corrupted_pixels_1,
+                                          self.params)
+        values = correct_corrupted_pixels_2(self.images, mask)
+        # Isolated corrupted pixels: same result as frame-by-frame correction
+        images = list(self.images.copy())
+        expected = [correct_corrupted_pixels_1(images, index, mask[index],
+                                               detect_corrupted_pixels_1,
+                                               self.params)
+                    for index in [2, 4]]
+        self.assertTrue(np.allclose(values, np.concatenate(expected)))
+
+        # Pixel corrupted in frames 2 and 3: nearest valid frames are 1 and 4
+        images = self.images.copy()
+        images[3, 0, 0] = 0
+        mask, _ = detect_corrupted_frames(images, detect_corrupted_pixels_1,
+                                          self.params)
+        values = correct_corrupted_pixels_2(images, mask)
+        w = np.exp(-1)
+        self.assertAlmostEqual(values[0], (251 + w*254)/(1 + w))
+        self.assertAlmostEqual(values[2], (w*251 + 254)/(1 + w))
+
+    def test_detect_and_correct_batch(self):
+        fix_algorithm = TyphoonListImageFixAlgorithm(
+            detect_fct=detect_corrupted_pixels_1,
+            correct_fct=correct_corrupted_pixels_2,
+            detect_params=self.params,
+            batch_correction=True
+        )
+        images = self.images.copy()
+        indices = fix_algorithm.detect_and_correct(images, self.images_ids)
+        self.assertEqual(indices, [2, 4])
+        self.assertAlmostEqual(images[2, 0, 0], 252.)
+        self.assertAlmostEqual(images[4, 3, 3], 254.)
+
+    def test_apply(self):
+        # Frame at 03h is missing
+        images = np.delete(self.images, 3, axis=0)
+        images_ids = self.images_ids[:3] + self.images_ids[4:]
+        images_new, images_ids_new = self.fix_algorithm.apply(images,
+                                                              images_ids)
+        self.assertEqual(images_new.shape, (6, 4, 4))
+        self.assertEqual(images_ids_new, self.images_ids)
+        fixed_indices = self.fix_algorithm.fixed_indices
+        self.assertEqual(fixed_indices['original']['corrected'].tolist(),
+                         [2, 3])
+        self.assertEqual(fixed_indices['fixed']['corrected'].tolist(), [2, 4])
+        self.assertEqual(fixed_indices['original']['generated'].tolist(), [2])
+        self.assertEqual(fixed_indices['fixed']['generated'].tolist(), [3])
+        self.assertTrue(np.allclose(images_new[3],
+                                    (images_new[2] + images_new[4]) / 2))
+        # Input is left untouched
+        self.assertEqual(images[2, 0, 0], 0)
+
+    def test_apply_inplace(self):
+        fix_algorithm = TyphoonListImageFixAlgorithm(
+            detect_fct=detect_corrupted_pixels_1,
+            correct_fct=correct_corrupted_pixels_1,
+            detect_params=self.params
+        )
+        images = self.images.copy()
+        images_new, _ = fix_algorithm.apply(images, self.images_ids,
+                                            inplace=True)
+        self.assertIs(images_new, images)
+        self.assertAlmostEqual(images[2, 0, 0], 252.)
+
+    def test_generate_new_frames_1(self):
+        frames = generate_new_frames_1(self.images, 0, 5, n_frames=3)
+        self.assertEqual(frames.shape, (3, 4, 4))
+        self.assertTrue(np.allclose(frames[:, 1, 1],
+                                    [251.25, 252.5, 253.75]))
+        # Several gaps at once, written in the given array
+        out = np.zeros((3, 4, 4), dtype='uint8')
+        frames = generate_new_frames_1(self.images, np.array([0, 3]),
+                                       np.array([2, 5]),
+                                       n_frames=np.array([1, 2]), out=out)
+        self.assertIs(frames, out)
+        self.assertEqual(out[:, 2, 2].tolist(), [251, 254, 254])
+        # ... or at the given positions of the output sequence
+        out = np.zeros((6, 4, 4), dtype='float32')
+        generate_new_frames_1(self.images, np.array([0, 3]),
+                              np.array([2, 5]), n_frames=np.array([1, 2]),
+                              out=out, out_indices=np.array([1, 3, 5]))
+        self.assertTrue(np.allclose(out[[1, 3, 5], 2, 2],
+                                    [251, 253 + 2 / 3, 253 + 4 / 3]))
+
+    def _write_image_dataset(self, tmp_dir):
+        images_dir = join(tmp_dir, 'image')
+        for seq_no, hours in [('200717', [0, 1, 2, 4, 5]),
+                              ('200718', [0, 1, 2, 3, 4, 5])]:
+            makedirs(join(images_dir, seq_no))
+            for image, hour in zip(self.images, hours):
+                write_image(join(images_dir, seq_no, '20071006{0:02d}-{1}-'
+                                 'MTS1-1.h5'.format(hour, seq_no)), image)
+        return images_dir
+
+    def test_generate_new_image_dataset(self):
+        tmp_dir = mkdtemp()
+        images_dir = self._write_image_dataset(tmp_dir)
+        corrected_dir = join(tmp_dir, 'corrected')
+        generated_dir = join(tmp_dir, 'generated')
+        manifest_file = join(tmp_dir, 'manifest.csv')
+        try:
+            reports = generate_new_image_dataset(
+                images_dir, self.fix_algorithm, corrected_dir, generated_dir,
+                n_workers=2, manifest_file=manifest_file)
+            reports = {r['folder']: r for r in reports}
+            self.assertEqual(reports['200717']['n_generated'], 1)
+            self.assertEqual(reports['200718']['n_generated'], 0)
+            self.assertEqual(reports['200718']['n_corrected'], 2)
+            self.assertEqual(len(read_manifest(manifest_file)), 2)
+            self.assertEqual(listdir(join(generated_dir, '200717')),
+                             ['2007100603-200717-MTS1-1.h5'])
+            self.assertEqual(len(listdir(join(corrected_dir, '200718'))), 2)
+            # Completed sequences are skipped
+            self.assertEqual(generate_new_image_dataset(
+                images_dir, self.fix_algorithm, corrected_dir, generated_dir,
+                manifest_file=manifest_file), [])
+        finally:
+            rmtree(tmp_dir)
+
+    def test_generate_new_image_dataset_pd_manager(self):
+        tmp_dir = mkdtemp()
+        images_dir = self._write_image_dataset(tmp_dir)
+        corrected_dir = join(tmp_dir, 'corrected')
+        generated_dir = join(tmp_dir, 'generated')
+        try:
+            pd_manager = PDManager()
+            pd_manager.add_original_images(images_dir)
+            # Only the sequences in the index are fixed
+            pd_manager.images.drop(200718, level='seq_no', inplace=True)
+            reports = generate_new_image_dataset(
+                images_dir, self.fix_algorithm, corrected_dir, generated_dir,
+                pd_manager=pd_manager)
+            self.assertEqual([r['folder'] for r in reports], ['200717'])
+            self.assertEqual(pd_manager.corrected['filename'].tolist(), [
+                '2007100602-200717-MTS1-1.h5', '2007100605-200717-MTS1-1.h5'])
+            self.assertEqual(pd_manager.generated['filename'].tolist(), [
+                '2007100603-200717-MTS1-1.h5'])
+            # Registered rows point at existing files
+            for directory, table in [(corrected_dir, pd_manager.corrected),
+                                     (generated_dir, pd_manager.generated)]:
+                for folder, filename in zip(table['directory'],
+                                            table['filename']):
+                    self.assertTrue(exists(join(directory, folder,
+                                                filename)))
+            # Same rows as scanning the corrected and generated images
+            registered = pd_manager.corrected, pd_manager.generated
+            pd_manager.add_corrected_images(corrected_dir)
+            pd_manager.add_generated_images(generated_dir)
+            pd.testing.assert_frame_equal(registered[0], pd_manager.corrected)
+            pd.testing.assert_frame_equal(registered[1], pd_manager.generated)
+        finally:
+            rmtree(tmp_dir)
@@ -35,12 +35,13 @@ def generate_image_ids(id_0, id_1, n_frames=1):
     :return: List of newly generated ids.
     :rtype: list
     """
-    dif = id2date(id_1) - id2date(id_0)
+    date_0 = id2date(id_0)
+    dif = id2date(id_1) - date_0
 
     name = id_0.split('_')[0]
     ids_new = [
         name + "_" + (
-            id2date(id_0) + (n + 1) / (n_frames + 1) *
+            date_0 + (n + 1) / (n_frames + 1) *
             dif).strftime("%Y%m%d%H") for n in
         range(n_frames)
     ]
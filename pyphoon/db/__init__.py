@@ -10,6 +10,8 @@ Content
 +-------------------------------------------+---------------------------------------------------------------------------------------------------+
 | module                                    | Description                                                                                       |
 +===========================================+===================================================================================================+
+| :mod:`pyphoon.db.data_convertor`          | Converts the image archive to uint8 images, verifying the conversion error.                       |
++-------------------------------------------+---------------------------------------------------------------------------------------------------+
 | :mod:`pyphoon.db.data_extractor`          | Extracts data from a PDManager instance and generates a dataset ready to be used for training.    |
 +-------------------------------------------+---------------------------------------------------------------------------------------------------+
 | :mod:`pyphoon.db.pd_manager`              | Encapsulates typhoon dataset information, including corrected and original image versions.        |
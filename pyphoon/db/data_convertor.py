@@ -1,56 +1,320 @@
-from pyphoon.io.h5 import read_source_image, write_image, get_h5_filenames
+"""
+Conversion of the image archive from float images (brightness temperatures
+in Kelvin) to quantised images. Images are encoded with a codec from
+:mod:`pyphoon.io.quantisation` (available from this module too), whose
+parameters are stored with the images so that readers decode them
+automatically. By default, temperatures within [160, 310] K are linearly
+quantised to uint8, hence the conversion error is at most half a
+quantisation step (~0.3 K). Values out of the range of the codec (e.g.
+corrupted pixels, see :mod:`pyphoon.clean_satellite`) are clipped. Converted
+images are verified in memory against the largest pixel error before being
+written, images exceeding the given tolerance are reported and not written.
+
+Converted images can be written in the following formats:
+
+-   'h5': One HDF5 file per image, as in the original archive (see
+    :func:`~pyphoon.io.h5.write_image`).
+-   'packed': One consolidated HDF5 file per sequence (see
+    :mod:`pyphoon.io.sequence`).
+-   'npy': Uncompressed cache files, one per sequence (see
+    :mod:`pyphoon.io.cache`). Codec parameters cannot be stored, hence only
+    the default codec is supported.
+"""
+
+from pyphoon.io.h5 import read_source_image, write_image, get_h5_filenames, \
+    read_source_images_bulk
+from pyphoon.io.sequence import write_sequence_file, get_sequence_filename
+from pyphoon.io.cache import write_sequence_cache
+from pyphoon.io.utils import folder2name
+from pyphoon.io.quantisation import Codec, LinearCodec, Float16Codec, \
+    LUTCodec, codecs, get_codec
 import numpy as np
 from os.path import exists, dirname, isdir, join
-from os import makedirs, listdir
+from os import makedirs, listdir, cpu_count
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import time
-from joblib import Parallel, delayed
+
+_output_formats = ('h5', 'packed', 'npy')
 
 
-def convert2byte_per_pixel(src_file, dst_file):
+def convert2byte_per_pixel(src_file, dst_file, tolerance=0.5, codec=None,
+                           profile=None):
+    """ Converts an image file to uint8 (or with the given codec). The image
+    is only written if its largest conversion error is within **tolerance**.
+
+    :param src_file: Path to the original image file.
+    :type src_file: str
+    :param dst_file: Path of the converted image file.
+    :type dst_file: str
+    :param tolerance: Largest conversion error allowed (in Kelvin).
+    :type tolerance: float, default 0.5
+    :param codec: Codec used to encode the image. By default, linear uint8.
+    :type codec: :class:`~pyphoon.io.quantisation.Codec`, default None
+    :param profile: Storage profile of the converted images (see
+        :mod:`pyphoon.io.storage`). By default, gzip compression.
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    :return: Largest conversion error of the image.
+    :rtype: float
+    """
+    codec = LinearCodec() if codec is None else codec
+    src_imag = read_source_image(src_file)
+    new_imag = codec.encode(src_imag)
+    error = codec.get_error(src_imag, new_imag)
+    if not error <= tolerance:
+        print('======  >>>  ERROR when converting file {0} (error: '
+              '{1})'.format(src_file, error))
+        return error
     dir_name = dirname(dst_file)
     if not exists(dir_name):
-        makedirs(dir_name)
-    src_imag = read_source_image(src_file)
-    new_imag = convert_float_to_uint(src_imag)
-    for attempt in range(5):
-        write_image(dst_file, new_imag, 'gzip')
-        # verification of integrity
-        verification = read_source_image(dst_file)
-        restored_img = convert_uint_to_float(verification)
-        if abs((src_imag - restored_img)).min() < 0.5:
-            break
-    if attempt == 4:
-        print('======  >>>  ERRRORRRRRRRR when converting file {0}'.format(src_file))
+        makedirs(dir_name, exist_ok=True)
+    write_image(dst_file, new_imag, 'gzip', codec=codec, profile=profile)
+    return error
 
 
-def convert_float_to_uint(src_data):
-    new_data = np.round((src_data - 160) / (310 - 160) * 255)
-    assert new_data.all().min() >= 0
-    assert new_data.all().max() <= 255
-    new_data = new_data.astype(dtype='uint8')
-    return new_data
+def convert_float_to_uint(src_data, min_th=160, max_th=310):
+    """ Quantises float images to uint8. Values out of [**min_th**,
+    **max_th**] are clipped.
 
+    :param src_data: Image or array of images of any shape.
+    :type src_data: numpy.array
+    :param min_th: Value mapped to 0.
+    :type min_th: float, default 160
+    :param max_th: Value mapped to 255.
+    :type max_th: float, default 310
+    :return: Array of type uint8 with the same shape as **src_data**.
+    :rtype: numpy.array
+    """
+    return LinearCodec('uint8', min_th, max_th).encode(src_data)
 
-def convert_uint_to_float(src_data):
-    return src_data.astype(dtype='float32') / 255 * (310 - 160) + 160
 
+def convert_uint_to_float(src_data, min_th=160, max_th=310):
+    """ Restores float images from uint8 images (see
+    :func:`convert_float_to_uint`).
 
-def convert_dir(input_dir, output_dir, display=False):
-    folders = sorted([f for f in listdir(input_dir) if isdir(join(input_dir, f))])
-    Parallel(n_jobs=8)(delayed(process_folder)(display, folder, input_dir, output_dir) for folder in folders)
+    :param src_data: Image or array of images of any shape.
+    :type src_data: numpy.array
+    :param min_th: Value mapped to 0.
+    :type min_th: float, default 160
+    :param max_th: Value mapped to 255.
+    :type max_th: float, default 310
+    :return: Array of type float32 with the same shape as **src_data**.
+    :rtype: numpy.array
+    """
+    return LinearCodec('uint8', min_th, max_th).decode(src_data)
 
 
-def process_folder(display, folder, input_dir, output_dir):
+def get_conversion_error(src_data, uint_data, min_th=160, max_th=310):
+    """ Computes the largest pixel error of uint8 images with respect to the
+    original float images, clipped to [**min_th**, **max_th**].
+
+    :param src_data: Image (*WxH*) or array of images (*NxWxH*).
+    :type src_data: numpy.array
+    :param uint_data: Converted images (see :func:`convert_float_to_uint`).
+    :type uint_data: numpy.array
+    :param min_th: Value mapped to 0.
+    :type min_th: float, default 160
+    :param max_th: Value mapped to 255.
+    :type max_th: float, default 310
+    :return: Largest error of the image (or of each image). NaN values in
+        the original images give NaN errors.
+    :rtype: float or numpy.array
+    """
+    return LinearCodec('uint8', min_th, max_th).get_error(src_data, uint_data)
+
+
+def _check_codec(output_format, codec):
+    """ Checks the output format and the codec of a conversion.
+
+    :return: Codec to use.
+    :rtype: :class:`~pyphoon.io.quantisation.Codec`
+    """
+    if output_format not in _output_formats:
+        raise Exception('output_format should be one of {0}'.format(
+            _output_formats))
+    if codec is None:
+        return LinearCodec()
+    if output_format == 'npy' and (not isinstance(codec, LinearCodec) or
+                                   codec.get_params() !=
+                                   LinearCodec().get_params()):
+        raise Exception("Only the default codec can be used with 'npy' "
+                        "output format")
+    return codec
+
+
+def convert_sequence(input_dir, output_dir, folder, output_format='h5',
+                     tolerance=0.5, n_workers=None, codec=None,
+                     profile=None):
+    """ Converts all images of a typhoon sequence to uint8 (or with the given
+    codec) in a single vectorised call.
+
+    :param input_dir: Directory of the float image data.
+    :type input_dir: str
+    :param output_dir: Directory for the uint8 image data.
+    :type output_dir: str
+    :param folder: Folder of the typhoon sequence.
+    :type folder: str
+    :param output_format: Format of the converted images, 'h5', 'packed' or
+        'npy' (see :mod:`~pyphoon.db.data_convertor`).
+    :type output_format: str, default 'h5'
+    :param tolerance: Largest conversion error allowed (in Kelvin).
+    :type tolerance: float, default 0.5
+    :param n_workers: Number of threads used to read the sequence (see
+        :func:`~pyphoon.io.h5.read_source_images_bulk`).
+    :type n_workers: int, default None
+    :param codec: Codec used to encode the images. By default, linear uint8.
+    :type codec: :class:`~pyphoon.io.quantisation.Codec`, default None
+    :param profile: Storage profile of the converted images (see
+        :mod:`pyphoon.io.storage`). By default, gzip compression.
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    :return: Report of the sequence, with keys *folder*, *n_frames* (frames
+        written), *n_failed* (frames exceeding **tolerance**, not written),
+        *max_error* and *time* (in seconds).
+    :rtype: dict
+
+    :raises: Exception
+    """
+    codec = _check_codec(output_format, codec)
+    start = time.time()
     input_dir_full = join(input_dir, folder)
-    output_dir_full = join(output_dir, folder)
-    t1 = time.time()
-    print("Converting files from {0} dir...".format(folder)) if display is True else None
-    files_count = 0
-    for f in get_h5_filenames(input_dir_full):
-        convert2byte_per_pixel(join(input_dir_full, f), join(output_dir_full, f))
-        files_count += 1
-    t2 = time.time()
-    print('.', end='', flush=True)
-    print("Converting {0} files done in {1} seconds.".format(files_count, t2 - t1)) if display is True else None
+    filenames = get_h5_filenames(input_dir_full)
+    images = read_source_images_bulk(input_dir_full, n_workers=n_workers,
+                                     filenames=filenames)
+    new_images = codec.encode(images)
+    errors = codec.get_error(images, new_images)
+    valid = errors <= tolerance
+    for f in np.array(filenames)[~valid]:
+        print('======  >>>  ERROR when converting file {0}'.format(
+            join(input_dir_full, f)))
+
+    # Store images
+    if output_format == 'h5':
+        output_dir_full = join(output_dir, folder)
+        if not exists(output_dir_full):
+            makedirs(output_dir_full, exist_ok=True)
+        for f, image in zip(np.array(filenames)[valid], new_images[valid]):
+            write_image(join(output_dir_full, f), image, 'gzip', codec=codec,
+                        profile=profile)
+    else:
+        if not exists(output_dir):
+            makedirs(output_dir, exist_ok=True)
+        filenames = np.array(filenames)[valid].tolist()
+        if output_format == 'packed':
+            write_sequence_file(get_sequence_filename(output_dir, folder),
+                                folder2name(folder), new_images[valid],
+                                filenames, codec=codec, profile=profile)
+        else:
+            write_sequence_cache(output_dir, folder, new_images[valid],
+                                 filenames)
+    return {'folder': folder, 'n_frames': int(np.count_nonzero(valid)),
+            'n_failed': int(np.count_nonzero(~valid)),
+            'max_error': float(np.max(errors, initial=0)),
+            'time': time.time() - start}
+
+
+def convert_dir(input_dir, output_dir, display=False, n_workers=None,
+                output_format='h5', folders=None, tolerance=0.5, codec=None,
+                profile=None):
+    """ Converts the images of all typhoon sequences to uint8 (or with the
+    given codec) using a pool of processes. Images written one per file ('h5'
+    format) are distributed file by file, whereas sequence formats are
+    distributed sequence by sequence (see :func:`convert_sequence`).
+
+    :param input_dir: Directory of the float image data (with one folder
+        per typhoon sequence).
+    :type input_dir: str
+    :param output_dir: Directory for the uint8 image data.
+    :type output_dir: str
+    :param display: Set to True to get information as the method is executed.
+    :type display: bool
+    :param n_workers: Number of worker processes. By default, the number of
+        available cores.
+    :type n_workers: int, default None
+    :param output_format: Format of the converted images, 'h5', 'packed' or
+        'npy' (see :mod:`~pyphoon.db.data_convertor`).
+    :type output_format: str, default 'h5'
+    :param folders: List of the typhoon sequences to convert. If not used,
+        all sequences are converted.
+    :type folders: list, default None
+    :param tolerance: Largest conversion error allowed (in Kelvin).
+    :type tolerance: float, default 0.5
+    :param codec: Codec used to encode the images. By default, linear uint8.
+    :type codec: :class:`~pyphoon.io.quantisation.Codec`, default None
+    :param profile: Storage profile of the converted images (see
+        :mod:`pyphoon.io.storage`). By default, gzip compression.
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    :return: List with the report of each sequence (see
+        :func:`convert_sequence`, *time* is not reported for 'h5' format).
+    :rtype: list
+
+    :raises: Exception
+    """
+    codec = _check_codec(output_format, codec)
+    if folders is None:
+        folders = sorted([f for f in listdir(input_dir) if isdir(join(
+            input_dir, f))])
+    if n_workers is None:
+        n_workers = cpu_count() or 1
 
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        if output_format != 'h5':
+            reports = []
+            for report in executor.map(convert_sequence, repeat(input_dir),
+                                       repeat(output_dir), folders,
+                                       repeat(output_format),
+                                       repeat(tolerance), repeat(None),
+                                       repeat(codec), repeat(profile)):
+                print(report['folder'], report) if display else 0
+                reports.append(report)
+            return reports
 
+        filenames = [get_h5_filenames(join(input_dir, f)) for f in folders]
+        src_files = [join(input_dir, folder, f) for folder, names in
+                     zip(folders, filenames) for f in names]
+        dst_files = [join(output_dir, folder, f) for folder, names in
+                     zip(folders, filenames) for f in names]
+        chunksize = max(1, len(src_files) // (4 * n_workers))
+        errors = np.fromiter(executor.map(
+            convert2byte_per_pixel, src_files, dst_files, repeat(tolerance),
+            repeat(codec), repeat(profile), chunksize=chunksize),
+            dtype=float, count=len(src_files))
+
+    reports = []
+    counts = [len(names) for names in filenames]
+    for folder, folder_errors in zip(folders, np.split(errors, np.cumsum(
+            counts)[:-1])):
+        n_failed = int(np.count_nonzero(~(folder_errors <= tolerance)))
+        reports.append({'folder': folder,
+                        'n_frames': len(folder_errors) - n_failed,
+                        'n_failed': n_failed,
+                        'max_error': float(np.max(folder_errors, initial=0))})
+        print(folder, reports[-1]) if display else 0
+    return reports
+
+
+def process_folder(display, folder, input_dir, output_dir):
+    """ Converts the images of a single typhoon sequence to uint8, one file
+    per image (see :func:`convert_sequence`).
+
+    :param display: Set to True to get information as the method is executed.
+    :type display: bool
+    :param folder: Folder of the typhoon sequence.
+    :type folder: str
+    :param input_dir: Directory of the float image data.
+    :type input_dir: str
+    :param output_dir: Directory for the converted image data.
+    :type output_dir: str
+    :return: Report of the sequence (see :func:`convert_sequence`).
+    :rtype: dict
+    """
+    t1 = time.time()
+    print("Converting files from {0} dir...".format(folder)) if display \
+        else 0
+    report = convert_sequence(input_dir, output_dir, folder)
+    t2 = time.time()
+    print("Converting {0} files done in {1} seconds.".format(
+        report['n_frames'], t2 - t1)) if display else 0
+    return report
@@ -1,10 +1,12 @@
-from pyphoon.io.h5 import read_source_image, write_h5_dataset_file
+from pyphoon.io.h5 import write_h5_dataset_file, H5DatasetWriter
+from pyphoon.io.cache import read_image
 from pyphoon.db.pd_manager import PDManager
 import os
 from os.path import exists, isdir, join, abspath
 import pandas as pd
 import time
 import random
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 
@@ -12,11 +14,25 @@ def get_id(dt, seq):
     return str(seq) + '_' + dt.strftime("%Y%m%d%H")
 
 
+# DataExtractor used by chunk worker processes
+_worker_extractor = None
+
+
+def _init_chunk_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _run_chunk_job(method, args):
+    return getattr(_worker_extractor, method)(*args)
+
+
 class DataExtractor:
     """ Data extractor. Operates with DataFrames, created by PDManager.
     """
 
-    def __init__(self, original_images_dir, corrected_images_dir, pd_manager):
+    def __init__(self, original_images_dir, corrected_images_dir, pd_manager,
+                 image_caches=None):
         """
         Constructor
 
@@ -24,10 +40,14 @@ class DataExtractor:
         :param corrected_images_dir: Corrected images directory
         :param pd_manager: PDManager object
         :type pd_manager: pyphoon.db.PDManager
+        :param image_caches: Uncompressed caches of the image directories,
+            used instead of the HDF5 files whenever they cover an image.
+        :type image_caches: list of pyphoon.io.cache.ImageCache
         """
         self.original_images_dir = original_images_dir
         self.corrected_images_dir = corrected_images_dir
         self.pd_man = pd_manager
+        self.image_caches = image_caches
 
     def _read_triplet_data(self, triplets, full_filenames, preprocessor=None):
         """
@@ -40,9 +60,9 @@ class DataExtractor:
         data = {}
         filenames = pd.concat([triplets['start'], triplets['end'], triplets['middle']], axis=0).unique()
         for f in filenames:
-            data[f] = read_source_image(f)
+            data[f] = read_image(f, self.image_caches)
         if preprocessor:
-            for key, val in data:
+            for key, val in data.items():
                 data[key] = preprocessor(val)
 
         chunk_len = len(triplets.index)
@@ -56,25 +76,69 @@ class DataExtractor:
             Y[i, :, :, 0] = data[triplets.loc[triplets.index[i], 'middle']]
         return {'X': X, 'Y': Y}
 
-    def get_good_triplets(self, dataframe, display=False):
+    def get_good_triplets(self, dataframe, display=False, max_gap=1):
         """
         Gets triplets of frames (3 subsequent frames) from a given sequence, where non of frames is missing
 
         :param dataframe: dataframe of source images
+        :param max_gap: Largest frame number difference allowed between
+            consecutive frames of a triplet. By default frames must be
+            contiguous.
+        :type max_gap: int, default 1
         """
-        # seq_data = dataframe.loc[dataframe.index.get_level_values('seq_no') == seq_no]
-        appended_data = []
-        for name, group in dataframe.groupby(level='seq_no'):
-            last_frame = int(max(group['frame']))
-            print(name) if display is True else None
-            for i in range(1, last_frame - 1):
-                if len(set(group['frame']).intersection({i - 1, i, i + 1})) == 3:
-                    start = group.loc[group.frame == i-1].index[0]
-                    middle = group.loc[group.frame == i].index[0]
-                    end = group.loc[group.frame == i + 1].index[0]
-                    appended_data.append([start, middle, end])
-        triplets = pd.DataFrame.from_records(appended_data, columns=['start', 'middle', 'end'])
-        return triplets
+        klets = self.get_good_klets(dataframe, k=3, max_gap=max_gap,
+                                    display=display)
+        klets.columns = ['start', 'middle', 'end']
+        return klets
+
+    def get_good_klets(self, dataframe, k=3, max_gap=1, display=False):
+        """
+        Gets windows of **k** subsequent frames from each sequence, where
+        consecutive frames of a window are at most **max_gap** frames apart.
+        Windows are found with shifted-array comparisons over the sorted
+        frame numbers of all sequences at once.
+
+        :param dataframe: dataframe of source images, with column 'frame'.
+            Images with missing frame numbers are ignored.
+        :type dataframe: pd.DataFrame
+        :param k: Number of frames per window.
+        :type k: int
+        :param max_gap: Largest frame number difference allowed between
+            consecutive frames of a window.
+        :type max_gap: int, default 1
+        :param display: flag for displaying output
+        :type display: bool
+        :return: Dataframe with one row per window and columns 'frame_0',
+            ..., 'frame_<k-1>' holding the index of each frame.
+        :rtype: pd.DataFrame
+        """
+        columns = ['frame_{0}'.format(j) for j in range(k)]
+        # Images without frame number cannot be part of a window
+        dataframe = dataframe[dataframe['frame'].notna()]
+        seq_nos = dataframe.index.get_level_values('seq_no').values
+        frames = dataframe['frame'].to_numpy(dtype=np.int64)
+        order = np.lexsort((frames, seq_nos))
+        index = dataframe.index[order]
+        seq_nos = seq_nos[order]
+        frames = frames[order]
+        n_windows = len(frames) - k + 1
+        print(len(np.unique(seq_nos)), 'sequences') if display is True else None
+        if n_windows <= 0:
+            return pd.DataFrame(columns=columns)
+
+        # A window starting at position p is good if every step p+j -> p+j+1
+        # stays within the sequence and advances by 1 to max_gap frames
+        good = np.ones(n_windows, dtype=bool)
+        for j in range(k - 1):
+            step = frames[j + 1:j + 1 + n_windows] - frames[j:j + n_windows]
+            good &= (step >= 1) & (step <= max_gap)
+            good &= seq_nos[j + 1:j + 1 + n_windows] == seq_nos[j:j + n_windows]
+        starts = np.flatnonzero(good)
+
+        klets = pd.DataFrame({column: list(index[starts + j])
+                              for j, column in enumerate(columns)},
+                             columns=columns)
+        return klets
 
     def get_one_hour_triplets(self, use_corrected):
         """
@@ -121,7 +185,7 @@ class DataExtractor:
 
     def generate_triplet_chunks(self, images_per_chunk, output_dir, seed=0, test_train_ratio=0.2,
                                 use_corrected=True, preprocess_algorithm=None,
-                                display=False):
+                                display=False, n_jobs=1):
         """
         Generates chunks of frames triplets for the interpolation task
 
@@ -136,6 +200,9 @@ class DataExtractor:
         :param preprocess_algorithm: Algorithm for data preprocessing, which returns data of the same shape as an input
         :param display: flag for displaying output
         :type display: bool
+        :param n_jobs: Number of worker processes writing chunks. Chunk
+            contents only depend on **seed**, not on the number of workers.
+        :type n_jobs: int, default 1
         """
         print('Start generating chunks...') if display else 0
         t_start = time.time()
@@ -150,23 +217,30 @@ class DataExtractor:
         triplets = self.get_one_hour_triplets(use_corrected)
 
         print('Triplets indexes generated {1} {0}'.format(time.time() - t_start, len(triplets.index))) if display else 0
-        i = 0
-        while len(triplets.index) > 0:
-            # keep getting triplets for random sequences
-            shuffled = triplets.sample(n=min(images_per_chunk, len(self.pd_man.images.index)), random_state=seed)
-            filenames = self.get_full_filenames(shuffled, use_corrected)
-            # print('Filenames generated. {0}'.format(time.time() - t_start)) if display else 0
-            data = self._read_triplet_data(triplets=shuffled, full_filenames=filenames)
-            # print('Data loaded. {0}'.format(time.time() - t_start)) if display else 0
+        jobs = []
+        for i, chunk in enumerate(self._get_shuffled_chunks(triplets.index, images_per_chunk, seed)):
             # train / test split
             rnd_dir = train_dir if random.random() > test_train_ratio else test_dir
             output_filename = join(rnd_dir, '{0}_chunk.h5'.format(i))
-            t0 = time.time()
-            print('Generating chunk file {0}, containing {1} values of shape {2}. {3}'
-                  .format(output_filename, len(data['X']), data['X'].shape, t0-t_start)) if display else 0
-            write_h5_dataset_file(data, output_filename, compression='gzip')
-            i += 1
-            triplets.drop(shuffled.index, inplace=True)
+            jobs.append((triplets.loc[chunk], output_filename, use_corrected, preprocess_algorithm, display))
+        self._run_chunk_jobs('_write_triplet_chunk', jobs, n_jobs)
+
+    def _write_triplet_chunk(self, triplets, filename, use_corrected,
+                             preprocess_algorithm=None, display=False):
+        """
+        Reads the frames of the given triplets and stores them as a chunk file.
+
+        :param triplets: Triplets dataframe.
+        :type triplets: pd.DataFrame
+        :param filename: Output filename.
+        :type filename: str
+        """
+        filenames = self.get_full_filenames(triplets, use_corrected)
+        data = self._read_triplet_data(triplets=triplets, full_filenames=filenames,
+                                       preprocessor=preprocess_algorithm)
+        print('Generating chunk file {0}, containing {1} values of shape {2}.'
+              .format(filename, len(data['X']), data['X'].shape)) if display else 0
+        write_h5_dataset_file(data, filename, compression='gzip')
 
     # TODO: read corrected/generated as optional
     def _read_seq(self, seq_no, preprocess_algorithm=None):
@@ -186,19 +260,20 @@ class DataExtractor:
         seq = images.loc[seq_no]
         for obs_time, frame in seq.iterrows():
             index = (seq_no, obs_time)
-            if corrected.index.contains(index):
+            if index in corrected.index:
                 corrected_entry = corrected.loc[index]
                 size += corrected_entry['size']
-                data = read_source_image(join(self.corrected_images_dir,
-                                              corrected_entry.directory,
-                                              corrected_entry.filename)
-                                         )
+                data = read_image(join(self.corrected_images_dir,
+                                       corrected_entry.directory,
+                                       corrected_entry.filename),
+                                  self.image_caches)
                 if preprocess_algorithm:
                     data = preprocess_algorithm(data)
             else:
                 size += frame['size']
-                data = read_source_image(join(self.original_images_dir,
-                                              frame.directory, frame.filename))
+                data = read_image(join(self.original_images_dir,
+                                       frame.directory, frame.filename),
+                                  self.image_caches)
                 if preprocess_algorithm:
                     data = preprocess_algorithm(data)
             read_data.append([seq_no, obs_time, data])
@@ -213,7 +288,7 @@ class DataExtractor:
     def generate_images_shuffled_chunks(self, images_per_chunk, output_dir,
                                         seed=0, use_corrected=True,
                                         preprocess_algorithm=None,
-                                        display=False):
+                                        display=False, n_jobs=1):
         """ Generates chunks of hdf5 files, containing shuffled images from
         different sequences and Best Track data. It does not care about the
         typhoon IDs, hence images belonging to the same typhoon sequence
@@ -233,6 +308,9 @@ class DataExtractor:
         :type preprocess_algorithm: callable
         :param display: flag for displaying execution information.
         :type display: bool
+        :param n_jobs: Number of worker processes writing chunks. Chunk
+            contents only depend on **seed**, not on the number of workers.
+        :type n_jobs: int, default 1
         """
         pd_manager = self.pd_man
         images = pd_manager.images
@@ -241,36 +319,42 @@ class DataExtractor:
         self._parameter_checking(corrected, images, output_dir)
         filenames = self.get_full_filenames(images, use_corrected)
         united_data = besttrack.join(filenames, how='inner')
-        i = 0
-        while len(united_data.index) > 0:
-            shuffled = united_data.sample(n=min(images_per_chunk,
-                                                len(united_data.index)),
-                                          random_state=seed
-                                          ).copy()
-            # shuffled['data'] = pd.Series()
-            read_data = []
-            for j in range(len(shuffled.index)):
-                data = read_source_image(shuffled.loc[shuffled.index[j],
-                                                      'full_filename'])
-                if preprocess_algorithm:
-                    data = preprocess_algorithm(data)
-                read_data.append(data)
-            # data_df = pd.DataFrame(read_data, columns=['index', 'data'])
-            # data_df.set_index('index')
-            # data_df = data_df.combine(shuffled)
-            data_series = pd.Series(read_data, name='data')
-            data_series.index = shuffled.index
-            shuffled['data'] = data_series
-            # for index, row in shuffled.iterrows():
-            #     data = read_source_image(row.full_filename)
-            #     shuffled.loc[index, 'data'] = data
-            print("writing chunk", i) if display else 0
-            t0 = time.time()
-            self._write_chunk(join(output_dir, '{0}_chunk.h5'.format(i)),
-                              [shuffled])
-            print(" done in ", str(t0-time.time())) if display else 0
-            i += 1
-            united_data.drop(shuffled.index, inplace=True)
+        jobs = []
+        for i, chunk in enumerate(self._get_shuffled_chunks(
+                united_data.index, images_per_chunk, seed)):
+            jobs.append((united_data.loc[chunk],
+                         join(output_dir, '{0}_chunk.h5'.format(i)),
+                         preprocess_algorithm, display))
+        self._run_chunk_jobs('_write_shuffled_chunk', jobs, n_jobs)
+
+    def _write_shuffled_chunk(self, shuffled, filename,
+                              preprocess_algorithm=None, display=False):
+        """
+        Reads the images of the given samples and stores them, together with
+        their Best Track data, as a chunk file.
+
+        :param shuffled: Best Track data of the samples, with column
+            'full_filename'.
+        :type shuffled: pd.DataFrame
+        :param filename: Output filename.
+        :type filename: str
+        """
+        shuffled = shuffled.copy()
+        read_data = []
+        for j in range(len(shuffled.index)):
+            data = read_image(shuffled.loc[shuffled.index[j],
+                                           'full_filename'],
+                              self.image_caches)
+            if preprocess_algorithm:
+                data = preprocess_algorithm(data)
+            read_data.append(data)
+        data_series = pd.Series(read_data, name='data')
+        data_series.index = shuffled.index
+        shuffled['data'] = data_series
+        print("writing chunk", filename) if display else 0
+        t0 = time.time()
+        self._write_chunk(filename, [shuffled])
+        print(" done in ", str(time.time() - t0)) if display else 0
 
     def get_full_filenames(self, dataframe, use_corrected=True):
         """
@@ -310,7 +394,7 @@ class DataExtractor:
 
     def generate_images_besttrack_chunks(self, sequence_list, chunk_size,
                                          output_dir, preprocess_algorithm=None,
-                                         display=False):
+                                         display=False, n_jobs=1):
         """ Generates chunks of hdf5 files, containing images and Best Track
         data.
 
@@ -322,6 +406,10 @@ class DataExtractor:
         :type output_dir: str
         :param preprocess_algorithm: Algorithm for data preprocessing,
             which returns data of the same shape as an input.
+        :param display: flag for displaying execution information.
+        :type display: bool
+        :param n_jobs: Number of worker processes writing chunks.
+        :type n_jobs: int, default 1
         """
         # Parameters checking
         pd_manager = self.pd_man
@@ -335,40 +423,115 @@ class DataExtractor:
 
         # group by prefix
         sequences = pd.DataFrame(sequence_list, columns=['seq_no'])
+        chunks = []
         chunk = []
         size = 0
-        serial_num = 0
-        prefix = "chunk"
         for _seq_no, data in sequences.groupby('seq_no'):
-            print("", _seq_no) if display else 0
-            data, seq_size = \
-                self._read_seq(seq_no=int(_seq_no),
-                               preprocess_algorithm=preprocess_algorithm)
-            chunk.append(data)
-            size += seq_size
+            chunk.append(int(_seq_no))
+            size += self._get_seq_size(int(_seq_no))
             if size >= chunk_size:
-                print("WRITING")
-                # write chunk to disk
-                _filename = join(output_dir, '{0}_{1}.h5'.format(prefix,
-                                                                 serial_num)
-                                 )
-                print(" --> storing", _filename) if display else 0
-                t0 = time.time()
-                self._write_chunk(filename=_filename, chunk=chunk)
-                print(" --> done in", time.time()-t0) if display else 0
-                serial_num += 1
+                chunks.append(chunk)
                 size = 0
                 chunk = []
-
         if not len(chunk) == 0:
-            # write leftovers
-            _filename = join(output_dir, '{0}_{1}.h5'.format(prefix,
-                                                             serial_num)
-                             )
-            print(" --> storing", _filename) if display else 0
-            t0 = time.time()
-            self._write_chunk(filename=_filename, chunk=chunk)
-            print(" --> done in", time.time() - t0) if display else 0
+            # leftovers
+            chunks.append(chunk)
+
+        prefix = "chunk"
+        jobs = [(chunk, join(output_dir, '{0}_{1}.h5'.format(prefix,
+                                                              serial_num)),
+                 preprocess_algorithm, display)
+                for serial_num, chunk in enumerate(chunks)]
+        self._run_chunk_jobs('_write_besttrack_chunk', jobs, n_jobs)
+
+    def _write_besttrack_chunk(self, seq_nos, filename,
+                               preprocess_algorithm=None, display=False):
+        """
+        Reads the given sequences and appends them, as they are read, to a
+        chunk file.
+
+        :param seq_nos: Sequence numbers to store in the chunk.
+        :type seq_nos: list
+        :param filename: Output filename.
+        :type filename: str
+        """
+        print(" --> storing", filename) if display else 0
+        t0 = time.time()
+        # Images without Best Track data have NaN labels (see _read_seq)
+        with H5DatasetWriter(filename, compression='gzip',
+                             dtypes=self._chunk_dtypes) as writer:
+            for seq_no in seq_nos:
+                print("", seq_no) if display else 0
+                data, _ = self._read_seq(
+                    seq_no=seq_no, preprocess_algorithm=preprocess_algorithm)
+                writer.append(self._get_chunk_data(data))
+                del data
+        print(" --> done in", time.time() - t0) if display else 0
+
+    def _get_seq_size(self, seq_no):
+        """
+        Size in bytes of the image files read by :func:`_read_seq` for a given
+        sequence, i.e. preferring corrected over original files.
+
+        :param seq_no: Sequence number.
+        :type seq_no: int
+        :return: Size in bytes.
+        :rtype: int
+        """
+        images = self.pd_man.images
+        corrected = self.pd_man.corrected
+        sizes = images.loc[images.index.get_level_values('seq_no') == seq_no,
+                           'size']
+        if not corrected.empty:
+            sizes = corrected['size'].reindex(sizes.index).fillna(sizes)
+        return int(sizes.sum())
+
+    @staticmethod
+    def _get_shuffled_chunks(index, n_per_chunk, seed):
+        """
+        Splits an index into chunks of randomly chosen entries. Chunks are
+        drawn one after another, sampling **n_per_chunk** of the remaining
+        entries with random state **seed**.
+
+        :param index: Index to split.
+        :type index: pd.Index
+        :param n_per_chunk: Number of entries per chunk.
+        :type n_per_chunk: int
+        :param seed: Seed for random shuffle.
+        :type seed: int
+        :return: List with the index of each chunk.
+        :rtype: list
+        """
+        remaining = pd.Series(np.arange(len(index)), index=index)
+        chunks = []
+        while len(remaining.index) > 0:
+            shuffled = remaining.sample(n=min(n_per_chunk,
+                                              len(remaining.index)),
+                                        random_state=seed)
+            chunks.append(shuffled.index)
+            remaining = remaining.drop(shuffled.index)
+        return chunks
+
+    def _run_chunk_jobs(self, method, jobs, n_jobs):
+        """
+        Runs a chunk writing method for each set of arguments in **jobs**,
+        either serially or in a pool of **n_jobs** processes.
+
+        :param method: Name of the chunk writing method.
+        :type method: str
+        :param jobs: List of argument tuples.
+        :type jobs: list
+        :param n_jobs: Number of worker processes.
+        :type n_jobs: int
+        """
+        if n_jobs == 1:
+            for args in jobs:
+                getattr(self, method)(*args)
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     initializer=_init_chunk_worker,
+                                     initargs=(self,)) as executor:
+                list(executor.map(_run_chunk_job, [method] * len(jobs), jobs))
 
     def _parameter_checking(self, corrupted, images, output_dir):
         if images.empty:
@@ -397,7 +560,29 @@ class DataExtractor:
         """
 
         united = pd.concat(chunk, axis=0)
-        united.reset_index(inplace=True)
+        data = self._get_chunk_data(united)
+        write_h5_dataset_file(data, filename, compression='gzip')
+        del data
+        # store = pd.HDFStore(filename, mode='w')
+        # for col in united.columns:
+        #     store.put(col, united[col])
+        # store.close()
+        # don't know if i need to call flush() here or not
+
+    #: Types of the label fields of chunk files, which may have NaN values.
+    _chunk_dtypes = {'class': 'float64', 'pressure': 'float64'}
+
+    @staticmethod
+    def _get_chunk_data(frame):
+        """
+        Builds the data fields stored in chunk files.
+
+        :param frame: Data read from images and Best Track.
+        :type frame: pd.DataFrame
+        :return: Dictionary with data field names as keys.
+        :rtype: dict
+        """
+        united = frame.reset_index()
 
         united['idx'] = united.apply(lambda x: get_id(x['obs_time'],
                                                       x['seq_no']), axis=1)
@@ -409,18 +594,7 @@ class DataExtractor:
         data['seq_no'] = united['seq_no']
         data['idx'] = united['idx'].tolist()
         data['class'] = united['class'].tolist()
-        # for column in united.columns:
-        #     dict[column] = united[column]
-        # dict['seq_no'] = united['seq_no']
-        # dict['data'] = united['data']
-
-        write_h5_dataset_file(data, filename, compression='gzip')
-        del data
-        # store = pd.HDFStore(filename, mode='w')
-        # for col in united.columns:
-        #     store.put(col, united[col])
-        # store.close()
-        # don't know if i need to call flush() here or not
+        return data
 
     def read_seq(self, seq_no, features, preprocess_algorithm=None):
         """ Reads the features of a given typhoon sequence
@@ -439,13 +613,15 @@ class DataExtractor:
             *   *feature_data*:
         :rtype tuple
         """
-        from pyphoon.io.utils import date2id
+        from pyphoon.io.utils import dates2ids
 
         if isinstance(seq_no, str):
             seq_no = int(seq_no)
         data, _ = self._read_seq(seq_no, preprocess_algorithm)
         images = data['data'].tolist()
-        images_ids = [date2id(o[1], str(o[0])) for o in data.index.tolist()]
+        images_ids = dates2ids(data.index.get_level_values('obs_time').values,
+                               data.index.get_level_values('seq_no').values
+                               ).tolist()
 
         features_data = {}
         for feature in features:
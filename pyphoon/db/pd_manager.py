@@ -1,21 +1,46 @@
-from os import path, listdir, stat
+from os import path, listdir, scandir
 import pandas as pd
-from os.path import isdir, join, exists
+from os.path import join, exists
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
-from pyphoon.io.utils import folder2name, imagefilename2date
-from pyphoon.io.h5 import read_source_image, get_h5_filenames
+from pyphoon.io.utils import folder2name, get_time_gaps
+from pyphoon.io.h5 import read_source_image
+from pyphoon.io.tsv import feature_names, read_besttrack
 
-feature_names = ["year", "month", "day", "hour", "class", "latitude",
-                 "longitude", "pressure", "wind", "gust", "storm_direc",
-                 "storm_radius_major", "storm_radius_minor", "gale_direc",
-                 "gale_radius_major", "gale_radius_minor", "landfall",
-                 "speed", "direction", "interpolated"]
+
+def _corruption_ratios(pairs):
+    """ Computes the ratio of corrected pixels of each pair of files
+    (original image, corrected image), see
+    :func:`PDManager.add_corrected_info`.
+
+    :return: Array with the ratio of each pair (NaN if the files could not be
+        read).
+    :rtype: numpy.array
+    """
+    ratios = np.full(len(pairs), np.nan)
+    for i, (orig_file, corrected_file) in enumerate(pairs):
+        try:
+            diff = np.abs(read_source_image(orig_file) -
+                          read_source_image(corrected_file))
+        except IOError as detail:
+            print('Error occured while reading files: ', detail)
+            continue
+        # discard small corrections
+        ratios[i] = np.count_nonzero(~(diff < 1)) / diff.size
+    return ratios
 
 
 class PDManager:
     """ Class to manage and help in the analysis of the dataset. It stores
     references to the image files, dates of the data, corrected images etc.
     in pandas.DataFrame objects.
+
+    :param compression: Compression used to save and load the DataFrames
+        as pickle files (see :func:`pandas.DataFrame.to_pickle`).
+        Alternatively, use 'parquet' or 'feather' to store them as columnar
+        files, which allow loading only some columns (and, for 'parquet',
+        only some sequences) without reading the whole file.
+    :type compression: str, default 'gzip'
     """
 
     def __init__(self, compression='gzip'):
@@ -24,24 +49,33 @@ class PDManager:
         self.missing = pd.DataFrame()  #: DataFrame for information about
         # missing images.
         self.corrected = pd.DataFrame()  #: DataFrame for corrected image data.
-        self._compression = compression  #: Compression, default 'gzip'.
+        self.generated = pd.DataFrame()  #: DataFrame for generated image data.
+        self.folders = pd.DataFrame()  #: DataFrame with the modification
+        # times of the scanned sequence folders, used by :func:`refresh`.
+        self._compression = compression  #: Compression of pickle files,
+        # default 'gzip'. Use 'parquet' or 'feather' to store columnar files.
 
     ############################################################################
     # Original images
     ############################################################################
-    def add_original_images(self, directory):
+    def add_original_images(self, directory, n_workers=None):
         """Adds information about original images to the class attribute
         **images**.
 
         :param directory: Path to image dataset.
         :type directory: str
+        :param n_workers: Number of threads used to scan the sequence folders.
+            By default, the default of
+            :class:`concurrent.futures.ThreadPoolExecutor` is used.
+        :type n_workers: int, default None
         """
-        appended_data = self._read_image_files_structure(directory)
-        self.images = pd.concat(appended_data)
+        self.images = self._read_image_files_structure(directory,
+                                                       n_workers=n_workers)
         self.images.set_index(['seq_no', 'obs_time'], inplace=True, drop=True,
                               verify_integrity=True
                               )
         self.images.index.name = 'seq_no_obs_time'
+        self._set_folders('images', directory)
 
     def save_original_images(self, filename):
         """ Saves the class attribute **images** as a pickle file.
@@ -49,45 +83,56 @@ class PDManager:
         :param filename: Path to the pickle file.
         :type filename: str
         """
-        self.images.to_pickle(filename, compression=self._compression)
+        self._save_table(self.images, filename)
 
-    def load_original_images(self, filename):
+    def load_original_images(self, filename, columns=None, seq_no_range=None):
         """ Loads the image data from a pickle file as DataFrame storing
         it as the class attribute **images**.
 
         :param filename: Path to the pickle file.
         :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
         """
-        self.images = pd.read_pickle(filename, self._compression)
+        self.images = self._load_table(filename, ['seq_no', 'obs_time'], columns,
+                                       seq_no_range)
 
     ############################################################################
     # Best data
     ############################################################################
-    def add_besttrack(self, directory):
+    def add_besttrack(self, directory, n_workers=None, cache_file=None):
         """ Adds information from the best data to the class attribute
         **besttrack**.
 
         :param directory: Path where source files are stored
         :type directory: str
+        :param n_workers: Number of threads used to parse the source files.
+        :type n_workers: int, default None
+        :param cache_file: Path to a *.npz* file caching the parsed source
+            files (see :func:`pyphoon.io.tsv.read_besttrack`).
+        :type cache_file: str, default None
         """
-        files = listdir(directory)
-        appended_data = []
-        for f in files:
-            _id = int(path.splitext(f)[0])
-            f = path.join(directory, f)
-            frame = pd.read_csv(filepath_or_buffer=f, sep='\t', names=feature_names)
-            frame['seq_no'] = _id
-            appended_data.append(frame)
-        self.besttrack = pd.concat(appended_data)
-        self.besttrack['obs_time'] = pd.to_datetime(self.besttrack.loc[:,
-                                                    'year':'hour'])
-        self.besttrack.drop(self.besttrack.loc[:, 'year':'hour'], axis=1,
-                            inplace=True
-                            )
-        self.besttrack.set_index(['seq_no', 'obs_time'], inplace=True,
-                                 drop=True, verify_integrity=True
-                                 )
-        self.besttrack.index.name = 'seq_no_obs_time'
+        self.besttrack = self._read_besttrack_files(directory,
+                                                    listdir(directory),
+                                                    n_workers, cache_file)
+
+    @staticmethod
+    def _read_besttrack_files(directory, files, n_workers=None,
+                              cache_file=None):
+        data = read_besttrack(directory, files, n_workers=n_workers,
+                              cache_file=cache_file)
+        dates = pd.DataFrame({name: data[name] for name in feature_names[:4]})
+        columns = feature_names[4:] + ['seq_no']
+        besttrack = pd.DataFrame({name: data[name] for name in columns},
+                                 columns=columns)
+        besttrack['obs_time'] = pd.to_datetime(dates)
+        besttrack.set_index(['seq_no', 'obs_time'], inplace=True, drop=True,
+                            verify_integrity=True)
+        besttrack.index.name = 'seq_no_obs_time'
+        return besttrack
 
     def save_besttrack(self, filename):
         """ Saves the class attribute **besttrack** as a pickle file.
@@ -95,33 +140,77 @@ class PDManager:
         :param filename: Path to the pickle file.
         :type filename: str
         """
-        self.besttrack.to_pickle(filename, compression=self._compression)
+        self._save_table(self.besttrack, filename)
 
-    def load_besttrack(self, filename):
+    def load_besttrack(self, filename, columns=None, seq_no_range=None):
         """ Loads the best data from a pickle file as DataFrame storing
         it as the class attribute **besttrack**.
 
         :param filename: Path to the pickle file.
         :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
         """
-        self.besttrack = pd.read_pickle(filename, self._compression)
+        self.besttrack = self._load_table(filename, ['seq_no', 'obs_time'], columns,
+                                          seq_no_range)
 
     ############################################################################
     # Corrected
     ############################################################################
-    def add_corrected_images(self, directory):
+    def add_corrected_images(self, directory, n_workers=None):
         """Adds information about the corrected images to the class attribute
         **corrected**.
 
         :param directory: Path to image dataset.
         :type directory: str
+        :param n_workers: Number of threads used to scan the sequence folders.
+            By default, the default of
+            :class:`concurrent.futures.ThreadPoolExecutor` is used.
+        :type n_workers: int, default None
         """
 
-        appended_data = self._read_image_files_structure(directory)
-        self.corrected = pd.concat(appended_data)
+        self.corrected = self._read_image_files_structure(directory,
+                                                          n_workers=n_workers)
         self.corrected.set_index(['seq_no', 'obs_time'], inplace=True,
                                  drop=True, verify_integrity=True)
         self.corrected.index.name = 'seq_no_obs_time'
+        self._set_folders('corrected', directory)
+
+    def register_corrected_images(self, files):
+        """ Adds image files written by the fix pipeline (see
+        :func:`~pyphoon.clean_satellite.fix.generate_new_image_dataset`) to
+        the class attribute **corrected**, without scanning the corrected
+        images folders. Rows of files already registered are replaced.
+
+        :param files: Dictionary mapping each sequence folder to a tuple with
+            the filenames and the sizes (in bytes) of its new image files.
+        :type files: dict
+        """
+        self._register_images('corrected', files)
+
+    def _register_images(self, table, files):
+        """ Adds image files to the images DataFrame **table** ('corrected'
+        or 'generated'), see :func:`register_corrected_images`.
+        """
+        folders = sorted(files)
+        scans = []
+        for folder in folders:
+            filenames, sizes = files[folder]
+            order = np.argsort(filenames)
+            scans.append(([filenames[i] for i in order],
+                          np.asarray(sizes, dtype=np.int64)[order]))
+        new_data = self._build_image_frame(folders, scans)
+        if new_data.empty:
+            return
+        new_data.set_index(['seq_no', 'obs_time'], inplace=True, drop=True)
+        frame = getattr(self, table)
+        frame = pd.concat([frame, new_data]) if not frame.empty else new_data
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        frame.index.name = 'seq_no_obs_time'
+        setattr(self, table, frame)
 
     def save_corrected_images(self, filename):
         """Saves the class attribute **corrected** as a pickle file.
@@ -130,26 +219,45 @@ class PDManager:
         :type filename: str
         """
 
-        self.corrected.to_pickle(filename, compression=self._compression)
+        self._save_table(self.corrected, filename)
 
-    def load_corrected_images(self, filename):
+    def load_corrected_images(self, filename, columns=None, seq_no_range=None):
         """Loads the corrupted data from a pickle file as DataFrame storing
         it as the class attribute **corrected**.
 
         :param filename: Path to the pickle file.
         :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
         """
 
-        self.corrected = pd.read_pickle(filename, self._compression)
+        self.corrected = self._load_table(filename, ['seq_no', 'obs_time'], columns,
+                                          seq_no_range)
 
-    def add_corrected_info(self, orig_images_dir, corrected_dir):
+    def add_corrected_info(self, orig_images_dir, corrected_dir,
+                           n_workers=None, backend='thread', batch_size=64):
         """
-        Adds information about corrected images to the corrected dataset.
+        Adds information about corrected images to the corrected dataset,
+        i.e. column *corruption* with the ratio of corrected pixels of each
+        image. Pairs of original/corrected files are processed in batches by
+        a pool of workers and the column is written once at the end. Images
+        that cannot be read get a NaN ratio.
 
         :param orig_images_dir: original images folder.
         :type orig_images_dir: str
         :param corrected_dir: corrected images folder.
         :type corrected_dir: str
+        :param n_workers: Number of workers. If None, the default of
+            :mod:`concurrent.futures` is used.
+        :type n_workers: int, default None
+        :param backend: Pool used to process the batches, 'thread' or
+            'process'.
+        :type backend: str, default 'thread'
+        :param batch_size: Number of image pairs sent to a worker at once.
+        :type batch_size: int, default 64
 
         :raises: Exception
         """
@@ -157,89 +265,187 @@ class PDManager:
         if not exists(orig_images_dir) or not exists(corrected_dir):
             raise Exception('Original or Corrected images folder does not '
                             'exist')
-        for key in self.corrected.index:
-            subdir, filename = self.corrected.loc[key, ['directory',
-                                                        'filename']]
-            corrected_filename = join(corrected_dir, subdir, filename)
-            try:
-                src_data = read_source_image(join(orig_images_dir, subdir,
-                                                  filename))
-                corrected = read_source_image(corrected_filename)
-                diff = src_data - corrected
-                diff = np.abs(diff)
-                # discard small corrections
-                diff[diff < 1] = 0
-                self.corrected.loc[key, 'corruption'] = np.count_nonzero(
-                    diff) / (diff.shape[0] * diff.shape[1])
-            except IOError as detail:
-                print('Error occured while reading files: ', detail)
+        if backend not in ('thread', 'process'):
+            raise Exception("backend should be either 'thread' or 'process'")
+        pairs = [(join(orig_images_dir, subdir, filename),
+                  join(corrected_dir, subdir, filename)) for subdir, filename
+                 in zip(self.corrected['directory'].values,
+                        self.corrected['filename'].values)]
+        batches = [pairs[i:i + batch_size] for i in range(0, len(pairs),
+                                                          batch_size)]
+        pool = ThreadPoolExecutor if backend == 'thread' else \
+            ProcessPoolExecutor
+        with pool(max_workers=n_workers) as executor:
+            ratios = list(executor.map(_corruption_ratios, batches))
+        self.corrected['corruption'] = np.concatenate([np.empty(0)] + ratios)
+
+    ############################################################################
+    # Generated
+    ############################################################################
+    def add_generated_images(self, directory, n_workers=None):
+        """Adds information about the generated images to the class attribute
+        **generated**.
+
+        :param directory: Path to image dataset.
+        :type directory: str
+        :param n_workers: Number of threads used to scan the sequence folders.
+            By default, the default of
+            :class:`concurrent.futures.ThreadPoolExecutor` is used.
+        :type n_workers: int, default None
+        """
+        self.generated = self._read_image_files_structure(directory,
+                                                          n_workers=n_workers)
+        self.generated.set_index(['seq_no', 'obs_time'], inplace=True,
+                                 drop=True, verify_integrity=True)
+        self.generated.index.name = 'seq_no_obs_time'
+        self._set_folders('generated', directory)
+
+    def register_generated_images(self, files):
+        """ Adds image files generated by the fix pipeline (see
+        :func:`~pyphoon.clean_satellite.fix.generate_new_image_dataset`) to
+        the class attribute **generated**, as
+        :func:`register_corrected_images` does for corrected images.
+
+        :param files: Dictionary mapping each sequence folder to a tuple with
+            the filenames and the sizes (in bytes) of its new image files.
+        :type files: dict
+        """
+        self._register_images('generated', files)
+
+    def save_generated_images(self, filename):
+        """Saves the class attribute **generated** as a pickle file.
+
+        :param filename: Path to the pickle file.
+        :type filename: str
+        """
+        self._save_table(self.generated, filename)
+
+    def load_generated_images(self, filename, columns=None, seq_no_range=None):
+        """Loads the generated image data from a pickle file as DataFrame
+        storing it as the class attribute **generated**.
+
+        :param filename: Path to the pickle file.
+        :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
+        """
+        self.generated = self._load_table(filename, ['seq_no', 'obs_time'],
+                                          columns, seq_no_range)
 
     ############################################################################
     # Missing frames
     ############################################################################
-    def add_missing_images_info(self):
+    def add_missing_images_info(self, seq_nos=None):
         """
         Creates a dataset with information about missing images.
 
+        :param seq_nos: Sequences to (re)compute. Rows of other sequences in
+            the existing dataset are kept. By default, all sequences are
+            computed.
+        :type seq_nos: list, default None
+
         :raises: Exception
         """
         joined = pd.concat([self.images, self.besttrack], axis=1, join='inner')
         if len(joined) == 0:
             raise Exception('Both besttrack and original tables should be'
                             'loaded first')
-        seqs = joined.groupby('seq_no')
-        frame_deltas = pd.DataFrame(
-            columns=['start_time', 'time_step', 'frames_num', 'missing_num',
-                     'completeness', 'missing_frames',
-                     'have_good_neighbours'])
-        frame_deltas.index.name = 'seq_no'
-        for name, group in seqs:
-            diffs = pd.Series([(group.index[i + 1][1] - group.index[i][1]) for
-                               i in range(0, len(group.index) - 1)])
-            min_diff = diffs.mode()[0]
-            missing = []
-            for i in range(0, len(diffs)):
-                if not min_diff == diffs[i]:
-                    missing.append(i + 1)
-            have_good_neighbours = []
-            for i in missing:
-                if i - 1 not in missing and i + 1 not in missing:
-                    have_good_neighbours.append(i)
-            frame_deltas.loc[name] = [group.index[0][1],
-                                      min_diff,
-                                      len(diffs) + 1 + len(missing),
-                                      len(missing),
-                                      (len(diffs) + 1) / (len(diffs) + 1 +
-                                                          len(missing)),
-                                      missing,
-                                      have_good_neighbours]
-            # store information about frames in images dataframe
-            # frames = list(range(0, frame_deltas.loc[name, 'frames_num']))
-            # frames = [frame for frame in frames if frame not in frame_
-            # deltas.loc[name, 'missing_frames']]
-            # self.images.loc[name, 'frame'] = frames
+        if seq_nos is not None:
+            joined = joined.loc[joined.index.get_level_values('seq_no').isin(
+                seq_nos)]
+            kept = self.missing.drop(seq_nos, errors='ignore') if \
+                not self.missing.empty else self.missing
+            if len(joined) == 0:
+                self.missing = kept
+                return
+        times = joined.index.to_frame(index=False).sort_values(
+            ['seq_no', 'obs_time']).reset_index(drop=True)
+        seqs = times.groupby('seq_no')
+        # Position of each frame within its sequence
+        position = seqs.cumcount()
+
+        # Time step: most frequent difference (smallest one if tied). A
+        # frame is flagged as missing before each irregular difference
+        seq_index, time_steps, _, gaps = get_time_gaps(
+            times['seq_no'].values, times['obs_time'].values)
+        time_step = pd.Series(time_steps, index=seq_index)
+        missing = pd.Series(gaps)
+        previous_missing = missing.groupby(times['seq_no']).shift(
+            1, fill_value=False)
+        next_missing = missing.groupby(times['seq_no']).shift(
+            -1, fill_value=False)
+        good_neighbours = missing & ~previous_missing & ~next_missing
+
+        frame_deltas = pd.DataFrame(index=pd.Index(sorted(seqs.groups),
+                                                   name='seq_no'))
+        frame_deltas['start_time'] = seqs['obs_time'].first()
+        frame_deltas['time_step'] = time_step
+        frames_num = seqs.size()
+        missing_num = missing.groupby(times['seq_no']).sum().astype(int)
+        frame_deltas['frames_num'] = frames_num + missing_num
+        frame_deltas['missing_num'] = missing_num
+        frame_deltas['completeness'] = frames_num / (frames_num + missing_num)
+        frame_deltas['missing_frames'] = self._positions_per_seq(
+            position[missing], times['seq_no'][missing], frame_deltas.index)
+        frame_deltas['have_good_neighbours'] = self._positions_per_seq(
+            position[good_neighbours], times['seq_no'][good_neighbours],
+            frame_deltas.index)
         # frame_deltas = frame_deltas[frame_deltas.missing_num > 0]
+        if seq_nos is not None and not kept.empty:
+            frame_deltas = pd.concat([kept, frame_deltas]).sort_index()
+            frame_deltas.index.name = 'seq_no'
         self.missing = frame_deltas
 
+    @staticmethod
+    def _positions_per_seq(positions, seq_nos, index):
+        """ Groups frame positions into one list per sequence.
+
+        :param positions: Frame positions.
+        :type positions: pandas.Series
+        :param seq_nos: Sequence number of each position.
+        :type seq_nos: pandas.Series
+        :param index: Sequence numbers of the output.
+        :type index: pandas.Index
+        :return: Series with a (possibly empty) list of positions per
+            sequence.
+        :rtype: pandas.Series
+        """
+        grouped = positions.groupby(seq_nos).agg(list)
+        return pd.Series([grouped.get(seq_no, []) for seq_no in index],
+                         index=index)
+
     def save_missing_images(self, filename):
         """ Saves Missing DataFrame to a file.
 
         :param filename: Path to the pickle file.
         :type filename: str
         """
-        self.missing.to_pickle(filename, compression=self._compression)
+        self._save_table(self.missing, filename)
 
-    def load_missing_images_info(self, filename):
+    def load_missing_images_info(self, filename, columns=None, seq_no_range=None):
         """ Loads Missing DataFrame from a file.
 
         :param filename: Path to the pickle file.
         :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
         """
-        self.missing = pd.read_pickle(filename, self._compression)
+        self.missing = self._load_table(filename, ['seq_no'], columns,
+                                        seq_no_range)
 
     def add_frames(self):
         """ Adds frames numbers to the original images DataFrame. Both original
-        images and missing DataFrames should be loaded.
+        images and missing DataFrames should be loaded. The frame number of
+        an image is computed as *(obs_time - start_time) / time_step*, hence
+        missing frames leave gaps in the numbering. Frame numbers are stored
+        as nullable integers (Int64), missing (NA) for images of sequences
+        without Best Track data.
 
         :raises: Exception
         """
@@ -249,36 +455,324 @@ class PDManager:
                 self.images.index.get_level_values(0).unique()):
             raise Exception('Both original and missing dataframes should be '
                             'loaded first')
-        for seq_no in self.missing.index:
-            missing_frames = self.missing.loc[seq_no, 'missing_frames']
-            frame_nums = len(self.images.loc[seq_no]) + len(missing_frames)
-            frames = list(range(0, frame_nums))
-            frames = [frame for frame in frames if frame not in missing_frames]
-            self.images.loc[seq_no, 'frame'] = frames
-
+        # Frame number: number of time steps since the start of the sequence
+        seq_nos = self.images.index.get_level_values('seq_no')
+        obs_times = self.images.index.get_level_values('obs_time')
+        start_time = pd.to_datetime(
+            self.missing['start_time'].reindex(seq_nos)).values
+        time_step = pd.to_timedelta(
+            self.missing['time_step'].reindex(seq_nos)).values.copy()
+        elapsed = obs_times.values - start_time
+        # Sequences with a single frame have no time step
+        time_step[pd.isnull(time_step) & ~pd.isnull(start_time)] = \
+            np.timedelta64(1, 'h')
+        # Images of sequences without Best Track data have no frame number
+        self.images['frame'] = pd.array(np.round(elapsed / time_step),
+                                        dtype='Int64')
 
     ############################################################################
     # Others
     ############################################################################
-    def _read_image_files_structure(self, directory):
-        folders = sorted([f for f in listdir(directory) if isdir(join(
-            directory, f))])
-        appended_data = []
-        for folder in folders:
-            path_images = join(directory, folder)
-            seq_name = int(folder2name(path_images))
-            # frame = pd.DataFrame(columns=['obs_time', 'seq_no', 'directory',
-            # 'filename', 'size'])
-            image_data = []
-            for f in get_h5_filenames(path_images):
-                date = imagefilename2date(f)
-                fullname = join(directory, folder, f)
-                data = {'obs_time': date, 'seq_no': seq_name, 'directory':
-                    folder, 'filename': f, 'size': stat(fullname).st_size}
-                image_data.append(data)
-            frame = pd.DataFrame(image_data)
-            appended_data.append(frame)
-        return appended_data
+    def _read_image_files_structure(self, directory, folders=None,
+                                    n_workers=None):
+        """ Scans the image files of the sequence folders in **directory**.
+
+        :param directory: Path to image dataset.
+        :type directory: str
+        :param folders: Sequence folders to scan. By default, all folders in
+            **directory** are scanned.
+        :type folders: list, default None
+        :param n_workers: Number of threads used to scan the folders.
+        :type n_workers: int, default None
+        :return: DataFrame with columns *obs_time*, *seq_no*, *directory*,
+            *filename* and *size*, with one row per image file.
+        :rtype: pandas.DataFrame
+        """
+        if folders is None:
+            folders = [folder for folder, _ in self._scan_folders(directory)]
+        scans = self._scan_image_folders(directory, folders, n_workers)
+        return self._build_image_frame(folders, scans)
+
+    @staticmethod
+    def _scan_folders(directory):
+        """ Lists the sequence folders in **directory**.
+
+        :return: Sorted list of tuples (folder name, modification time).
+        :rtype: list
+        """
+        with scandir(directory) as entries:
+            folders = [(entry.name, entry.stat().st_mtime) for entry in
+                       entries if entry.is_dir()]
+        return sorted(folders)
+
+    @staticmethod
+    def _scan_image_folder(path_images):
+        """ Lists the image files of a sequence folder, reusing the stat
+        results of :func:`os.scandir`.
+
+        :return: Tuple with the sorted filenames (list) and their sizes in
+            bytes (numpy.array).
+        :rtype: tuple
+        """
+        with scandir(path_images) as entries:
+            files = sorted((entry.name, entry.stat().st_size) for entry in
+                           entries if entry.name.endswith('.h5') and
+                           entry.is_file())
+        filenames = [f for f, _ in files]
+        sizes = np.array([size for _, size in files], dtype=np.int64)
+        return filenames, sizes
+
+    def _scan_image_folders(self, directory, folders, n_workers=None):
+        """ Scans **folders** concurrently (see :func:`_scan_image_folder`).
+
+        :return: List with the scan of each folder.
+        :rtype: list
+        """
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            return list(executor.map(self._scan_image_folder, [
+                join(directory, folder) for folder in folders]))
+
+    @staticmethod
+    def _build_image_frame(folders, scans):
+        """ Builds the images DataFrame from the scans of **folders**.
+
+        :return: DataFrame with columns *obs_time*, *seq_no*, *directory*,
+            *filename* and *size*.
+        :rtype: pandas.DataFrame
+        """
+        counts = [len(filenames) for filenames, _ in scans]
+        seq_nos = np.array([int(folder2name(folder)) for folder in folders],
+                           dtype=np.int64)
+        filenames = [f for names, _ in scans for f in names]
+        sizes = np.concatenate([np.empty(0, dtype=np.int64)] +
+                               [sizes for _, sizes in scans])
+        obs_time = pd.to_datetime([f.split('-')[0] for f in filenames],
+                                  format='%Y%m%d%H')
+        return pd.DataFrame({
+            'obs_time': obs_time,
+            'seq_no': np.repeat(seq_nos, counts),
+            'directory': np.repeat(np.array(folders, dtype=object), counts),
+            'filename': filenames,
+            'size': sizes
+        }, columns=['obs_time', 'seq_no', 'directory', 'filename', 'size'])
+
+    ############################################################################
+    # Incremental refresh
+    ############################################################################
+    def refresh(self, images_dir=None, corrected_dir=None, besttrack_dir=None,
+                generated_dir=None):
+        """ Updates the DataFrames with the sequences added, changed or
+        removed since they were built, without rescanning unchanged
+        sequences. A sequence folder is only listed again if its
+        modification time differs from the one recorded in class attribute
+        **folders** (or if it has not been recorded), and only re-read if its
+        file listing differs from the stored one. Best track files are read
+        for new sequences only. Dependent DataFrames (**missing** and frame
+        numbers in **images**) are updated for the affected sequences.
+
+        Note that files overwritten in place do not change the modification
+        time of their folder, hence they are not detected.
+
+        :param images_dir: Path to original image dataset.
+        :type images_dir: str, default None
+        :param corrected_dir: Path to corrected image dataset.
+        :type corrected_dir: str, default None
+        :param besttrack_dir: Path where best track source files are stored.
+        :type besttrack_dir: str, default None
+        :param generated_dir: Path to generated image dataset.
+        :type generated_dir: str, default None
+        :return: Sequence numbers that have been updated.
+        :rtype: set
+        """
+        updated = set()
+        if images_dir is not None:
+            updated |= self._refresh_images('images', images_dir)
+        if corrected_dir is not None:
+            updated |= self._refresh_images('corrected', corrected_dir)
+        if generated_dir is not None:
+            updated |= self._refresh_images('generated', generated_dir)
+        if besttrack_dir is not None:
+            known = set(self.besttrack.index.get_level_values('seq_no')) if \
+                not self.besttrack.empty else set()
+            files = [f for f in listdir(besttrack_dir) if
+                     int(path.splitext(f)[0]) not in known]
+            if files:
+                new_besttrack = self._read_besttrack_files(besttrack_dir, files)
+                self.besttrack = pd.concat([self.besttrack, new_besttrack])
+                self.besttrack.index.name = 'seq_no_obs_time'
+                updated |= set(new_besttrack.index.get_level_values('seq_no'))
+
+        # Dependent tables
+        if updated and not self.missing.empty:
+            self.add_missing_images_info(seq_nos=sorted(updated))
+            if 'frame' in self.images.columns:
+                self.add_frames()
+        return updated
+
+    def _refresh_images(self, table, directory):
+        """ Updates the images DataFrame **table** ('images', 'corrected' or
+        'generated') with the changes in **directory**.
+
+        :return: Sequence numbers that have been updated.
+        :rtype: set
+        """
+        frame = getattr(self, table)
+        known = set(frame.index.get_level_values('seq_no')) if \
+            not frame.empty else set()
+        folders = self._scan_folders(directory)
+        on_disk = {int(folder2name(folder)) for folder, _ in folders}
+
+        records = []
+        for folder, mtime in folders:
+            seq_no = int(folder2name(folder))
+            if self._get_folder_mtime(table, seq_no) != mtime:
+                records.append((table, seq_no, folder, mtime))
+        changed = [folder for _, _, folder, _ in records]
+        scans = self._scan_image_folders(directory, changed)
+
+        updated_folders, updated_scans = [], []
+        for (_, seq_no, folder, _), scan in zip(records, scans):
+            if seq_no in known:
+                filenames = frame.xs(seq_no, level='seq_no')['filename']
+                if sorted(filenames) == scan[0]:
+                    continue
+            updated_folders.append(folder)
+            updated_scans.append(scan)
+        updated = {int(folder2name(folder)) for folder in updated_folders}
+
+        removed = known - on_disk
+        self._update_folders(table, records, removed)
+        if updated or removed:
+            appended_data = [frame.drop(list(updated | removed), level='seq_no',
+                                        errors='ignore')] if \
+                not frame.empty else []
+            new_data = self._build_image_frame(updated_folders, updated_scans)
+            if not new_data.empty:
+                new_data.set_index(['seq_no', 'obs_time'], inplace=True,
+                                   drop=True)
+                appended_data.append(new_data)
+            frame = pd.concat(appended_data).sort_index()
+            frame.index.name = 'seq_no_obs_time'
+            setattr(self, table, frame)
+        return updated | removed
+
+    def _set_folders(self, table, directory):
+        records = [(table, int(folder2name(folder)), folder, mtime)
+                   for folder, mtime in self._scan_folders(directory)]
+        self._update_folders(table, records, removed=None, replace=True)
+
+    def _get_folder_mtime(self, table, seq_no):
+        if self.folders.empty or (table, seq_no) not in self.folders.index:
+            return None
+        return self.folders.loc[(table, seq_no), 'mtime']
+
+    def _update_folders(self, table, records, removed, replace=False):
+        """ Updates class attribute **folders** with the records (table,
+        seq_no, directory, mtime) and drops the **removed** sequences of
+        **table**. If **replace** is True, all previous rows of **table** are
+        dropped.
+        """
+        new_folders = pd.DataFrame(records, columns=['table', 'seq_no',
+                                                     'directory', 'mtime'])
+        new_folders.set_index(['table', 'seq_no'], inplace=True)
+        folders = self.folders
+        if not folders.empty:
+            if replace:
+                folders = folders.drop(table, level='table', errors='ignore')
+            drop = [(table, seq_no) for seq_no in removed or []] + \
+                list(new_folders.index)
+            folders = folders.drop(drop, errors='ignore')
+            new_folders = pd.concat([folders, new_folders])
+        self.folders = new_folders.sort_index()
+
+    ############################################################################
+    # Persistence
+    ############################################################################
+    def _save_table(self, frame, filename):
+        """ Saves a DataFrame according to the format given by the
+        **compression** constructor argument.
+
+        :param frame: DataFrame to store.
+        :type frame: pandas.DataFrame
+        :param filename: Path to the file.
+        :type filename: str
+        """
+        if self._compression == 'parquet':
+            frame.to_parquet(filename)
+        elif self._compression == 'feather':
+            # Feather only stores default indices
+            frame.reset_index().to_feather(filename)
+        else:
+            frame.to_pickle(filename, compression=self._compression)
+
+    def _load_table(self, filename, index, columns=None, seq_no_range=None):
+        """ Loads a DataFrame stored with :func:`_save_table`.
+
+        :param filename: Path to the file.
+        :type filename: str
+        :param index: Names of the index levels of the DataFrame.
+        :type index: list
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
+        :return: Loaded DataFrame.
+        :rtype: pandas.DataFrame
+        """
+        if self._compression == 'parquet':
+            filters = None
+            if seq_no_range is not None:
+                filters = [('seq_no', '>=', seq_no_range[0]),
+                           ('seq_no', '<=', seq_no_range[1])]
+            frame = pd.read_parquet(filename, columns=columns,
+                                    filters=filters)
+        elif self._compression == 'feather':
+            frame = pd.read_feather(filename, columns=None if columns is None
+                                    else index + list(columns))
+            frame.set_index(index, inplace=True)
+        else:
+            frame = pd.read_pickle(filename, self._compression)
+            if columns is not None:
+                frame = frame[columns]
+
+        if self._compression in ('parquet', 'feather'):
+            # List columns are read back as arrays
+            for column in frame.columns:
+                if frame[column].dtype == object and len(frame) > 0 and \
+                        isinstance(frame[column].iloc[0], np.ndarray):
+                    frame[column] = frame[column].apply(list)
+
+        if seq_no_range is not None and not frame.empty:
+            seq_nos = frame.index.get_level_values('seq_no')
+            frame = frame.loc[(seq_nos >= seq_no_range[0]) &
+                              (seq_nos <= seq_no_range[1])]
+        if len(index) > 1 and index[0] == 'seq_no':
+            frame.index.name = 'seq_no_obs_time'
+        return frame
+
+    def save_folders(self, filename):
+        """ Saves the class attribute **folders** as a pickle file.
+
+        :param filename: Path to the pickle file.
+        :type filename: str
+        """
+        self._save_table(self.folders, filename)
+
+    def load_folders(self, filename, columns=None, seq_no_range=None):
+        """ Loads the folder modification times from a pickle file as
+        DataFrame storing it as the class attribute **folders**.
+
+        :param filename: Path to the pickle file.
+        :type filename: str
+        :param columns: Columns to load. By default all columns are loaded.
+        :type columns: list, default None
+        :param seq_no_range: Only load sequences with sequence number
+            within this range (both ends included).
+        :type seq_no_range: tuple, default None
+        """
+        self.folders = self._load_table(filename, ['table', 'seq_no'], columns,
+                                        seq_no_range)
 
     def get_obs_time_from_frame_num(self, seq_no, frame_num):
         """ Returns Timestamp object related to a missing frame (numeration
@@ -290,10 +784,8 @@ class PDManager:
         :type frame_num: int
         :return:
         """
-        time_shift = self.missing.get_value(index=seq_no, col='time_step') * \
-                     frame_num
-        return self.missing.get_value(index=seq_no, col='start_time') + \
-               time_shift
+        time_shift = self.missing.at[seq_no, 'time_step'] * frame_num
+        return self.missing.at[seq_no, 'start_time'] + time_shift
 
     def get_image_from_seq_no_and_frame_num(self, seq_no, frame_num):
         """
@@ -306,6 +798,6 @@ class PDManager:
         """
         dt = self.get_obs_time_from_frame_num(seq_no, frame_num)
         key = (seq_no, dt)
-        dir = self.images.get_value(key, 'directory')
-        file = self.images.get_value(key, 'filename')
+        dir = self.images.at[key, 'directory']
+        file = self.images.at[key, 'filename']
         return path.join(dir, file)
@@ -3,8 +3,12 @@ from os.path import join, exists
 import os
 from os import listdir
 import shutil
-from pyphoon.db.data_convertor import convert2byte_per_pixel, convert_uint_to_float, process_folder
-from pyphoon.io.h5 import read_source_image
+import numpy as np
+from pyphoon.db.data_convertor import convert2byte_per_pixel, convert_uint_to_float, process_folder, \
+    convert_dir, convert_float_to_uint, get_conversion_error, Float16Codec, LUTCodec
+from pyphoon.io.h5 import read_source_image, read_source_images_bulk
+from pyphoon.io.sequence import read_sequence_images
+from pyphoon.io.cache import load_sequence_cache
 
 class TestDataConverterMethods(unittest.TestCase):
 
@@ -23,14 +27,45 @@ class TestDataConverterMethods(unittest.TestCase):
         convert2byte_per_pixel(src_file, dst_file)
         self.assertTrue(exists(dst_file))
         src_img = read_source_image(src_file)
-        uint_img = read_source_image(dst_file)
-        self.assertEquals(src_img.shape, uint_img.shape)
-        restored_img = convert_uint_to_float(uint_img)
-        self.assertTrue(abs((src_img - restored_img)).min() < 0.5)
+        # Codec is stored with the image, hence it is decoded when read
+        restored_img = read_source_image(dst_file)
+        self.assertEqual(src_img.shape, restored_img.shape)
+        self.assertTrue(abs((np.clip(src_img, 160, 310) - restored_img)).max() < 0.5)
 
         if exists(self.test_dir):
             shutil.rmtree(self.test_dir, ignore_errors=True)
 
+    def test_convert_float_to_uint(self):
+        src_img = np.array([[[100., 160.], [235., 400.]], [[np.nan, 310.], [200., 250.]]])
+        uint_img = convert_float_to_uint(src_img)
+        self.assertEqual(uint_img[0].tolist(), [[0, 0], [128, 255]])
+        errors = get_conversion_error(src_img, uint_img)
+        self.assertTrue(errors[0] < 0.5)
+        self.assertFalse(errors[1] <= 0.5)
+
+    def test_convert_dir(self):
+        if exists(self.test_dir):
+            shutil.rmtree(self.test_dir, ignore_errors=True)
+        folder = '200718'
+        src_images = read_source_images_bulk(join(self.src_images_dir, folder))
+        for output_format in ['packed', 'npy']:
+            reports = convert_dir(self.src_images_dir, join(self.test_dir, output_format), n_workers=2,
+                                  output_format=output_format, folders=[folder])
+            self.assertEqual(reports[0]['n_frames'], len(src_images))
+            self.assertEqual(reports[0]['n_failed'], 0)
+            self.assertTrue(reports[0]['max_error'] < 0.5)
+        packed = read_sequence_images(join(self.test_dir, 'packed'), folder)
+        cached, _ = load_sequence_cache(join(self.test_dir, 'npy'), folder)
+        self.assertTrue(np.array_equal(packed, convert_uint_to_float(cached)))
+        self.assertTrue(np.abs(packed - src_images).max() < 0.5)
+        reports = convert_dir(self.src_images_dir, join(self.test_dir, 'float16'), n_workers=2,
+                              output_format='packed', folders=[folder], codec=Float16Codec())
+        self.assertTrue(reports[0]['max_error'] < 0.125)
+        with self.assertRaises(Exception):
+            convert_dir(self.src_images_dir, join(self.test_dir, 'lut'), output_format='npy', codec=LUTCodec())
+        if exists(self.test_dir):
+            shutil.rmtree(self.test_dir, ignore_errors=True)
+
     # def process_folder(display, folder, input_dir, output_dir):
 
     def test_process_folder(self):
@@ -45,8 +80,7 @@ class TestDataConverterMethods(unittest.TestCase):
         files = listdir(full_src_dir)
         for f in files:
             src_img = read_source_image(join(full_src_dir, f))
-            uint_img = read_source_image(join(full_dst_dir, f))
-            restored_img = convert_uint_to_float(uint_img)
-            self.assertTrue(abs((src_img - restored_img)).min() < 0.5)
+            restored_img = read_source_image(join(full_dst_dir, f))
+            self.assertTrue(abs((np.clip(src_img, 160, 310) - restored_img)).max() < 0.5)
         if exists(self.test_dir):
             shutil.rmtree(self.test_dir, ignore_errors=True)
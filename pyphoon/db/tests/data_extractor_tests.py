@@ -50,6 +50,23 @@ class TestDataExtractorMethods(unittest.TestCase):
         if exists(output_dir):
             shutil.rmtree(output_dir, ignore_errors=True)
 
+    def test_write_besttrack_chunk_gaps(self):
+        pd_man = PDManager()
+        pd_man.add_original_images(self.images_dir)
+        pd_man.add_besttrack(self.best_dir)
+        # Best Track gap in the second sequence
+        gap = pd_man.besttrack.xs(200718, level='seq_no',
+                                  drop_level=False).index[:2]
+        pd_man.besttrack.drop(gap, inplace=True)
+        de = DataExtractor(self.images_dir, self.corrected_dir, pd_man)
+        filename = 'temp_chunk.h5'
+        de._write_besttrack_chunk([200717, 200718], filename)
+        with h5py.File(filename, 'r') as f:
+            labels = f['class'][()]
+            self.assertEqual(len(labels), len(f['data']))
+        self.assertEqual(np.count_nonzero(np.isnan(labels)), 2)
+        remove(filename)
+
     def test_get_full_filenames(self):
         pd_man = PDManager()
         pd_man.load_original_images(join(self.db_dir, 'images.pkl'))
@@ -123,6 +140,33 @@ class TestDataExtractorMethods(unittest.TestCase):
         for item in triplets.iteritems():
             self.assertIn(item, pd_man.images.index)
 
+    def test_get_good_klets(self):
+        pd_man = PDManager()
+        pd_man.load_original_images(join(self.db_dir, 'images.pkl'))
+        de = DataExtractor(self.images_dir, self.corrected_dir, pd_man)
+        triplets = de.get_good_triplets(pd_man.images)
+        klets = de.get_good_klets(pd_man.images, k=3)
+        self.assertEqual(len(triplets.index), len(klets.index))
+        pairs = de.get_good_klets(pd_man.images, k=2)
+        pairs_gap = de.get_good_klets(pd_man.images, k=2, max_gap=2)
+        self.assertGreater(len(pairs.index), len(triplets.index))
+        self.assertGreater(len(pairs_gap.index), len(pairs.index))
+
+    def test_get_good_klets_missing_frames(self):
+        pd_man = PDManager()
+        pd_man.add_original_images(self.images_dir)
+        pd_man.add_besttrack(self.best_dir)
+        # Sequence without Best Track data, hence without frame numbers
+        pd_man.besttrack.drop(200718, level='seq_no', inplace=True)
+        pd_man.add_missing_images_info()
+        pd_man.add_frames()
+        self.assertTrue(pd_man.images.loc[200718, 'frame'].isnull().all())
+        de = DataExtractor(self.images_dir, self.corrected_dir, pd_man)
+        klets = de.get_good_klets(pd_man.images, k=3)
+        self.assertGreater(len(klets.index), 0)
+        seq_nos = {index[0] for index in klets['frame_0']}
+        self.assertNotIn(200718, seq_nos)
+
     def test_read_triplet_data(self):
         pd_man = PDManager()
         pd_man.add_original_images(self.images_dir)
@@ -154,5 +198,27 @@ class TestDataExtractorMethods(unittest.TestCase):
         if exists(csv_file):
             remove(csv_file)
 
+    def test_generate_images_besttrack_chunks_parallel(self):
+        pd_man = PDManager()
+        pd_man.load_original_images(join(self.db_dir, 'images.pkl'))
+        pd_man.load_besttrack(join(self.db_dir, 'besttrack.pkl'))
+        pd_man.load_corrected_images(join(self.db_dir, 'corrected.pkl'))
+        de = DataExtractor(self.images_dir, self.corrected_dir, pd_man)
+        seq_list = [198702, 200717, 200718]
+        de.generate_images_besttrack_chunks(seq_list, chunk_size=1024 ** 2,
+                                            output_dir='output_serial')
+        de.generate_images_besttrack_chunks(seq_list, chunk_size=1024 ** 2,
+                                            output_dir='output_parallel',
+                                            n_jobs=2)
+        self.assertEqual(sorted(listdir('output_serial')),
+                         sorted(listdir('output_parallel')))
+        for f in listdir('output_serial'):
+            with h5py.File(join('output_serial', f), 'r') as f1, \
+                    h5py.File(join('output_parallel', f), 'r') as f2:
+                self.assertTrue(np.array_equal(f1['data'][:], f2['data'][:]))
+                self.assertTrue(np.array_equal(f1['idx'][:], f2['idx'][:]))
+        shutil.rmtree('output_serial', ignore_errors=True)
+        shutil.rmtree('output_parallel', ignore_errors=True)
+
 if __name__ == '__main__':
     unittest.main()
@@ -80,6 +80,22 @@ class TestPdManagerMethods(unittest.TestCase):
         self.assertTrue(manager.images.equals(images_copy))
         os.remove(temp_db)
 
+    def test_load_images_columnar(self):
+        for compression in ['parquet', 'feather']:
+            manager = PDManager(compression=compression)
+            temp_db = 'temp.' + compression
+            manager.add_original_images(self.images_dir)
+            manager.save_original_images(temp_db)
+            images_copy = manager.images.copy()
+            manager.load_original_images(temp_db)
+            self.assertTrue(manager.images.equals(images_copy))
+            manager.load_original_images(temp_db, columns=['filename'],
+                                         seq_no_range=(200717, 200718))
+            self.assertEqual(list(manager.images.columns), ['filename'])
+            self.assertTrue(manager.images.index.get_level_values(
+                'seq_no').isin([200717, 200718]).all())
+            os.remove(temp_db)
+
     def test_get_image_from_seq_no_and_frame_num(self, ):
         images_dir = self.images_dir
         jma_dir = self.best_dir
@@ -112,6 +128,10 @@ class TestPdManagerMethods(unittest.TestCase):
         pd_man.add_corrected_info(images_dir, corrected_dir)
         self.assertTrue('corruption' in pd_man.corrected.columns)
         self.assertEqual(pd_man.corrected.loc[:, 'corruption'].isnull().sum(), 0)
+        corruption = pd_man.corrected['corruption'].copy()
+        pd_man.add_corrected_info(images_dir, corrected_dir, n_workers=2,
+                                  backend='process', batch_size=7)
+        self.assertTrue(corruption.equals(pd_man.corrected['corruption']))
 
     def test_add_missing_frames(self):
         pd_man = PDManager()
@@ -135,22 +155,36 @@ class TestPdManagerMethods(unittest.TestCase):
         pd_man = PDManager()
         pd_man.add_original_images(self.images_dir)
         pd_man.add_besttrack(self.best_dir)
-        self.assertFalse(pd_man.images.columns.contains('frame'))
+        self.assertFalse('frame' in pd_man.images.columns)
         pd_man.add_missing_images_info()
         pd_man.add_frames()
-        self.assertTrue(pd_man.images.columns.contains('frame'))
+        self.assertTrue('frame' in pd_man.images.columns)
         self.assertTrue(pd_man.images.loc[198702, 'frame'].is_monotonic_increasing)
-        self.assertTrue(len(set(pd_man.images.loc[198702, 'frame']).intersection([19, 21, 40, 149])) == 0)
+        for obs_time, frame in pd_man.images.loc[198702, 'frame'].items():
+            self.assertEqual(pd_man.get_obs_time_from_frame_num(198702, frame),
+                             obs_time)
 
     def test_add_frames(self):
         pd_man = PDManager()
         pd_man.add_original_images(self.images_dir)
         pd_man.add_besttrack(self.best_dir)
         pd_man.add_missing_images_info()
-        self.assertFalse(pd_man.images.columns.contains('frame'))
+        self.assertFalse('frame' in pd_man.images.columns)
         pd_man.add_frames()
-        self.assertTrue(pd_man.images.columns.contains('frame'))
+        self.assertTrue('frame' in pd_man.images.columns)
         self.assertEqual(pd_man.images['frame'].isnull().sum(), 0)
+        self.assertEqual(pd_man.images['frame'].dtype, 'Int64')
+
+    def test_refresh(self):
+        pd_man = PDManager()
+        pd_man.add_original_images(self.images_dir)
+        n_images = len(pd_man.images.index)
+        self.assertTrue(pd_man.refresh(images_dir=self.images_dir) == set())
+        pd_man.images = pd_man.images.drop(200717, level='seq_no')
+        pd_man.folders = pd_man.folders.drop(('images', 200717))
+        updated = pd_man.refresh(images_dir=self.images_dir)
+        self.assertEqual(updated, {200717})
+        self.assertEqual(len(pd_man.images.index), n_images)
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,7 +2,7 @@ from pyphoon.io.h5 import read_h5_dataset_file
 import numpy as np
 
 def read_chunk(filename, preprocessor, entries_num=None):
-    chunk = read_h5_dataset_file(filename)
+    chunk = read_h5_dataset_file(filename, features=['X', 'Y'], lazy=True)
     if entries_num is None:
         start, end = 0, len(chunk['X'])
     else:
@@ -5,6 +5,7 @@ from skimage.transform import resize
 import h5py
 import numpy as np
 import time
+from pyphoon.io.storage import get_profile
 
 
 class FlowGenerator:
@@ -12,7 +13,8 @@ class FlowGenerator:
     Optical flow generator. Utilizes model from https://github.com/sniklaus/pytorch-spynet project.
     """
 
-    def __init__(self, image_dir, flow_dir, resolution, compression='gzip'):
+    def __init__(self, image_dir, flow_dir, resolution, compression='gzip',
+                 profile=None):
         """
         Initialization
 
@@ -20,11 +22,14 @@ class FlowGenerator:
         :param flow_dir: Output directory for storing flow.
         :param resolution: Resolution of optical flow files.
         :param compression: Compression method for storing files.
+        :param profile: Storage profile for storing files, overrides
+            compression (see :mod:`pyphoon.io.storage`).
         """
         self.image_dir = image_dir
         self.flow_dir = flow_dir
         self.resolution = resolution
         self.compression = compression
+        self.profile = get_profile(profile, compression)
 
     def generate_flow(self, display=False):
         """
@@ -83,7 +88,9 @@ class FlowGenerator:
         """
 
         with h5py.File(filename, "w") as f:
-            f.create_dataset('flow', data=flow, compression=self.compression)
+            # Each flow file is a single frame (both flow components)
+            f.create_dataset('flow', data=flow, **self.profile.get_kwargs(
+                flow.shape, frame_ndim=flow.ndim))
 
         # check integrity
         with h5py.File(filename, 'r') as f:
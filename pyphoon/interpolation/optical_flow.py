@@ -4,6 +4,7 @@ import os
 import torch
 import torch.utils.serialization
 from pyphoon.io.h5 import read_source_image
+from pyphoon.io.quantisation import to_linear_scale
 
 arguments_strModel = 'F'
 
@@ -197,7 +198,7 @@ def scale_to_tensor_input(filename):
     """
     im = read_source_image(filename)
     im3 = numpy.ndarray(shape=(3, *im.shape))
-    im3[:, :, :] = im / 255
+    im3[:, :, :] = to_linear_scale(im) / 255
     return torch.FloatTensor(im3)
 
 
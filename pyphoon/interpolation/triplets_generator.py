@@ -5,15 +5,42 @@ import keras
 import pandas as pd
 import sys
 from skimage.transform import resize
-from pyphoon.io.h5 import read_source_image
+from pyphoon.io.cache import read_image
+from pyphoon.io.quantisation import to_linear_scale
 from pyphoon.interpolation.optical_flow import get_flow_filename
 import h5py
 
+
+def load_image(filename, target_size, image_caches=None):
+    """ Reads an image resized to **target_size**, in the scale of linear
+    uint8 codes expected by the models (see
+    :func:`~pyphoon.io.quantisation.to_linear_scale`), whatever the codec
+    used to store it.
+
+    :param filename: Path to the HDF file storing the image.
+    :type filename: str
+    :param target_size: Size of the output image.
+    :type target_size: tuple
+    :param image_caches: List of :class:`~pyphoon.io.cache.ImageCache`
+        objects.
+    :type image_caches: list, default None
+    :return: Resized image.
+    :rtype: numpy.array
+    """
+    im = to_linear_scale(read_image(filename, image_caches))
+    resized = resize(im, target_size, preserve_range=True)
+    if np.issubdtype(im.dtype, np.integer):
+        return np.round(resized).astype(dtype='uint')
+    return resized.astype(dtype='float32')
+
+
 class TripletsGenerator(keras.utils.Sequence):
 
-    def __init__(self, df, batch_size=16, target_size=(256, 256), seed=0):
+    def __init__(self, df, batch_size=16, target_size=(256, 256), seed=0,
+                 image_caches=None):
         # 'Initialization'
         self.cache = {}
+        self.image_caches = image_caches
         self.df = df
         self.seed = seed
         self.target_size = target_size
@@ -30,8 +57,7 @@ class TripletsGenerator(keras.utils.Sequence):
         filenames = pd.concat([sub['start'], sub['end'], sub['middle']], axis=0).unique()
         for f in filenames:
             if f not in self.cache.keys():
-                im = read_source_image(f)
-                self.cache[f] = np.round(resize(im, self.target_size, preserve_range=True)).astype(dtype='uint')
+                self.cache[f] = load_image(f, self.target_size, self.image_caches)
         chunk_len = len(sub.index)
         im_size = np.shape(next(iter(self.cache.values())))
         x = np.zeros(shape=(chunk_len, im_size[0], im_size[1], 2), dtype=np.float32)
@@ -99,9 +125,7 @@ def generator_from_df(df, batch_size, target_size, data):
             for f in filenames:
                 if f not in data.keys():
                     read_from_disk += 1
-                    im = read_source_image(f)
-                    resized = np.round(resize(im, target_size, preserve_range=True)).astype(dtype='uint')
-                    data[f] = resized
+                    data[f] = load_image(f, target_size)
                     # print("{0} files are in memory, {1} read from disk, {2} read from memory"
                     #       .format(len(data.keys()), read_from_disk, read_from_memory))
                 else:
@@ -130,9 +154,11 @@ def generator_from_df(df, batch_size, target_size, data):
 
 class TripletsWithFlowGenerator(keras.utils.Sequence):
 
-    def __init__(self, df, flow_dir, batch_size=16, target_size=(256, 256), seed=0):
+    def __init__(self, df, flow_dir, batch_size=16, target_size=(256, 256), seed=0,
+                 image_caches=None):
         # 'Initialization'
         self.cache = {}
+        self.image_caches = image_caches
         self.df = df
         self.flow_dir = flow_dir
         self.seed = seed
@@ -150,8 +176,7 @@ class TripletsWithFlowGenerator(keras.utils.Sequence):
         filenames = pd.concat([sub['start'], sub['end'], sub['middle']], axis=0).unique()
         for f in filenames:
             if f not in self.cache.keys():
-                im = read_source_image(f)
-                self.cache[f] = np.round(resize(im, self.target_size, preserve_range=True)).astype(dtype='uint')
+                self.cache[f] = load_image(f, self.target_size, self.image_caches)
         chunk_len = len(sub.index)
         im_size = np.shape(next(iter(self.cache.values())))
         # we have the shape of x of (width, height, 6) because 6 contains of 2 dimensions
@@ -5,8 +5,16 @@ Modules
 +-------------------------------------------+-------------------------------------------------------------------------------+
 | module                                    | Description                                                                   |
 +===========================================+===============================================================================+
+| :mod:`pyphoon.io.cache`                   | Uncompressed, memory-mapped cache of image and chunk files.                   |
++-------------------------------------------+-------------------------------------------------------------------------------+
 | :mod:`pyphoon.io.h5`                      | Reading and writing operations on H5 files.                                   |
 +-------------------------------------------+-------------------------------------------------------------------------------+
+| :mod:`pyphoon.io.quantisation`            | Quantisation codecs, stored as HDF5 attributes and applied on read.           |
++-------------------------------------------+-------------------------------------------------------------------------------+
+| :mod:`pyphoon.io.sequence`                | Consolidated per-sequence image files.                                        |
++-------------------------------------------+-------------------------------------------------------------------------------+
+| :mod:`pyphoon.io.storage`                 | Storage profiles (chunk layout and filters) for HDF5 writers.                 |
++-------------------------------------------+-------------------------------------------------------------------------------+
 | :mod:`pyphoon.io.tsv`                     | Reading and writing operations                                                |
 +-------------------------------------------+-------------------------------------------------------------------------------+
 | :mod:`pyphoon.io.utils`                   | Generic tools                                                                 |
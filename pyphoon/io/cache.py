@@ -0,0 +1,219 @@
+"""
+Uncompressed cache tier for training reads. Source images are stored gzip
+compressed, hence every read decompresses the whole frame into a new array.
+This module mirrors an image tree (one folder per typhoon sequence) into
+contiguous uncompressed *.npy* files, one per sequence:
+
+-   *<seq_no>.npy*: *TxWxH* array with the image frames.
+-   *<seq_no>.filenames.npy*: Original filename of each frame.
+
+Cached files are opened as read-only :class:`numpy.memmap` objects,
+so readers get zero-copy views and only page in the frames they touch.
+Chunk files generated by :mod:`pyphoon.db.data_extractor` can be cached in
+the same fashion (see :func:`build_chunk_cache`).
+"""
+
+from os import listdir, makedirs
+from os.path import join, isdir, exists, abspath, basename, dirname, sep
+import h5py
+import numpy as np
+from pyphoon.io.h5 import get_h5_filenames, read_source_image, \
+    read_source_images_bulk
+
+
+################################################################################
+# IMAGES
+################################################################################
+def build_image_cache(images_dir, cache_dir, folders=None, n_workers=None,
+                      display=False):
+    """ Mirrors an image tree into uncompressed per-sequence *.npy* files.
+
+    :param images_dir: Directory of the image data (with one folder per
+        typhoon sequence).
+    :type images_dir: str
+    :param cache_dir: Directory where the cache files are stored.
+    :type cache_dir: str
+    :param folders: List of the typhoon sequences to cache. If not used,
+        all sequences are cached.
+    :type folders: list, default None
+    :param n_workers: Number of workers used to read each sequence (see
+        :func:`~pyphoon.io.h5.read_source_images_bulk`).
+    :type n_workers: int, default None
+    :param display: Set to True to get information as the method is executed.
+    :type display: bool
+    """
+    if not exists(cache_dir):
+        makedirs(cache_dir)
+    if folders is None:
+        folders = sorted([f for f in listdir(images_dir) if isdir(join(
+            images_dir, f))])
+    for folder in folders:
+        print(folder) if display else 0
+        path_to_folder = join(images_dir, folder)
+        filenames = get_h5_filenames(path_to_folder)
+        images = read_source_images_bulk(path_to_folder, n_workers=n_workers,
+                                         filenames=filenames)
+        write_sequence_cache(cache_dir, folder, images, filenames)
+
+
+def write_sequence_cache(cache_dir, seq_no, images, filenames):
+    """ Stores the image frames of a typhoon sequence as cache files (see
+    :func:`load_sequence_cache`).
+
+    :param cache_dir: Directory where the cache files are stored.
+    :type cache_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :param images: *TxWxH* array with the image frames.
+    :type images: numpy.array
+    :param filenames: Original filename of each frame.
+    :type filenames: list
+    """
+    np.save(join(cache_dir, '{0}.npy'.format(seq_no)), images)
+    np.save(join(cache_dir, '{0}.filenames.npy'.format(seq_no)),
+            np.array(filenames))
+
+
+def load_sequence_cache(cache_dir, seq_no):
+    """ Opens the cached images of a typhoon sequence.
+
+    :param cache_dir: Directory containing the cache files.
+    :type cache_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :return: Tuple with two elements:
+
+        *   Read-only *NxWxH* memory-mapped array with the image frames.
+        *   List with the original filename of each frame.
+    :rtype: tuple
+    """
+    images = np.load(join(cache_dir, '{0}.npy'.format(seq_no)),
+                     mmap_mode='r')
+    filenames = np.load(join(cache_dir, '{0}.filenames.npy'.format(seq_no)))
+    return images, filenames.tolist()
+
+
+class ImageCache(object):
+    """ Serves reads of original image files from a cache built with
+    :func:`build_image_cache`. Paths outside **images_dir**, or belonging to
+    sequences that are not cached, are read with
+    :func:`~pyphoon.io.h5.read_source_image` instead.
+
+    :param images_dir: Directory of the image data that has been cached.
+    :type images_dir: str
+    :param cache_dir: Directory containing the cache files.
+    :type cache_dir: str
+    """
+    def __init__(self, images_dir, cache_dir):
+        self.images_dir = abspath(images_dir)
+        self.cache_dir = cache_dir
+        self._sequences = {}
+
+    def _get_sequence(self, folder):
+        if folder not in self._sequences:
+            if exists(join(self.cache_dir, '{0}.npy'.format(folder))):
+                images, filenames = load_sequence_cache(self.cache_dir,
+                                                        folder)
+                positions = {f: i for i, f in enumerate(filenames)}
+                self._sequences[folder] = (images, positions)
+            else:
+                self._sequences[folder] = None
+        return self._sequences[folder]
+
+    def covers(self, path_to_file):
+        """ Checks whether an image file belongs to the cached image tree.
+
+        :param path_to_file: Path to the HDF file storing the image.
+        :type path_to_file: str
+        :return: True if the image can be read from the cache.
+        :rtype: bool
+        """
+        path_to_file = abspath(path_to_file)
+        if not path_to_file.startswith(self.images_dir + sep):
+            return False
+        sequence = self._get_sequence(basename(dirname(path_to_file)))
+        return sequence is not None and basename(path_to_file) in sequence[1]
+
+    def read(self, path_to_file):
+        """ Reads an image, as :func:`~pyphoon.io.h5.read_source_image`
+        does. Cached images are returned as read-only views on the cache
+        file.
+
+        :param path_to_file: Path to the HDF file storing the image.
+        :type path_to_file: str
+        :return: Image of size *WxH* (*W*: image width, *H*: image height)
+        :rtype: numpy.array
+        """
+        if not self.covers(path_to_file):
+            return read_source_image(path_to_file)
+        path_to_file = abspath(path_to_file)
+        images, positions = self._get_sequence(basename(dirname(
+            path_to_file)))
+        return images[positions[basename(path_to_file)]]
+
+
+def read_image(path_to_file, caches=None):
+    """ Reads an image from the first cache in **caches** covering it,
+    falling back to :func:`~pyphoon.io.h5.read_source_image`.
+
+    :param path_to_file: Path to the HDF file storing the image.
+    :type path_to_file: str
+    :param caches: List of :class:`ImageCache` objects.
+    :type caches: list, default None
+    :return: Image of size *WxH* (*W*: image width, *H*: image height)
+    :rtype: numpy.array
+    """
+    if caches:
+        for cache in caches:
+            if cache.covers(path_to_file):
+                return cache.read(path_to_file)
+    return read_source_image(path_to_file)
+
+
+################################################################################
+# CHUNKS
+################################################################################
+def build_chunk_cache(dataset_dir, chunk_filenames, cache_dir, features):
+    """ Stores the given features of HDF5 chunk files as uncompressed
+    *<chunk name>.<feature>.npy* files.
+
+    :param dataset_dir: Directory containing the chunk files.
+    :type dataset_dir: str
+    :param chunk_filenames: Filenames of the data chunks.
+    :type chunk_filenames: list
+    :param cache_dir: Directory where the cache files are stored.
+    :type cache_dir: str
+    :param features: Features to cache from the h5 data chunks.
+    :type features: list
+    """
+    if not exists(cache_dir):
+        makedirs(cache_dir)
+    for chunk_filename in chunk_filenames:
+        name = chunk_filename.split('.h5')[0]
+        with h5py.File(join(dataset_dir, chunk_filename), 'r') as h5f:
+            for feature in features:
+                np.save(join(cache_dir, '{0}.{1}.npy'.format(name, feature)),
+                        h5f[feature][:])
+
+
+def load_chunk_cache(cache_dir, chunk_filenames, features):
+    """ Opens cached chunk files as read-only memory-mapped arrays. The
+    output follows the format of :func:`~pyphoon.app.utils.load_h5datachunks`
+    and can be fed directly to
+    :class:`~pyphoon.app.utils.DataGeneratorFromChunklist`.
+
+    :param cache_dir: Directory containing the cache files.
+    :type cache_dir: str
+    :param chunk_filenames: Filenames of the original data chunks.
+    :type chunk_filenames: list
+    :param features: Features to load.
+    :type features: list
+    :return: List with, per feature, a list of memory-mapped chunk arrays.
+    :rtype: list
+    """
+    data = []
+    for feature in features:
+        data.append([np.load(join(cache_dir, '{0}.{1}.npy'.format(
+            f.split('.h5')[0], feature)), mmap_mode='r')
+            for f in chunk_filenames])
+    return data
@@ -1,10 +1,13 @@
 from os import listdir
 from os.path import isfile, join, isdir
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import h5py
 import numpy as np
 import warnings
 import collections
 import ast
+from pyphoon.io.quantisation import read_dataset, set_codec_attrs
+from pyphoon.io.storage import get_profile
 
 
 def get_h5_filenames(directory):
@@ -55,9 +58,117 @@ def read_source_images(path_to_folder):
     return images
 
 
+def read_source_images_bulk(path_to_folder, n_workers=None,
+                            backend='thread', filenames=None):
+    """ Reads all image files within a given folder using a pool of workers
+    and stores them in a single preallocated array. Images keep the order
+    given by :func:`get_h5_filenames`. As in :func:`read_source_images`,
+    all images are assumed to have the same dimensionality and to be stored
+    as a dataset with name 'infrared'. Encoded images are decoded (see
+    :mod:`pyphoon.io.quantisation`); if only some of the files are encoded,
+    or their types differ, the images are returned as floats.
+
+    :param path_to_folder: Complete path to the folder containing HDF image
+        files.
+    :type path_to_folder: str
+    :param n_workers: Number of workers used to decode the files. If None,
+        the default of :mod:`concurrent.futures` is used.
+    :type n_workers: int, default None
+    :param backend: Pool used to read the files, 'thread' or 'process'.
+        Threads decode straight into the output array, whereas processes
+        sidestep the GIL at the cost of sending each image back.
+    :type backend: str, default 'thread'
+    :param filenames: Filenames of the images to read, in order. If not
+        used, the folder is listed with :func:`get_h5_filenames`.
+    :type filenames: list, default None
+    :return: *NxWxH* Numpy array (*N*: #images, *W*: image width, *H*: image
+        height)
+    :rtype: numpy.array
+    """
+    if backend not in ('thread', 'process'):
+        raise Exception("backend should be either 'thread' or 'process'")
+
+    if filenames is None:
+        filenames = get_h5_filenames(path_to_folder)
+    files = [join(path_to_folder, f) for f in filenames]
+    if not files:
+        return np.empty((0, 0, 0))
+
+    # First image sets the shape and type of the whole stack. Encoded images
+    # (see pyphoon.io.quantisation) are decoded instead of read in place
+    image, info = _read_source_image_info(files[0])
+    encoded = info[0]
+    images = np.empty((len(files),) + image.shape, dtype=image.dtype)
+    images[0] = image
+
+    if backend == 'thread':
+        def _read(i):
+            with h5py.File(files[i], 'r') as _h5f:
+                dataset = _h5f['infrared']
+                _info = ('codec' in dataset.attrs, dataset.dtype)
+                if _info != info:
+                    # Read again once the type of the stack is known
+                    return _info
+                if encoded:
+                    images[i] = read_dataset(dataset)
+                else:
+                    dataset.read_direct(images[i])
+                return _info
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            infos = [info] + list(executor.map(_read, range(1, len(files))))
+    else:
+        infos = [info]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for i, (image, _info) in enumerate(executor.map(
+                    _read_source_image_info, files[1:]), 1):
+                if _info == info:
+                    images[i] = image
+                infos.append(_info)
+
+    if any(_info != info for _info in infos):
+        images = _read_mixed_images(files, images, infos)
+    return images
+
+
+def _read_source_image_info(path_to_file):
+    """ Reads an image as :func:`read_source_image` does, together with a
+    tuple (encoded, stored type) describing its dataset.
+    """
+    with h5py.File(path_to_file, 'r') as h5f:
+        dataset = h5f['infrared']
+        return read_dataset(dataset), ('codec' in dataset.attrs,
+                                       dataset.dtype)
+
+
+def _read_mixed_images(files, images, infos):
+    """ Completes a stack read by :func:`read_source_images_bulk` whose files
+    are not all stored the same way (e.g. float and encoded images during a
+    partial conversion). Images are decoded into a float stack, only files
+    that differ from the first one are read again.
+
+    :raises: Exception
+    """
+    # Integer images without codec attributes cannot be decoded
+    integer = [i for i, (encoded, dtype) in enumerate(infos) if
+               not encoded and dtype.kind != 'f']
+    if 0 < len(integer) < len(infos):
+        raise Exception('{0} stores unencoded integer data, which cannot be '
+                        'stacked with float or encoded images'.format(
+                            files[integer[0]]))
+    dtype = np.result_type(*[np.float32 if encoded else dtype for encoded,
+                             dtype in infos])
+    mixed = images.astype(dtype)
+    for i, info in enumerate(infos):
+        if info != infos[0]:
+            mixed[i] = read_source_image(files[i])
+    return mixed
+
+
 def read_source_image(path_to_file):
     """ Reads an image from an HDF5 file. It assumes that the image was stored
-    as a dataset with name 'infrared' in an HDF5 file.
+    as a dataset with name 'infrared' in an HDF5 file. Images stored with a
+    codec are decoded (see :mod:`pyphoon.io.quantisation`).
 
     :param path_to_file: Path to the HDF file storing the image.
     :type path_to_file: str
@@ -65,11 +176,12 @@ def read_source_image(path_to_file):
     :rtype: numpy.array
     """
     with h5py.File(path_to_file, 'r') as h5f:
-        image = h5f.get('infrared').value
+        image = read_dataset(h5f['infrared'])
     return image
 
 
-def write_image(path_to_file, image, compression='gzip'):
+def write_image(path_to_file, image, compression='gzip', codec=None,
+                profile=None):
     """ Stores a given image in a dataset in a HDF5 file.
 
     :param compression: Compression type
@@ -78,9 +190,23 @@ def write_image(path_to_file, image, compression='gzip'):
     :type path_to_file: str
     :param image: Image information.
     :type image: numpy.array
+    :param codec: Codec used to encode the image, its parameters are stored
+        as attributes of the dataset (see :mod:`pyphoon.io.quantisation`).
+        If not used, the image is stored as given. Images of the storage
+        type of the codec are assumed to be encoded already.
+    :type codec: :class:`~pyphoon.io.quantisation.Codec`, default None
+    :param profile: Storage profile, overrides **compression** (see
+        :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
     """
+    if codec is not None and np.asarray(image).dtype != codec.dtype:
+        image = codec.encode(image)
+    kwargs = get_profile(profile, compression).get_kwargs(np.shape(image))
     with h5py.File(path_to_file, 'w') as h5f:
-        h5f.create_dataset(name='infrared', data=image, compression=compression)
+        dataset = h5f.create_dataset(name='infrared', data=image, **kwargs)
+        if codec is not None:
+            set_codec_attrs(dataset, codec)
 
 
 ################################################################################
@@ -114,7 +240,7 @@ def read_h5groupfile(path_to_file):
     return dict(data)
 
 
-def write_h5groupfile(data, path_to_file, compression):
+def write_h5groupfile(data, path_to_file, compression, profile=None):
     """ Constructs and stores an H5 file containing the given data.
 
     :param data: Dictionary containing the data to be stored. Keys stand for
@@ -130,32 +256,84 @@ def write_h5groupfile(data, path_to_file, compression):
     :type path_to_file: str
     :param compression: Use to compress H5 file. Find more details at
             the `h5py documentation`_.
+    :param profile: Storage profile, overrides **compression** (see
+        :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
 
     .. _h5py documentation:
             http://docs.h5py.org/en/latest/high/dataset.html
     """
+    profile = get_profile(profile, compression)
     with h5py.File(path_to_file, 'w') as hf:
         for key, value in data.items():
             g1 = hf.create_group(key)
             g1.create_dataset('data', data=value['data'],
-                              compression=compression)
+                              **profile.get_kwargs(
+                                  np.shape(value['data']),
+                                  dtype=np.asarray(value['data']).dtype))
             g1.create_dataset('ids', data=str(value['ids']))
 
 
-def read_h5_dataset_file(path_to_file):
+class LazyH5Dataset(object):
+    """ Array-like handle on a dataset of an HDF5 file. Data is only read
+    when the handle is indexed, and only the requested hyperslab is read
+    from disk. E.g. ``handle[mask, 10:20, 10:20]`` reads the rows selected
+    by the boolean array *mask*, cropped to the given window. Lists of
+    byte-strings are decoded as in :func:`read_h5_dataset_file`.
+
+    :param path_to_file: Path to an H5 file.
+    :type path_to_file: str
+    :param key: Name of the dataset.
+    :type key: str
+    """
+    def __init__(self, path_to_file, key):
+        self.path_to_file = path_to_file
+        self.key = key
+        with h5py.File(path_to_file, 'r') as h5f:
+            self.shape = h5f[key].shape
+            self.dtype = h5f[key].dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, item):
+        with h5py.File(self.path_to_file, 'r') as h5f:
+            value = h5f[self.key][item]
+        # Decode list of byte-strings
+        if isinstance(value, np.ndarray) and value.ndim == 1 and \
+                len(value) > 0 and isinstance(value[0], bytes):
+            value = [n.decode("utf-8") for n in value]
+        return value
+
+    def __array__(self, dtype=None):
+        value = np.asarray(self[()])
+        return value if dtype is None else value.astype(dtype)
+
+
+def read_h5_dataset_file(path_to_file, features=None, lazy=False):
     """ Reads an HDF5 file and returns its content in a dictionary-fashion.
 
     :param path_to_file: Path to an H5 file.
     :type path_to_file: str
+    :param features: Data field names to read. By default all fields are
+        read.
+    :type features: list, default None
+    :param lazy: Set to True to get :class:`LazyH5Dataset` handles instead
+        of the data itself, so that only the rows and regions that are later
+        indexed are read.
+    :type lazy: bool, default False
     :return: Content of the HDF5 file as a dictionary. Keys stand for data
         field names and values are the corresponding data.
     :rtype: dict
     """
     with h5py.File(path_to_file, 'r') as h5f:
-        keys = list(h5f.keys())
+        keys = list(h5f.keys()) if features is None else features
         data = {}
         for key in keys:
-            if key != "name":
+            if key != "name" and lazy:
+                data[key] = LazyH5Dataset(path_to_file, key)
+            elif key != "name":
                 # Decode list of byte-strings
                 value = h5f[key][:]
                 if (isinstance(value, np.ndarray)) and isinstance(value[0],
@@ -184,7 +362,7 @@ def read_h5file(path_to_file):
     return data
 
 
-def write_h5_dataset_file(data, path_to_file, compression):
+def write_h5_dataset_file(data, path_to_file, compression, profile=None):
     """ Constructs and stores an HDF5 file containing the given data.
 
     :param data: Dictionary containing the data to be stored. Keys stand for
@@ -194,12 +372,17 @@ def write_h5_dataset_file(data, path_to_file, compression):
     :type path_to_file: str
     :param compression: Use to compress H5 file. Find more details at
             the `h5py documentation`_
+    :param profile: Storage profile, overrides **compression** (see
+        :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
 
     .. _h5py documentation:
             http://docs.h5py.org/en/latest/high/dataset.html
     """
     # warnings.warn("deprecated, use write_h5groupfile() instead",
     #              DeprecationWarning)
+    profile = get_profile(profile, compression)
     with h5py.File(path_to_file, 'w') as h5f:
         for key, value in data.items():
             if isinstance(value, list):
@@ -209,7 +392,96 @@ def write_h5_dataset_file(data, path_to_file, compression):
                 elif isinstance(value[0], str):
                     _value = value
                     value = [n.encode("ascii", "ignore") for n in _value]
-            h5f.create_dataset(key, data=value, compression=compression)
+            h5f.create_dataset(key, data=value, **profile.get_kwargs(
+                np.shape(value), dtype=np.asarray(value).dtype))
+
+
+class H5DatasetWriter(object):
+    """ Incrementally writes data fields to an HDF5 file, so that a file with
+    the layout of :func:`write_h5_dataset_file` can be built without holding
+    all its data in memory. Datasets are created resizable along the first
+    axis on the first call to :func:`append` and grow on each further call.
+    The type of each dataset is set by **dtypes** or, by default, by its first
+    samples. Appended samples that cannot be cast safely to that type (e.g.
+    floats to an integer dataset) raise an exception. It can be used as a
+    context manager.
+
+    :param path_to_file: Path where the new H5 file will be created.
+    :type path_to_file: str
+    :param compression: Use to compress H5 file. Find more details at
+            the `h5py documentation`_
+    :param profile: Storage profile, overrides **compression** (see
+        :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    :param dtypes: Type of the datasets, by data field name.
+    :type dtypes: dict, default None
+
+    .. _h5py documentation:
+            http://docs.h5py.org/en/latest/high/dataset.html
+    """
+    def __init__(self, path_to_file, compression, profile=None, dtypes=None):
+        self.path_to_file = path_to_file
+        self.compression = compression
+        self.profile = get_profile(profile, compression)
+        self.dtypes = {} if dtypes is None else dtypes
+        self._h5f = h5py.File(path_to_file, 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, data):
+        """ Appends samples to the data fields of the file.
+
+        :param data: Dictionary containing the data to be appended. Keys stand
+            for data field names, values are the corresponding samples.
+        :type data: dict
+
+        :raises: Exception
+        """
+        for key, value in data.items():
+            if isinstance(value, list):
+                if not value:
+                    continue
+                # Encode byte-string lists
+                elif isinstance(value[0], str):
+                    value = np.array([n.encode("ascii", "ignore") for n in
+                                      value], dtype=object)
+            value = np.asarray(value)
+            if key in self._h5f:
+                dtype = self._h5f[key].dtype
+            elif key in self.dtypes:
+                dtype = np.dtype(self.dtypes[key])
+            elif value.dtype == object:
+                dtype = h5py.special_dtype(vlen=bytes)
+            else:
+                dtype = value.dtype
+            if not np.can_cast(value.dtype, dtype, 'same_kind'):
+                raise Exception('Samples of {0} of type {1} cannot be stored '
+                                'as {2}'.format(key, value.dtype, dtype))
+            if key not in self._h5f:
+                # Chunks are sized for the whole (growing) dataset
+                kwargs = self.profile.get_kwargs((max(
+                    len(value), self.profile.chunk_frames or 1),) +
+                    value.shape[1:], dtype=dtype)
+                kwargs.setdefault('chunks', (1,) + value.shape[1:] if
+                                  value.ndim > 1 else True)
+                self._h5f.create_dataset(
+                    key, data=value, dtype=dtype,
+                    maxshape=(None,) + value.shape[1:], **kwargs)
+            else:
+                dataset = self._h5f[key]
+                n = dataset.shape[0]
+                dataset.resize(n + value.shape[0], axis=0)
+                dataset[n:] = value
+
+    def close(self):
+        """ Closes the HDF5 file.
+        """
+        self._h5f.close()
 
 
 def write_h5file(data, path_to_file, compression):
@@ -0,0 +1,312 @@
+"""
+Quantisation codecs for image data. A codec encodes brightness temperatures
+(in Kelvin) into a compact storage type and decodes them back, trading
+storage and bandwidth against precision:
+
++---------------+----------------+--------------------------------------------------------------+
+| codec         | storage type   | Description                                                  |
++===============+================+==============================================================+
+| 'linear'      | uint8, uint16  | Linear mapping of [min_th, max_th] K. Largest error of       |
+|               |                | ~0.3 K (uint8) or ~0.002 K (uint16) for the default range.   |
++---------------+----------------+--------------------------------------------------------------+
+| 'float16'     | float16        | Half precision floats. Largest error of 0.125 K over 256 K.  |
++---------------+----------------+--------------------------------------------------------------+
+| 'lut'         | uint8          | Lookup table of up to 256 levels. The default table spends   |
+|               |                | more levels on cold cloud tops.                              |
++---------------+----------------+--------------------------------------------------------------+
+
+The parameters of a codec are stored as attributes of the HDF5 dataset
+holding the encoded data (see :func:`set_codec_attrs`), hence readers in
+:mod:`pyphoon.io.h5` and :mod:`pyphoon.io.sequence` decode the data
+automatically (see :func:`read_dataset`). Datasets without codec attributes
+are returned as stored.
+"""
+
+import numpy as np
+
+
+class Codec(object):
+    """ Base class of the quantisation codecs.
+
+    :param dtype: Storage type of the encoded data.
+    :type dtype: str or numpy.dtype
+    """
+    name = None  #: Name of the codec, stored as attribute 'codec'.
+
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+
+    def encode(self, data):
+        """ Encodes brightness temperatures.
+
+        :param data: Images of any shape (in Kelvin).
+        :type data: numpy.array
+        :return: Encoded images, of type **dtype**.
+        :rtype: numpy.array
+        """
+        raise NotImplementedError
+
+    def decode(self, data):
+        """ Decodes images encoded with :func:`encode`.
+
+        :param data: Encoded images of any shape.
+        :type data: numpy.array
+        :return: Brightness temperatures (in Kelvin), as float32.
+        :rtype: numpy.array
+        """
+        raise NotImplementedError
+
+    def clip(self, data):
+        """ Clips data to the range represented by the codec.
+
+        :param data: Images of any shape (in Kelvin).
+        :type data: numpy.array
+        :return: Clipped images.
+        :rtype: numpy.array
+        """
+        return data
+
+    def get_error(self, data, encoded):
+        """ Computes the largest pixel error of encoded images with respect
+        to the original images, clipped to the range of the codec.
+
+        :param data: Image (*WxH*) or array of images (*NxWxH*).
+        :type data: numpy.array
+        :param encoded: Encoded images (see :func:`encode`).
+        :type encoded: numpy.array
+        :return: Largest error of the image (or of each image). NaN values in
+            the original images give NaN errors.
+        :rtype: float or numpy.array
+        """
+        error = np.abs(self.clip(data) - self.decode(encoded))
+        if error.size == 0:
+            return np.zeros(error.shape[:-2])
+        return error.max(axis=(-2, -1))
+
+    def get_params(self):
+        """ Gets the parameters needed to build the codec again.
+
+        :return: Dictionary with the parameters of the codec.
+        :rtype: dict
+        """
+        return {}
+
+    def get_attrs(self):
+        """ Gets the HDF5 attributes describing the codec: 'codec' with its
+        name and 'codec_<param>' for each parameter.
+
+        :return: Dictionary with the attributes.
+        :rtype: dict
+        """
+        attrs = {'codec': self.name}
+        for key, value in self.get_params().items():
+            attrs['codec_' + key] = value
+        return attrs
+
+
+class LinearCodec(Codec):
+    """ Linear mapping of [**min_th**, **max_th**] to the whole range of an
+    unsigned integer type. Values out of the range are clipped.
+
+    :param dtype: Storage type, 'uint8' or 'uint16'.
+    :type dtype: str, default 'uint8'
+    :param min_th: Value mapped to 0.
+    :type min_th: float, default 160
+    :param max_th: Value mapped to the largest integer.
+    :type max_th: float, default 310
+    """
+    name = 'linear'
+
+    def __init__(self, dtype='uint8', min_th=160, max_th=310):
+        super(LinearCodec, self).__init__(dtype)
+        if self.dtype not in (np.uint8, np.uint16):
+            raise Exception('dtype should be either uint8 or uint16')
+        self.min_th = float(min_th)
+        self.max_th = float(max_th)
+        self.levels = np.iinfo(self.dtype).max
+
+    def encode(self, data):
+        codes = self.scale(data)
+        np.rint(codes, out=codes)
+        np.clip(codes, 0, self.levels, out=codes)
+        return codes.astype(self.dtype)
+
+    def decode(self, data):
+        return data.astype(dtype='float32') / self.levels * (
+            self.max_th - self.min_th) + self.min_th
+
+    def scale(self, data):
+        """ Maps brightness temperatures to the (continuous) scale of the
+        codes, without rounding nor clipping.
+
+        :param data: Images of any shape (in Kelvin).
+        :type data: numpy.array
+        :return: Scaled images, as float32.
+        :rtype: numpy.array
+        """
+        return (np.asarray(data, dtype='float32') - self.min_th) * (
+            self.levels / (self.max_th - self.min_th))
+
+    def clip(self, data):
+        return np.clip(data, self.min_th, self.max_th)
+
+    def get_params(self):
+        return {'dtype': self.dtype.name, 'min_th': self.min_th,
+                'max_th': self.max_th}
+
+
+class Float16Codec(Codec):
+    """ Stores brightness temperatures as half precision floats. """
+    name = 'float16'
+
+    def __init__(self):
+        super(Float16Codec, self).__init__('float16')
+
+    def encode(self, data):
+        return np.asarray(data).astype(self.dtype)
+
+    def decode(self, data):
+        return data.astype(dtype='float32')
+
+
+class LUTCodec(Codec):
+    """ Nonlinear codec which maps each value to the nearest level of a
+    lookup table. By default, the levels of the table follow
+    *min_th + (max_th - min_th) * (k / 255) ** gamma*, hence *gamma > 1*
+    spends more levels on low temperatures, i.e. cold cloud tops (~0.04 K
+    steps at 160 K and ~0.9 K steps at 310 K for the default values). Values
+    out of the table range are clipped.
+
+    :param table: Sorted levels (in Kelvin), at most 256. If not used, the
+        default table is built from **min_th**, **max_th** and **gamma**.
+    :type table: numpy.array, default None
+    :param min_th: Lowest level of the default table.
+    :type min_th: float, default 160
+    :param max_th: Highest level of the default table.
+    :type max_th: float, default 310
+    :param gamma: Exponent of the default table.
+    :type gamma: float, default 1.5
+    """
+    name = 'lut'
+
+    def __init__(self, table=None, min_th=160, max_th=310, gamma=1.5):
+        super(LUTCodec, self).__init__('uint8')
+        if table is None:
+            table = min_th + (max_th - min_th) * (np.arange(256) / 255) ** \
+                gamma
+        self.table = np.asarray(table, dtype='float32')
+        if not 1 < len(self.table) <= 256 or \
+                np.any(np.diff(self.table) <= 0):
+            raise Exception('table should be strictly increasing with 2 to '
+                            '256 levels')
+
+    def encode(self, data):
+        data = self.clip(np.asarray(data, dtype='float32'))
+        codes = np.searchsorted(self.table, data)
+        np.clip(codes, 1, len(self.table) - 1, out=codes)
+        # Nearest of the two surrounding levels
+        codes -= (data - self.table[codes - 1]) <= (self.table[codes] - data)
+        return codes.astype(self.dtype)
+
+    def decode(self, data):
+        return self.table[data]
+
+    def clip(self, data):
+        return np.clip(data, self.table[0], self.table[-1])
+
+    def get_params(self):
+        return {'table': self.table}
+
+
+codecs = {
+    LinearCodec.name: LinearCodec,
+    Float16Codec.name: Float16Codec,
+    LUTCodec.name: LUTCodec
+}  #: Available codecs, by name.
+
+
+def get_codec(name, **params):
+    """ Builds a codec from its name and parameters.
+
+    :param name: Name of the codec (see :data:`codecs`).
+    :type name: str
+    :param params: Parameters of the codec.
+    :return: Codec.
+    :rtype: :class:`Codec`
+
+    :raises: Exception
+    """
+    if name not in codecs:
+        raise Exception('Unknown codec {0}, should be one of {1}'.format(
+            name, sorted(codecs)))
+    return codecs[name](**params)
+
+
+def get_codec_from_attrs(attrs):
+    """ Builds the codec described by HDF5 attributes (see
+    :func:`Codec.get_attrs`).
+
+    :param attrs: Attributes of an HDF5 dataset.
+    :type attrs: h5py.AttributeManager or dict
+    :return: Codec, or None if the attributes do not describe a codec.
+    :rtype: :class:`Codec`
+    """
+    if 'codec' not in attrs:
+        return None
+    name = attrs['codec']
+    name = name.decode("utf-8") if isinstance(name, bytes) else name
+    params = {}
+    for key in attrs.keys():
+        if key.startswith('codec_'):
+            value = attrs[key]
+            params[key[len('codec_'):]] = value.decode("utf-8") if \
+                isinstance(value, bytes) else value
+    return get_codec(name, **params)
+
+
+def set_codec_attrs(dataset, codec):
+    """ Stores the parameters of a codec as attributes of an HDF5 dataset.
+
+    :param dataset: HDF5 dataset with the encoded data.
+    :type dataset: h5py.Dataset
+    :param codec: Codec used to encode the data.
+    :type codec: :class:`Codec`
+    """
+    for key, value in codec.get_attrs().items():
+        dataset.attrs[key] = value
+
+
+def read_dataset(dataset, selection=()):
+    """ Reads an HDF5 dataset, decoding it if it has codec attributes.
+
+    :param dataset: HDF5 dataset.
+    :type dataset: h5py.Dataset
+    :param selection: Selection to read, e.g. a frame index.
+    :type selection: int, slice or tuple, default ()
+    :return: Data (decoded if a codec was used).
+    :rtype: numpy.array
+    """
+    data = dataset[selection]
+    codec = get_codec_from_attrs(dataset.attrs)
+    return data if codec is None else codec.decode(data)
+
+
+def to_linear_scale(images, min_th=160, max_th=310):
+    """ Gets images in the scale of linear uint8 codes (see
+    :class:`LinearCodec`), the scale expected by models trained on uint8
+    images. Integer images are assumed to be linear uint8 codes already
+    (stored without codec attributes), float images are assumed to be
+    brightness temperatures.
+
+    :param images: Images of any shape.
+    :type images: numpy.array
+    :param min_th: Value mapped to 0.
+    :type min_th: float, default 160
+    :param max_th: Value mapped to 255.
+    :type max_th: float, default 310
+    :return: Images in the [0, 255] scale (not rounded).
+    :rtype: numpy.array
+    """
+    if np.issubdtype(np.asarray(images).dtype, np.integer):
+        return images
+    return LinearCodec('uint8', min_th, max_th).scale(images)
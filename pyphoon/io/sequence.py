@@ -0,0 +1,238 @@
+"""
+Reading and writing of consolidated sequence files. Instead of storing each
+image frame in its own HDF5 file, all frames of a typhoon sequence are
+packed into a single HDF5 file *<seq_no>.h5* with the following datasets:
+
+-   *infrared*: *TxWxH* array with the image frames, chunked frame by frame
+    (optionally encoded, see :mod:`pyphoon.io.quantisation`).
+-   *obs_time*: Observation time of each frame as *YYYYMMDDHH* strings.
+-   *filenames*: Original filename of each frame.
+
+Frames are sorted by observation time, hence only one file needs to be
+opened per typhoon sequence.
+"""
+
+from os import listdir, makedirs
+from os.path import join, isdir, exists
+import h5py
+import numpy as np
+from pyphoon.io.h5 import get_h5_filenames, read_source_images_bulk
+from pyphoon.io.utils import folder2name
+from pyphoon.io.quantisation import read_dataset, set_codec_attrs
+from pyphoon.io.storage import StorageProfile, get_profile
+
+
+def get_sequence_filename(packed_dir, seq_no):
+    """ Gets the path to the consolidated file of sequence **seq_no**.
+
+    :param packed_dir: Directory containing the consolidated sequence files.
+    :type packed_dir: str
+    :param seq_no: Typhoon sequence number, e.g. 199607.
+    :type seq_no: int or str
+    :return: Path to the consolidated sequence file.
+    :rtype: str
+    """
+    return join(packed_dir, '{0}.h5'.format(seq_no))
+
+
+def pack_sequence_images(path_to_folder, path_to_file, compression='gzip',
+                         n_workers=None, profile=None):
+    """ Packs all image files within a sequence folder into a single
+    consolidated HDF5 file.
+
+    :param path_to_folder: Path to the folder containing the HDF image files
+        of one typhoon sequence.
+    :type path_to_folder: str
+    :param path_to_file: Path of the new consolidated HDF5 file.
+    :type path_to_file: str
+    :param compression: Compression type.
+    :type compression: str
+    :param n_workers: Number of workers used to read the source images (see
+        :func:`~pyphoon.io.h5.read_source_images_bulk`).
+    :type n_workers: int, default None
+    :param profile: Storage profile of the frames, overrides
+        **compression** (see :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    """
+    filenames = get_h5_filenames(path_to_folder)
+    images = read_source_images_bulk(path_to_folder, n_workers=n_workers,
+                                     filenames=filenames)
+    write_sequence_file(path_to_file, folder2name(path_to_folder), images,
+                        filenames, compression=compression, profile=profile)
+
+
+def write_sequence_file(path_to_file, seq_no, images, filenames,
+                        compression='gzip', codec=None, profile=None):
+    """ Stores the image frames of a typhoon sequence in a consolidated
+    HDF5 file.
+
+    :param path_to_file: Path of the new consolidated HDF5 file.
+    :type path_to_file: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :param images: *TxWxH* array with the image frames, sorted by
+        observation time.
+    :type images: numpy.array
+    :param filenames: Original filename of each frame.
+    :type filenames: list
+    :param compression: Compression type.
+    :type compression: str
+    :param codec: Codec used to encode the frames, its parameters are stored
+        as attributes of *infrared*. If not used, frames are stored as given.
+        Frames of the storage type of the codec are assumed to be encoded
+        already.
+    :type codec: :class:`~pyphoon.io.quantisation.Codec`, default None
+    :param profile: Storage profile of the frames, overrides
+        **compression** (see :mod:`pyphoon.io.storage`). By default, frames
+        are chunked one by one.
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    """
+    obs_time = [f.split('-')[0].encode("ascii") for f in filenames]
+    if codec is not None and images.dtype != codec.dtype:
+        images = codec.encode(images)
+    profile = StorageProfile(compression=compression, chunk_frames=1) if \
+        profile is None else get_profile(profile)
+
+    with h5py.File(path_to_file, 'w') as h5f:
+        h5f.attrs['seq_no'] = int(seq_no)
+        if images.shape[0] > 0:
+            dataset = h5f.create_dataset(
+                'infrared', data=images, **profile.get_kwargs(images.shape))
+        else:
+            dataset = h5f.create_dataset(
+                'infrared', shape=(0, 0, 0), dtype='float32' if codec is None
+                else codec.dtype)
+        if codec is not None:
+            set_codec_attrs(dataset, codec)
+        h5f.create_dataset('obs_time', data=np.array(obs_time, dtype='S10'))
+        h5f.create_dataset('filenames', data=np.array(
+            [f.encode("ascii") for f in filenames], dtype='S'))
+
+
+def pack_image_dataset(images_dir, packed_dir, compression='gzip',
+                       folders=None, n_workers=None, display=False,
+                       profile=None):
+    """ Packs every sequence folder of the image dataset into a consolidated
+    sequence file (see :func:`pack_sequence_images`).
+
+    :param images_dir: Directory of the image data (with one folder per
+        typhoon sequence).
+    :type images_dir: str
+    :param packed_dir: Directory where consolidated files are stored.
+    :type packed_dir: str
+    :param compression: Compression type.
+    :type compression: str
+    :param folders: List of the typhoon sequences to pack. If not used,
+        all sequences are packed.
+    :type folders: list, default None
+    :param n_workers: Number of workers used to read each sequence.
+    :type n_workers: int, default None
+    :param display: Set to True to get information as the method is executed.
+    :type display: bool
+    :param profile: Storage profile of the frames, overrides
+        **compression** (see :mod:`pyphoon.io.storage`).
+    :type profile: :class:`~pyphoon.io.storage.StorageProfile` or str,
+        default None
+    """
+    if not exists(packed_dir):
+        makedirs(packed_dir)
+    if folders is None:
+        folders = sorted([f for f in listdir(images_dir) if isdir(join(
+            images_dir, f))])
+    for folder in folders:
+        print(folder) if display else 0
+        pack_sequence_images(join(images_dir, folder),
+                             get_sequence_filename(packed_dir, folder),
+                             compression=compression, n_workers=n_workers,
+                             profile=profile)
+
+
+def _obs_time2key(obs_time):
+    """ Converts an observation time to the key used in consolidated files.
+
+    :param obs_time: Observation time, either as a *YYYYMMDDHH* string or as
+        a datetime-like object.
+    :type obs_time: str or datetime.datetime
+    :return: Observation time key.
+    :rtype: bytes
+    """
+    if not isinstance(obs_time, str):
+        obs_time = obs_time.strftime("%Y%m%d%H")
+    return obs_time.encode("ascii")
+
+
+def _frame_position(h5f, obs_time):
+    keys = h5f['obs_time'][:]
+    key = _obs_time2key(obs_time)
+    pos = int(np.searchsorted(keys, key))
+    if pos == len(keys) or keys[pos] != key:
+        raise KeyError('No frame with observation time {0}'.format(
+            key.decode("utf-8")))
+    return pos
+
+
+def read_sequence_obs_times(packed_dir, seq_no):
+    """ Reads the observation times of all frames of a sequence.
+
+    :param packed_dir: Directory containing the consolidated sequence files.
+    :type packed_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :return: List with the observation times as *YYYYMMDDHH* strings.
+    :rtype: list
+    """
+    with h5py.File(get_sequence_filename(packed_dir, seq_no), 'r') as h5f:
+        return [n.decode("utf-8") for n in h5f['obs_time'][:]]
+
+
+def read_sequence_filenames(packed_dir, seq_no):
+    """ Reads the original filenames of all frames of a sequence, in the
+    same order as :func:`~pyphoon.io.h5.get_h5_filenames`.
+
+    :param packed_dir: Directory containing the consolidated sequence files.
+    :type packed_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :return: List with the original filenames.
+    :rtype: list
+    """
+    with h5py.File(get_sequence_filename(packed_dir, seq_no), 'r') as h5f:
+        return [n.decode("utf-8") for n in h5f['filenames'][:]]
+
+
+def read_sequence_images(packed_dir, seq_no):
+    """ Reads all image frames of a sequence. Counterpart of
+    :func:`~pyphoon.io.h5.read_source_images` for consolidated files.
+
+    :param packed_dir: Directory containing the consolidated sequence files.
+    :type packed_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :return: *NxWxH* Numpy array (*N*: #images, *W*: image width, *H*: image
+        height)
+    :rtype: numpy.array
+    """
+    with h5py.File(get_sequence_filename(packed_dir, seq_no), 'r') as h5f:
+        return read_dataset(h5f['infrared'])
+
+
+def read_sequence_image(packed_dir, seq_no, obs_time):
+    """ Reads a single image frame of a sequence. Counterpart of
+    :func:`~pyphoon.io.h5.read_source_image` for consolidated files.
+
+    :param packed_dir: Directory containing the consolidated sequence files.
+    :type packed_dir: str
+    :param seq_no: Typhoon sequence number.
+    :type seq_no: int or str
+    :param obs_time: Observation time of the frame, either as a *YYYYMMDDHH*
+        string or as a datetime-like object.
+    :type obs_time: str or datetime.datetime
+    :return: Image of size *WxH* (*W*: image width, *H*: image height)
+    :rtype: numpy.array
+
+    :raises: KeyError
+    """
+    with h5py.File(get_sequence_filename(packed_dir, seq_no), 'r') as h5f:
+        return read_dataset(h5f['infrared'], _frame_position(h5f, obs_time))
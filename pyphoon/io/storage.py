@@ -0,0 +1,223 @@
+"""
+Storage profiles for the HDF5 files written by pyphoon. A profile sets the
+chunk layout and the filters (shuffle, LZF/gzip compression and level,
+fletcher32 checksums) of the datasets it is applied to. Writers accept either
+a :class:`StorageProfile` object or the name of one of the predefined
+profiles:
+
++-----------------+---------------------------------------------------------------------+
+| profile         | Description                                                         |
++=================+=====================================================================+
+| 'fast-read'     | LZF with shuffle, one frame per chunk. Fastest decompression.       |
++-----------------+---------------------------------------------------------------------+
+| 'small'         | gzip level 9 with shuffle and fletcher32 checksums, 16 frames per   |
+|                 | chunk. Smallest files, for archiving.                               |
++-----------------+---------------------------------------------------------------------+
+| 'crop-friendly' | gzip level 4 with shuffle, 64x64 tiles of one frame. Reading a crop |
+|                 | only decompresses the tiles it overlaps.                            |
++-----------------+---------------------------------------------------------------------+
+
+Without profile, writers keep using their **compression** argument alone,
+with the chunk layout chosen by h5py. Use :func:`benchmark_profiles` to
+compare the size and read throughput of the profiles on some data.
+"""
+
+from os import remove
+from os.path import join, getsize
+from time import time
+import h5py
+import numpy as np
+
+
+class StorageProfile(object):
+    """ Chunk layout and filters of HDF5 datasets. Datasets are seen as
+    stacks of frames: the trailing axes of a dataset form a frame (by
+    default its last two axes) and its leading axes index the frames.
+
+    :param compression: Compression filter, 'gzip', 'lzf' or None.
+    :type compression: str, default None
+    :param compression_opts: Compression level (0-9) for 'gzip'.
+    :type compression_opts: int, default None
+    :param shuffle: Set to True to apply the shuffle filter, which usually
+        improves the compression of numeric data.
+    :type shuffle: bool, default False
+    :param fletcher32: Set to True to store checksums of each chunk, which
+        are verified on read.
+    :type fletcher32: bool, default False
+    :param chunk_frames: Number of frames per chunk. If neither
+        **chunk_frames** nor **tile** are used, chunks are chosen by h5py.
+    :type chunk_frames: int, default None
+    :param tile: Size of the chunks along the first two axes of a frame. If
+        not used, chunks span whole frames.
+    :type tile: tuple, default None
+    """
+    def __init__(self, compression=None, compression_opts=None, shuffle=False,
+                 fletcher32=False, chunk_frames=None, tile=None):
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.fletcher32 = fletcher32
+        self.chunk_frames = chunk_frames
+        self.tile = tile
+
+    def get_chunks(self, shape, frame_ndim=None):
+        """ Gets the chunk shape of a dataset.
+
+        :param shape: Shape of the dataset.
+        :type shape: tuple
+        :param frame_ndim: Number of trailing axes forming a frame. By
+            default, 2 (or 1 for 1-dimensional datasets).
+        :type frame_ndim: int, default None
+        :return: Chunk shape, or None to let h5py choose it.
+        :rtype: tuple
+        """
+        if self.chunk_frames is None and self.tile is None:
+            return None
+        frame_ndim = min(2, len(shape)) if frame_ndim is None else frame_ndim
+        n_stack = len(shape) - frame_ndim
+        if n_stack == 0 and frame_ndim < 2:
+            return None
+        chunks = [1] * n_stack + list(shape[n_stack:])
+        if n_stack > 0 and self.chunk_frames is not None:
+            chunks[0] = self.chunk_frames
+        if self.tile is not None:
+            for i, size in enumerate(self.tile[:frame_ndim]):
+                chunks[n_stack + i] = size
+        return tuple(max(1, min(c, s)) for c, s in zip(chunks, shape))
+
+    def get_kwargs(self, shape, frame_ndim=None, dtype=None):
+        """ Gets the arguments of :func:`h5py.Group.create_dataset` that
+        apply the profile to a dataset.
+
+        :param shape: Shape of the dataset.
+        :type shape: tuple
+        :param frame_ndim: Number of trailing axes forming a frame (see
+            :func:`get_chunks`).
+        :type frame_ndim: int, default None
+        :param dtype: Type of the dataset. Checksums are not applied to
+            string datasets, which HDF5 does not allow to filter with
+            fletcher32.
+        :type dtype: numpy.dtype, default None
+        :return: Keyword arguments.
+        :rtype: dict
+        """
+        if len(shape) == 0:
+            # Scalars can be neither chunked nor filtered
+            return {}
+        kwargs = {}
+        if self.compression is not None:
+            kwargs['compression'] = self.compression
+            if self.compression_opts is not None:
+                kwargs['compression_opts'] = self.compression_opts
+        if self.shuffle:
+            kwargs['shuffle'] = True
+        if self.fletcher32 and (dtype is None or
+                                np.dtype(dtype).kind not in 'SUO'):
+            kwargs['fletcher32'] = True
+        chunks = self.get_chunks(shape, frame_ndim)
+        if chunks is not None:
+            kwargs['chunks'] = chunks
+        return kwargs
+
+
+profiles = {
+    'fast-read': StorageProfile(compression='lzf', shuffle=True,
+                                chunk_frames=1),
+    'small': StorageProfile(compression='gzip', compression_opts=9,
+                            shuffle=True, fletcher32=True, chunk_frames=16),
+    'crop-friendly': StorageProfile(compression='gzip', compression_opts=4,
+                                    shuffle=True, chunk_frames=1,
+                                    tile=(64, 64))
+}  #: Predefined profiles, by name.
+
+
+def get_profile(profile=None, compression=None):
+    """ Gets the storage profile used by a writer.
+
+    :param profile: Profile, or name of a predefined profile (see
+        :data:`profiles`). If not used, a profile with **compression** alone
+        is returned.
+    :type profile: :class:`StorageProfile` or str, default None
+    :param compression: Compression type, only used without **profile**.
+    :type compression: str, default None
+    :return: Storage profile.
+    :rtype: :class:`StorageProfile`
+
+    :raises: Exception
+    """
+    if profile is None:
+        return StorageProfile(compression=compression)
+    if isinstance(profile, StorageProfile):
+        return profile
+    if profile not in profiles:
+        raise Exception('Unknown storage profile {0}, should be one of '
+                        '{1}'.format(profile, sorted(profiles)))
+    return profiles[profile]
+
+
+def benchmark_profiles(images, directory, profiles_to_test=None,
+                       crop_size=(64, 64), n_reads=50, seed=0):
+    """ Compares the file size and the read throughput of storage profiles.
+    For each profile, **images** are written as a single dataset and read
+    back (i) as a whole, (ii) frame by frame at random and (iii) as random
+    crops of single frames.
+
+    :param images: *NxWxH* array with image frames.
+    :type images: numpy.array
+    :param directory: Directory where the temporary files are written.
+    :type directory: str
+    :param profiles_to_test: Profiles (or names of predefined profiles) by
+        label. By default, the predefined profiles and 'gzip' compression
+        alone (i.e. no profile).
+    :type profiles_to_test: dict, default None
+    :param crop_size: Size of the crops.
+    :type crop_size: tuple, default (64, 64)
+    :param n_reads: Number of random frames and crops read.
+    :type n_reads: int, default 50
+    :param seed: Seed of the random reads.
+    :type seed: int, default 0
+    :return: List with one dictionary per profile, with keys *profile*,
+        *size* (bytes), *ratio* (compression ratio), *write* (seconds),
+        *full_read* (MB/s of decompressed data), *frame_reads* and
+        *crop_reads* (reads per second).
+    :rtype: list
+    """
+    if profiles_to_test is None:
+        profiles_to_test = dict(profiles)
+        profiles_to_test['gzip'] = StorageProfile(compression='gzip')
+    random_state = np.random.RandomState(seed)
+    frames = random_state.randint(len(images), size=n_reads)
+    rows = random_state.randint(images.shape[1] - crop_size[0] + 1,
+                                size=n_reads)
+    cols = random_state.randint(images.shape[2] - crop_size[1] + 1,
+                                size=n_reads)
+
+    results = []
+    for label, profile in sorted(profiles_to_test.items()):
+        path_to_file = join(directory, 'benchmark_{0}.h5'.format(label))
+        start = time()
+        with h5py.File(path_to_file, 'w') as h5f:
+            h5f.create_dataset('infrared', data=images,
+                               **get_profile(profile).get_kwargs(images.shape))
+        write_time = time() - start
+        with h5py.File(path_to_file, 'r') as h5f:
+            dataset = h5f['infrared']
+            start = time()
+            dataset[()]
+            full_time = time() - start
+            start = time()
+            for frame in frames:
+                dataset[frame]
+            frame_time = time() - start
+            start = time()
+            for frame, row, col in zip(frames, rows, cols):
+                dataset[frame, row:row + crop_size[0], col:col + crop_size[1]]
+            crop_time = time() - start
+        size = getsize(path_to_file)
+        remove(path_to_file)
+        results.append({'profile': label, 'size': size,
+                        'ratio': images.nbytes / size, 'write': write_time,
+                        'full_read': images.nbytes / 1e6 / full_time,
+                        'frame_reads': n_reads / frame_time,
+                        'crop_reads': n_reads / crop_time})
+    return results
@@ -0,0 +1,35 @@
+import unittest
+from pyphoon.io.h5 import read_source_image, get_h5_filenames
+from pyphoon.io.cache import build_image_cache, ImageCache, read_image
+from os.path import exists, join
+import shutil
+
+
+class TestCacheMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.images_dir = '../../../sampledata/datasets/image'
+        self.cache_dir = 'temp_cache'
+        if exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+        build_image_cache(self.images_dir, self.cache_dir, folders=['200717'])
+
+    def tearDown(self):
+        if exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_read(self):
+        cache = ImageCache(self.images_dir, self.cache_dir)
+        folder = join(self.images_dir, '200717')
+        for f in get_h5_filenames(folder):
+            self.assertTrue(cache.covers(join(folder, f)))
+            image = read_source_image(join(folder, f))
+            self.assertTrue((image == cache.read(join(folder, f))).all())
+
+    def test_read_image_fallback(self):
+        cache = ImageCache(self.images_dir, self.cache_dir)
+        folder = join(self.images_dir, '200718')
+        f = get_h5_filenames(folder)[0]
+        self.assertFalse(cache.covers(join(folder, f)))
+        image = read_source_image(join(folder, f))
+        self.assertTrue((image == read_image(join(folder, f), [cache])).all())
@@ -1,7 +1,13 @@
 import unittest
-from pyphoon.io.h5 import write_image, read_source_image
-from os.path import exists
+from pyphoon.io.h5 import write_image, read_source_image, \
+    read_source_images, read_source_images_bulk, write_h5_dataset_file, \
+    read_h5_dataset_file, H5DatasetWriter
+from pyphoon.io.quantisation import LinearCodec
+import numpy as np
+from os.path import exists, join
 from os import remove
+from shutil import rmtree
+from tempfile import mkdtemp
 
 
 class TestH5Methods(unittest.TestCase):
@@ -18,3 +24,74 @@ class TestH5Methods(unittest.TestCase):
         image2 = read_source_image(filename)
         self.assertTrue((image == image2).all())
         remove(filename)
+
+    def test_read_source_images_bulk(self):
+        src_dir = '../../../sampledata/datasets/image/200717'
+        images = read_source_images(src_dir)
+        images_bulk = read_source_images_bulk(src_dir, n_workers=4)
+        self.assertEqual(images_bulk.shape[0], len(images))
+        for image, image_bulk in zip(images, images_bulk):
+            self.assertTrue((image == image_bulk).all())
+
+    def test_read_source_images_bulk_mixed(self):
+        # Folder partially converted with a codec
+        tmp_dir = mkdtemp()
+        images = np.random.RandomState(0).uniform(
+            160, 310, (4, 8, 8)).astype('float32')
+        codec = LinearCodec()
+        for i, image in enumerate(images):
+            write_image(join(tmp_dir, '20071006{0:02d}-200717-MTS1-1.h5'
+                             .format(i)), image,
+                        codec=codec if i % 2 else None)
+        expected = np.where(np.arange(4)[:, None, None] % 2,
+                            codec.decode(codec.encode(images)), images)
+        for backend in ['thread', 'process']:
+            images_bulk = read_source_images_bulk(tmp_dir, n_workers=2,
+                                                  backend=backend)
+            self.assertEqual(images_bulk.dtype, np.float32)
+            self.assertTrue(np.allclose(images_bulk, expected))
+        # Unencoded integer images cannot be mixed with encoded ones
+        write_image(join(tmp_dir, '2007100600-200717-MTS1-1.h5'),
+                    codec.encode(images[0]))
+        with self.assertRaises(Exception):
+            read_source_images_bulk(tmp_dir)
+        rmtree(tmp_dir)
+
+    def test_read_h5_dataset_file_lazy(self):
+        filename = 'temp_chunk.h5'
+        data = {'data': np.random.rand(10, 8, 8), 'class': list(range(10)),
+                'idx': [str(i) for i in range(10)]}
+        write_h5_dataset_file(data, filename, compression='gzip')
+        lazy = read_h5_dataset_file(filename, lazy=True)
+        self.assertEqual(len(lazy['data']), 10)
+        mask = np.array(data['class']) % 2 == 0
+        self.assertTrue((lazy['data'][mask, 2:6, 2:6] ==
+                         data['data'][mask, 2:6, 2:6]).all())
+        self.assertEqual(lazy['idx'][mask], ['0', '2', '4', '6', '8'])
+        remove(filename)
+
+    def test_h5_dataset_writer(self):
+        filename = 'temp_chunk.h5'
+        with H5DatasetWriter(filename, compression='gzip') as writer:
+            for i in range(3):
+                writer.append({'data': np.random.rand(4, 8, 8),
+                               'idx': [str(i) + '_' + str(j)
+                                       for j in range(4)]})
+        data = read_h5_dataset_file(filename)
+        self.assertEqual(data['data'].shape, (12, 8, 8))
+        self.assertEqual(data['idx'][4], '1_0')
+        # Samples that cannot be cast safely are not stored
+        with H5DatasetWriter(filename, compression='gzip') as writer:
+            writer.append({'class': [3, 4]})
+            with self.assertRaises(Exception):
+                writer.append({'class': [5.7, np.nan]})
+        self.assertTrue(np.array_equal(read_h5_dataset_file(filename)[
+                                           'class'], [3, 4]))
+        with H5DatasetWriter(filename, compression='gzip',
+                             dtypes={'class': 'float64'}) as writer:
+            writer.append({'class': [3, 4]})
+            writer.append({'class': [5.7, np.nan]})
+        self.assertTrue(np.array_equal(read_h5_dataset_file(filename)[
+                                           'class'], [3, 4, 5.7, np.nan],
+                                       equal_nan=True))
+        remove(filename)
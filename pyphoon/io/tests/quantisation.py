@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from os.path import exists
+from os import remove
+from pyphoon.io.h5 import read_source_image, write_image
+from pyphoon.io.sequence import write_sequence_file, read_sequence_images, \
+    read_sequence_image, get_sequence_filename
+from pyphoon.io.quantisation import LinearCodec, Float16Codec, LUTCodec, \
+    get_codec_from_attrs, to_linear_scale
+
+
+class TestQuantisationMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.image = np.linspace(150, 320, 64 * 64).reshape(64, 64)
+        self.filename = 'quantisation_test.h5'
+        self.packed_dir = '.'
+
+    def tearDown(self):
+        for filename in [self.filename, get_sequence_filename(
+                self.packed_dir, 200717)]:
+            if exists(filename):
+                remove(filename)
+
+    def test_codecs(self):
+        for codec, error in [(LinearCodec(), 0.3), (LinearCodec('uint16'),
+                                                    0.002),
+                             (Float16Codec(), 0.125), (LUTCodec(), 0.45)]:
+            encoded = codec.encode(self.image)
+            self.assertEqual(encoded.dtype, codec.dtype)
+            self.assertTrue(codec.get_error(self.image, encoded) < error)
+            attrs = codec.get_attrs()
+            decoded = get_codec_from_attrs(attrs).decode(encoded)
+            self.assertTrue(np.array_equal(decoded, codec.decode(encoded)))
+
+    def test_lut_codec(self):
+        codec = LUTCodec()
+        cold = np.array([[161., 162.]])
+        warm = np.array([[301., 302.]])
+        # Cold cloud tops get finer levels
+        self.assertTrue(codec.get_error(cold, codec.encode(cold)) <
+                        codec.get_error(warm, codec.encode(warm)))
+
+    def test_read_encoded(self):
+        write_image(self.filename, self.image, codec=LinearCodec('uint16'))
+        image = read_source_image(self.filename)
+        self.assertEqual(image.dtype, np.float32)
+        self.assertTrue(np.abs(np.clip(self.image, 160, 310) - image).max() <
+                        0.002)
+        # Images stored without codec are read as stored
+        write_image(self.filename, LinearCodec().encode(self.image))
+        self.assertEqual(read_source_image(self.filename).dtype, np.uint8)
+
+        images = np.stack([self.image, self.image + 1])
+        write_sequence_file(get_sequence_filename(self.packed_dir, 200717),
+                            200717, images, ['2007100300-200717-MTS1-1.h5',
+                                             '2007100301-200717-MTS1-1.h5'],
+                            codec=LUTCodec())
+        packed = read_sequence_images(self.packed_dir, 200717)
+        self.assertEqual(packed.shape, images.shape)
+        self.assertTrue(np.array_equal(packed[1], read_sequence_image(
+            self.packed_dir, 200717, '2007100301')))
+
+    def test_to_linear_scale(self):
+        codes = LinearCodec().encode(self.image)
+        self.assertTrue(to_linear_scale(codes) is codes)
+        scaled = to_linear_scale(LinearCodec().decode(codes))
+        self.assertTrue(np.abs(scaled - codes).max() < 1e-3)
@@ -0,0 +1,37 @@
+import unittest
+from pyphoon.io.h5 import read_source_image, read_source_images
+from pyphoon.io.sequence import pack_sequence_images, read_sequence_images, \
+    read_sequence_image, read_sequence_obs_times, get_sequence_filename
+from os.path import exists, join
+from os import remove
+
+
+class TestSequenceMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.src_dir = '../../../sampledata/datasets/image/200717'
+        self.packed_dir = '.'
+        self.filename = get_sequence_filename(self.packed_dir, 200717)
+        if exists(self.filename):
+            remove(self.filename)
+        pack_sequence_images(self.src_dir, self.filename)
+
+    def tearDown(self):
+        if exists(self.filename):
+            remove(self.filename)
+
+    def test_read_sequence_images(self):
+        images = read_source_images(self.src_dir)
+        packed = read_sequence_images(self.packed_dir, 200717)
+        self.assertEqual(len(images), packed.shape[0])
+        self.assertTrue((images[0] == packed[0]).all())
+        self.assertEqual(len(read_sequence_obs_times(self.packed_dir, 200717)),
+                         len(images))
+
+    def test_read_sequence_image(self):
+        image = read_source_image(
+            join(self.src_dir, '2007100300-200717-MTS1-1.h5'))
+        packed = read_sequence_image(self.packed_dir, 200717, '2007100300')
+        self.assertTrue((image == packed).all())
+        with self.assertRaises(KeyError):
+            read_sequence_image(self.packed_dir, 200717, '1900010100')
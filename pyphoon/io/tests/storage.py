@@ -0,0 +1,104 @@
+import unittest
+import h5py
+import numpy as np
+from os.path import exists
+from os import remove
+from pyphoon.io.h5 import write_image, read_source_image, \
+    write_h5_dataset_file, read_h5_dataset_file, H5DatasetWriter
+from pyphoon.io.sequence import write_sequence_file, read_sequence_images, \
+    get_sequence_filename
+from pyphoon.io.storage import StorageProfile, get_profile, \
+    benchmark_profiles
+
+
+class TestStorageMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.images = np.random.RandomState(0).uniform(
+            160, 310, (20, 128, 128)).astype('float32')
+        self.filename = 'storage_test.h5'
+        self.packed_dir = '.'
+
+    def tearDown(self):
+        for filename in [self.filename, get_sequence_filename(
+                self.packed_dir, 200717)]:
+            if exists(filename):
+                remove(filename)
+
+    def test_get_chunks(self):
+        profile = StorageProfile(compression='gzip', chunk_frames=16,
+                                 tile=(64, 64))
+        self.assertEqual(profile.get_chunks((20, 128, 100)), (16, 64, 64))
+        self.assertEqual(profile.get_chunks((4, 32, 32)), (4, 32, 32))
+        self.assertEqual(profile.get_chunks((128, 100)), (64, 64))
+        self.assertEqual(profile.get_chunks((128, 100, 2), frame_ndim=3),
+                         (64, 64, 2))
+        self.assertIsNone(profile.get_chunks((20,)))
+        self.assertEqual(profile.get_kwargs(()), {})
+        # No profile keeps the compression alone
+        self.assertEqual(get_profile(None, 'gzip').get_kwargs((128, 100)),
+                         {'compression': 'gzip'})
+        with self.assertRaises(Exception):
+            get_profile('unknown')
+
+    def test_write_image(self):
+        write_image(self.filename, self.images[0], profile='crop-friendly')
+        with h5py.File(self.filename, 'r') as h5f:
+            dataset = h5f['infrared']
+            self.assertEqual(dataset.chunks, (64, 64))
+            self.assertEqual(dataset.compression_opts, 4)
+            self.assertTrue(dataset.shuffle)
+        self.assertTrue(np.array_equal(read_source_image(self.filename),
+                                       self.images[0]))
+
+    def test_write_sequence_file(self):
+        write_sequence_file(get_sequence_filename(self.packed_dir, 200717),
+                            200717, self.images, ['{0:02d}'.format(i) for i
+                                                  in range(20)],
+                            profile='small')
+        with h5py.File(get_sequence_filename(self.packed_dir, 200717),
+                       'r') as h5f:
+            self.assertEqual(h5f['infrared'].chunks, (16, 128, 128))
+            self.assertTrue(h5f['infrared'].fletcher32)
+        self.assertTrue(np.array_equal(read_sequence_images(
+            self.packed_dir, 200717), self.images))
+
+    def test_write_h5_dataset_file(self):
+        data = {'images': self.images, 'ids': ['a', 'b']}
+        write_h5_dataset_file(data, self.filename, None, profile='fast-read')
+        with h5py.File(self.filename, 'r') as h5f:
+            self.assertEqual(h5f['images'].compression, 'lzf')
+            self.assertEqual(h5f['images'].chunks, (1, 128, 128))
+        self.assertEqual(read_h5_dataset_file(self.filename)['ids'],
+                         ['a', 'b'])
+        with H5DatasetWriter(self.filename, None, profile='small') as writer:
+            writer.append({'images': self.images[:4]})
+            writer.append({'images': self.images[4:]})
+        with h5py.File(self.filename, 'r') as h5f:
+            self.assertEqual(h5f['images'].chunks, (16, 128, 128))
+            self.assertTrue(np.array_equal(h5f['images'][()], self.images))
+
+    def test_string_datasets(self):
+        # Checksums are not applied to string fields
+        data = {'images': self.images[:3], 'idx': ['a', 'b', 'c']}
+        write_h5_dataset_file(data, self.filename, None, profile='small')
+        with h5py.File(self.filename, 'r') as h5f:
+            self.assertTrue(h5f['images'].fletcher32)
+            self.assertFalse(h5f['idx'].fletcher32)
+        self.assertEqual(read_h5_dataset_file(self.filename)['idx'],
+                         ['a', 'b', 'c'])
+        with H5DatasetWriter(self.filename, 'gzip', profile='small') as \
+                writer:
+            writer.append(data)
+            writer.append({'images': self.images[3:4], 'idx': ['d']})
+        with h5py.File(self.filename, 'r') as h5f:
+            self.assertTrue(h5f['images'].fletcher32)
+            self.assertFalse(h5f['idx'].fletcher32)
+        self.assertEqual(read_h5_dataset_file(self.filename)['idx'],
+                         ['a', 'b', 'c', 'd'])
+
+    def test_benchmark_profiles(self):
+        results = benchmark_profiles(self.images, '.', n_reads=5)
+        self.assertEqual([r['profile'] for r in results],
+                         ['crop-friendly', 'fast-read', 'gzip', 'small'])
+        self.assertTrue(all(r['size'] > 0 for r in results))
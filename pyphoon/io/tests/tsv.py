@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from pyphoon.io.tsv import read_tsv, read_tsv_array, read_besttrack, \
+    feature_names, check_time_gaps_in_tsvs, \
+    check_constant_distance_in_tsv
+from os.path import exists, join
+from os import remove, makedirs
+from shutil import copyfile, rmtree
+
+
+class TestTsvMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.path_best = '../../../sampledata/datasets/jma'
+        self.cache_file = 'besttrack_cache.npz'
+        if exists(self.cache_file):
+            remove(self.cache_file)
+
+    def tearDown(self):
+        if exists(self.cache_file):
+            remove(self.cache_file)
+
+    def test_read_tsv_array(self):
+        path_to_file = join(self.path_best, '200717.tsv')
+        data = read_tsv_array(path_to_file)
+        metadata = np.array(read_tsv(path_to_file))
+        self.assertEqual(len(data), len(metadata))
+        for i, name in enumerate(feature_names):
+            self.assertTrue(np.allclose(data[name], metadata[:, i]))
+        self.assertTrue((data['seq_no'] == 200717).all())
+        self.assertEqual(data['obs_time'][0].item().year, int(metadata[0, 0]))
+
+    def test_read_tsv_array_dtypes(self):
+        self.assertEqual(read_tsv_array(join(self.path_best, '200717.tsv'))[
+                             'class'].dtype, np.int64)
+        # Missing and non-integral values are kept as floats
+        directory = 'tsv_test'
+        makedirs(directory)
+        with open(join(self.path_best, '200717.tsv')) as f:
+            lines = [line.rstrip('\n').split('\t') for line in f][:3]
+        lines[1][feature_names.index('class')] = ''
+        lines[2][feature_names.index('speed')] = '2.5'
+        with open(join(directory, '200001.tsv'), 'w') as f:
+            f.write('\n'.join('\t'.join(line) for line in lines) + '\n')
+        copyfile(join(self.path_best, '200717.tsv'),
+                 join(directory, '200717.tsv'))
+        data = read_tsv_array(join(directory, '200001.tsv'))
+        self.assertTrue(np.isnan(data['class'][1]))
+        self.assertEqual(data['speed'][2], 2.5)
+        self.assertEqual(data['landfall'].dtype, np.int64)
+        data = read_besttrack(directory)
+        self.assertEqual(data['class'].dtype, np.float64)
+        self.assertEqual(data['class'][3], 2)
+        rmtree(directory)
+
+    def test_read_besttrack_cache(self):
+        data = read_besttrack(self.path_best, cache_file=self.cache_file)
+        self.assertTrue(exists(self.cache_file))
+        cached = read_besttrack(self.path_best, cache_file=self.cache_file)
+        self.assertTrue((data == cached).all())
+        self.assertTrue((np.diff(data['seq_no']) >= 0).all())
+
+    def test_check_time_gaps_in_tsvs(self):
+        report = check_time_gaps_in_tsvs(self.path_best)
+        self.assertEqual(report[200717]['time_step'], np.timedelta64(1, 'h'))
+        errors = check_constant_distance_in_tsv(self.path_best)
+        self.assertEqual(len(errors), len(report))
+        self.assertEqual(sum(errors), sum(r['count'] for r in
+                                          report.values()))
@@ -1,5 +1,10 @@
 import unittest
-from pyphoon.io.utils import id2seqno
+import numpy as np
+from datetime import datetime as dt
+from pyphoon.io.utils import id2seqno, id2date, imagefilename2date, \
+    imagefilename2id, date2id, get_best_ids, imagefilenames2dates, \
+    imagefilenames2seqnos, imagefilenames2ids, ids2dates, ids2seqnos, \
+    dates2ids, get_time_gaps
 
 class TestUtilsMethods(unittest.TestCase):
 
@@ -7,3 +12,58 @@ class TestUtilsMethods(unittest.TestCase):
         seq_no = id2seqno('200717_2007100618')
         self.assertEqual(seq_no, 200717)
         self.assertIs(type(seq_no), int)
+
+    def test_imagefilenames_batch(self):
+        filenames = ['2007100618-200717-MTS1-1.h5',
+                     '1999123123-199925-GMS5-1.h5']
+        dates = imagefilenames2dates(filenames)
+        self.assertEqual(dates.dtype, np.dtype('datetime64[h]'))
+        self.assertEqual(dates.tolist(),
+                         [imagefilename2date(f) for f in filenames])
+        self.assertEqual(imagefilenames2seqnos(filenames).tolist(),
+                         [200717, 199925])
+        self.assertEqual(imagefilenames2ids(filenames).tolist(),
+                         [imagefilename2id(f) for f in filenames])
+        self.assertEqual(len(imagefilenames2dates([])), 0)
+
+    def test_ids_batch(self):
+        ids = ['200717_2007100618', '199925_2000010100']
+        self.assertEqual(ids2dates(ids).tolist(), [id2date(i) for i in ids])
+        self.assertEqual(ids2seqnos(ids).tolist(), [id2seqno(i) for i in ids])
+        self.assertEqual(dates2ids(ids2dates(ids), ids2seqnos(ids)).tolist(),
+                         ids)
+        self.assertEqual(dates2ids([dt(2007, 10, 6, 18)], '200717').tolist(),
+                         [date2id(dt(2007, 10, 6, 18), '200717')])
+
+    def test_get_best_ids(self):
+        best_data = np.array([[2007, 10, 6, 18, 2], [2007, 10, 7, 0, 2]])
+        self.assertEqual(get_best_ids(best_data, '200717'),
+                         ['200717_2007100618', '200717_2007100700'])
+
+    def test_get_time_gaps(self):
+        seq_nos = np.array([1, 1, 1, 1, 2, 3, 3, 3])
+        obs_times = np.array(['2000-01-01T00', '2000-01-01T01',
+                              '2000-01-01T02', '2000-01-01T05',
+                              '2000-01-01T00', '2000-01-01T00',
+                              '2000-01-01T03', '2000-01-01T06'],
+                             dtype='datetime64[h]')
+        seqs, time_steps, diffs, gaps = get_time_gaps(seq_nos, obs_times)
+        self.assertEqual(seqs.tolist(), [1, 2, 3])
+        self.assertEqual(time_steps[0], np.timedelta64(1, 'h'))
+        self.assertTrue(np.isnat(time_steps[1]))
+        self.assertEqual(time_steps[2], np.timedelta64(3, 'h'))
+        self.assertEqual(np.flatnonzero(gaps).tolist(), [3])
+        self.assertEqual(diffs[3], np.timedelta64(3, 'h'))
+        _, _, _, gaps = get_time_gaps(seq_nos, obs_times,
+                                      np.timedelta64(1, 'h'))
+        self.assertEqual(np.flatnonzero(gaps).tolist(), [3, 6, 7])
+        # Steps finer than the observation times are not truncated
+        _, time_steps, _, gaps = get_time_gaps(seq_nos, obs_times,
+                                               np.timedelta64(30, 'm'))
+        self.assertEqual(time_steps[0], np.timedelta64(30, 'm'))
+        self.assertEqual(np.flatnonzero(gaps).tolist(), [1, 2, 3, 6, 7])
+        half_hourly = np.array(['2000-01-01T00:00', '2000-01-01T00:30',
+                                '2000-01-01T01:00'], dtype='datetime64[m]')
+        _, _, _, gaps = get_time_gaps(np.ones(3), half_hourly,
+                                      np.timedelta64(30, 'm'))
+        self.assertFalse(gaps.any())
@@ -1,7 +1,30 @@
 from os import listdir
-from os.path import isfile, join
-from datetime import datetime as dt
+from os.path import isfile, join, exists, getmtime, splitext, basename
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import warnings
 import numpy as np
+from pyphoon.io.utils import components2dates, get_time_gaps
+
+feature_names = ["year", "month", "day", "hour", "class", "latitude",
+                 "longitude", "pressure", "wind", "gust", "storm_direc",
+                 "storm_radius_major", "storm_radius_minor", "gale_direc",
+                 "gale_radius_major", "gale_radius_minor", "landfall",
+                 "speed", "direction", "interpolated"]
+
+_float_features = ["latitude", "longitude", "pressure", "wind", "gust"]
+
+
+def _get_besttrack_dtype(float_features=()):
+    return np.dtype(
+        [('seq_no', np.int64), ('obs_time', 'datetime64[h]')] +
+        [(name, np.float64 if name in _float_features or
+          name in float_features else np.int64) for name in feature_names])
+
+
+#: Type of the structured arrays returned by :func:`read_tsv_array` and
+#: :func:`read_besttrack` for well-formed files. Features with missing or
+#: non-integral values are stored as float64 instead of int64.
+besttrack_dtype = _get_besttrack_dtype()
 
 
 ###########################
@@ -36,18 +59,201 @@ def read_tsv(path_to_file):
         list is a list with length equal to number of features.
     :rtype: list
     """
-    metadata = []
-    if isfile(path_to_file):
-        ff = open(path_to_file, 'r').readlines()
-        for fff in ff:
-            _metadata = fff.split('\t')
-            _metadata[-1] = _metadata[-1].split('\n')[0]
-            __metadata = list(map(float, _metadata))
-            metadata.append(__metadata)
-    return metadata
+    if not isfile(path_to_file):
+        return []
+    return _load_tsv_values(path_to_file).tolist()
+
+
+def _load_tsv_values(path_to_file):
+    """ Parses a .TSV JMA data file.
+
+    :param path_to_file: Complete path to the TSV file
+    :type path_to_file: str
+    :return: *NxF* array (*N*: #samples, *F*: #features). Missing values
+        are NaN.
+    :rtype: numpy.array
+    """
+    with warnings.catch_warnings():
+        # Empty files
+        warnings.simplefilter('ignore', UserWarning)
+        try:
+            values = np.loadtxt(path_to_file, delimiter='\t', ndmin=2)
+        except ValueError:
+            # Missing values
+            values = np.genfromtxt(path_to_file, delimiter='\t',
+                                   ndmin=2)
+    if values.size == 0:
+        values = values.reshape(0, len(feature_names))
+    return values
+
+
+def read_tsv_array(path_to_file):
+    """ Retrieves the data from a .TSV JMA data file as a structured array
+    of type :data:`besttrack_dtype`, with one field per feature in
+    :data:`feature_names` plus the fields *seq_no*, taken from the filename,
+    and *obs_time*. Features *latitude*, *longitude*, *pressure*, *wind*
+    and *gust* are stored as floats. The rest are stored as integers, unless
+    the file has missing (NaN) or non-integral values for them, in which
+    case they are stored as floats as well.
+
+    :param path_to_file: Complete path to the TSV file, named
+        *<typhoon_seq_no>.tsv*.
+    :type path_to_file: str
+    :return: Structured array with one element per sample.
+    :rtype: numpy.array
+
+    :raises: Exception
+    """
+    values = _load_tsv_values(path_to_file)
+    if values.shape[1] != len(feature_names):
+        raise Exception('{0} has {1} features, {2} were expected'.format(
+            path_to_file, values.shape[1], len(feature_names)))
+    integral = np.all(values == np.round(values), axis=0)
+    data = np.empty(len(values), dtype=_get_besttrack_dtype(
+        [name for name, i in zip(feature_names, integral) if not i]))
+    for i, name in enumerate(feature_names):
+        data[name] = values[:, i]
+    data['seq_no'] = int(splitext(basename(path_to_file))[0])
+    data['obs_time'] = components2dates(data['year'], data['month'],
+                                        data['day'], data['hour'])
+    return data
+
+
+def read_besttrack(path_best, files=None, n_workers=None, backend='thread',
+                   cache_file=None):
+    """ Reads JMA .TSV data files into a single structured array (see
+    :func:`read_tsv_array`), parsing the files with a pool of workers.
+
+    If **cache_file** is given, the parsed data is stored there together
+    with the modification time of each source file. Later calls only parse
+    the files that are new or have been modified since.
+
+    :param path_best: Path to the directory containing the JMA .TSV data
+        files.
+    :type path_best: str
+    :param files: Names of the files to read. By default, all files in
+        **path_best** are read.
+    :type files: list, default None
+    :param n_workers: Number of workers used to parse the files. If None,
+        the default of :mod:`concurrent.futures` is used.
+    :type n_workers: int, default None
+    :param backend: Pool used to parse the files, 'thread' or 'process'.
+    :type backend: str, default 'thread'
+    :param cache_file: Path to a *.npz* cache file.
+    :type cache_file: str, default None
+    :return: Structured array of type :data:`besttrack_dtype`, with samples
+        sorted by filename. Features stored as floats in any file (see
+        :func:`read_tsv_array`) are stored as floats for all samples.
+    :rtype: numpy.array
+
+    :raises: Exception
+    """
+    if backend not in ('thread', 'process'):
+        raise Exception("backend should be either 'thread' or 'process'")
+    if files is None:
+        files = listdir(path_best)
+    files = sorted(files)
+    mtimes = np.array([getmtime(join(path_best, f)) for f in files])
+
+    # Reuse cached data of unmodified files
+    cached = {}
+    if cache_file is not None and exists(cache_file):
+        with np.load(cache_file) as cache:
+            parts = np.split(cache['data'], np.cumsum(cache['counts'])[:-1])
+            for f, mtime, part in zip(cache['sources'], cache['mtimes'],
+                                      parts):
+                cached[str(f)] = (mtime, part)
+    parts = [cached[f][1] if f in cached and cached[f][0] == mtime else None
+             for f, mtime in zip(files, mtimes)]
+    pending = [i for i, part in enumerate(parts) if part is None]
+
+    if pending:
+        pool = ThreadPoolExecutor if backend == 'thread' else \
+            ProcessPoolExecutor
+        with pool(max_workers=n_workers) as executor:
+            for i, part in zip(pending, executor.map(
+                    read_tsv_array, [join(path_best, files[i]) for i in
+                                     pending])):
+                parts[i] = part
+    dtype = _get_besttrack_dtype([name for name in feature_names if any(
+        part.dtype[name] == np.float64 for part in parts)])
+    data = np.concatenate([np.empty(0, dtype=dtype)] +
+                          [part.astype(dtype) for part in parts])
+
+    if cache_file is not None and (pending or sorted(cached) != files):
+        with open(cache_file, 'wb') as f:
+            np.savez(f, data=data, sources=np.array(files, dtype=str),
+                     mtimes=mtimes,
+                     counts=np.array([len(part) for part in parts],
+                                     dtype=np.int64))
+    return data
+
+
+def get_time_gaps_report(seq_nos, obs_times, time_step=None):
+    """ Builds a report of the time gaps within each typhoon sequence (see
+    :func:`~pyphoon.io.utils.get_time_gaps`). Frames must be sorted by
+    sequence number and observation time.
+
+    :param seq_nos: Sequence number of each frame.
+    :type seq_nos: numpy.array
+    :param obs_times: Observation time of each frame.
+    :type obs_times: numpy.array of dtype datetime64
+    :param time_step: Expected time difference between consecutive frames.
+        If not used, the most frequent difference of each sequence is used.
+    :type time_step: numpy.timedelta64, default None
+    :return: Dictionary with, per sequence number, a dictionary with keys:
+
+        *   *time_step*: Time step of the sequence.
+        *   *positions*: Positions of the frames preceded by a gap.
+        *   *sizes*: Time difference with the previous frame of each of them.
+        *   *count*: Number of gaps.
+    :rtype: dict
+    """
+    seqs, time_steps, diffs, gaps = get_time_gaps(seq_nos, obs_times,
+                                                  time_step)
+    starts = np.searchsorted(seq_nos, seqs)
+    ends = np.append(starts[1:], len(gaps))
+    report = {}
+    for seq_no, step, start, end in zip(seqs.tolist(), time_steps, starts,
+                                        ends):
+        positions = np.flatnonzero(gaps[start:end])
+        report[seq_no] = {'time_step': step, 'positions': positions,
+                          'sizes': diffs[start:end][positions],
+                          'count': len(positions)}
+    return report
+
+
+def check_time_gaps_in_tsvs(path_best, time_distance=3600, files=None,
+                            n_workers=None, backend='thread'):
+    """ Reports the time gaps of the typhoon sequences in the JMA .TSV data
+    files (see :func:`get_time_gaps_report`). Files are parsed in parallel
+    with :func:`read_besttrack`.
+
+    :param path_best: Directory containing TSV files.
+    :type path_best: str
+    :param time_distance: Expected distance between frames in seconds. Set
+        to None to use the most frequent distance of each sequence.
+    :type time_distance: int, default 3600
+    :param files: Names of the files to check. By default, all files in
+        **path_best** are checked.
+    :type files: list, default None
+    :param n_workers: Number of workers used to parse the files.
+    :type n_workers: int, default None
+    :param backend: Pool used to parse the files, 'thread' or 'process'.
+    :type backend: str, default 'thread'
+    :return: Report with the time gaps of each sequence.
+    :rtype: dict
+    """
+    # Samples are kept in file order, hence unsorted samples show up as gaps
+    data = read_besttrack(path_best, files, n_workers=n_workers,
+                          backend=backend)
+    time_step = None if time_distance is None else \
+        np.timedelta64(time_distance, 's')
+    return get_time_gaps_report(data['seq_no'], data['obs_time'], time_step)
 
 
-def check_constant_distance_in_tsv(path_best, time_distance=3600):
+def check_constant_distance_in_tsv(path_best, time_distance=3600,
+                                   display=False):
     """ Checks that within a typhoon sequence the time distance between
     consecutive image frames remains constant.
 
@@ -55,6 +261,8 @@ def check_constant_distance_in_tsv(path_best, time_distance=3600):
     :type path_best: str
     :param time_distance: Distance between frames in seconds.
     :type time_distance: int
+    :param display: Set to True to print each time-gap.
+    :type display: bool, default False
     :return: List providing, per each sequence (tsv file), the number of
         time-gaps greater than **time_distance** without a satellite image.
         Element n:th in the list refers to the n:th typhoon sequence.
@@ -65,18 +273,14 @@ def check_constant_distance_in_tsv(path_best, time_distance=3600):
                                            "%r" % time_distance
 
     files = listdir(path_best)
+    report = check_time_gaps_in_tsvs(path_best, time_distance, files)
     error = []
     for file in files:
-        data = np.array(read_tsv(join(path_best, file)))
-        _error = 0
-        for i in range(len(data)-1):
-            d0 = dt(int(data[i][0]), int(data[i][1]), int(data[i][2]),
-                    int(data[i][3]))
-            d1 = dt(int(data[i+1][0]), int(data[i+1][1]), int(data[i+1][2]),
-                    int(data[i+1][3]))
-            delta = (d1-d0).total_seconds()
-            if delta != time_distance:
-                _error += 1
-                print("Error at", i, "of", delta, "seconds")
-        error.append(_error)
-    return error
\ No newline at end of file
+        gaps = report.get(int(splitext(file)[0]), {'positions': [],
+                                                   'sizes': [], 'count': 0})
+        if display:
+            for i, delta in zip(gaps['positions'], gaps['sizes']):
+                print("Error at", i - 1, "of", delta / np.timedelta64(1, 's'),
+                      "seconds")
+        error.append(gaps['count'])
+    return error
@@ -3,6 +3,8 @@ Some tools ot assist in reading source data.
 """
 
 from datetime import datetime as dt
+from functools import lru_cache
+import numpy as np
 from pyphoon.io.h5 import get_h5_filenames
 
 
@@ -24,7 +26,7 @@ def get_image_ids(sequence_folder):
             http://lcsrg.me/pyphoon/build/html/data.html
     """
     files = get_h5_filenames(sequence_folder)
-    ids = [imagefilename2id(file) for file in files]
+    ids = imagefilenames2ids(files).tolist()
     return sorted(ids)
 
 
@@ -44,7 +46,7 @@ def get_image_dates(sequence_folder):
             http://lcsrg.me/pyphoon/build/html/data.html
     """
     files = get_h5_filenames(sequence_folder)
-    dates = [imagefilename2date(file) for file in files]
+    dates = imagefilenames2dates(files).tolist()
     return dates
 
 
@@ -64,10 +66,11 @@ def get_best_ids(best_data, seq_no):
     :return: List with the ids of all samples from input Best Track data.
     :rtype: list
     """
-    ids = [
-        date2id(get_best_date(d), seq_no) for d in best_data
-    ]
-    return ids
+    best_data = np.asarray(best_data)
+    if len(best_data) == 0:
+        return []
+    dates = components2dates(*best_data[:, :4].astype(np.int64).T)
+    return dates2ids(dates, seq_no).tolist()
 
 
 def get_best_dates(best_data):
@@ -104,6 +107,7 @@ def get_best_date(best_data_sample):
 #        CONVERSORS        #
 ############################
 
+@lru_cache(maxsize=65536)
 def id2date(identifier):
     """ Gets the date of a typhoon image frame with id given by
     **identifier**. A typical id is in the format *<seq_no>_<YYYYMMDD>*,
@@ -113,6 +117,9 @@ def id2date(identifier):
     :type identifier: str
     :return: Date of the frame
     :rtype: datetime.datetime
+
+    .. note:: Results are cached, use :func:`ids2dates` to convert many
+        identifiers at once.
     """
     # Ignore typhoon id section
     identifier = identifier.split('_')[1]
@@ -208,6 +215,7 @@ def imagefilename2id(filename):
     return filename.split('-')[1] + "_" + filename.split('-')[0]
 
 
+@lru_cache(maxsize=65536)
 def imagefilename2date(filename):
     """ Extracts the date from a file with a specific filename. To obtain the
     image date from the filename, the filename must have the following
@@ -219,6 +227,9 @@ def imagefilename2date(filename):
     :type filename: str
     :return: Date the image with a given *filename* was taken.
     :rtype: datetime.datetime
+
+    .. note:: Results are cached, use :func:`imagefilenames2dates` to convert
+        many filenames at once.
     """
     identifier = filename.split('-')[0]
     year = int(identifier[:4])
@@ -226,4 +237,218 @@ def imagefilename2date(filename):
     day = int(identifier[6:8])
     hour = int(identifier[8:])
     date = dt(year, month, day, hour)
-    return date
\ No newline at end of file
+    return date
+
+
+############################
+#    BATCH CONVERSORS      #
+############################
+
+def components2dates(year, month, day, hour):
+    """ Builds dates from arrays with their components.
+
+    :param year: Years.
+    :type year: numpy.array
+    :param month: Months (1-12).
+    :type month: numpy.array
+    :param day: Days of the month (1-31).
+    :type day: numpy.array
+    :param hour: Hours (0-23).
+    :type hour: numpy.array
+    :return: Array of dates.
+    :rtype: numpy.array of dtype datetime64[h]
+    """
+    dates = (np.asarray(year) - 1970).astype('datetime64[Y]')
+    dates = dates.astype('datetime64[M]') + (np.asarray(month) - 1)
+    dates = dates.astype('datetime64[D]') + (np.asarray(day) - 1)
+    return dates.astype('datetime64[h]') + np.asarray(hour)
+
+
+def _stamps2dates(stamps):
+    """ Converts *YYYYMMDDHH* strings to dates.
+
+    :param stamps: Date strings.
+    :type stamps: list or numpy.array
+    :return: Array of dates.
+    :rtype: numpy.array of dtype datetime64[h]
+    """
+    digits = np.asarray(stamps, dtype='S10').view(np.uint8).reshape(-1, 10)
+    digits = digits.astype(np.int64) - ord('0')
+    if digits.size and (digits.min() < 0 or digits.max() > 9):
+        raise Exception('wrong date format provided')
+    return components2dates(digits[:, :4].dot([1000, 100, 10, 1]),
+                             digits[:, 4:6].dot([10, 1]),
+                             digits[:, 6:8].dot([10, 1]),
+                             digits[:, 8:10].dot([10, 1]))
+
+
+def _filenames2seqnos(filenames):
+    """ Extracts the *<typhoon id>* field of image filenames.
+
+    :param filenames: Non-empty array with the names of the HDF image files.
+    :type filenames: numpy.array
+    :return: Typhoon ids.
+    :rtype: numpy.array of str
+    """
+    rest = np.char.partition(filenames, '-')[:, 2]
+    return np.char.partition(rest, '-')[:, 0]
+
+
+def imagefilenames2dates(filenames):
+    """ Batch version of :func:`imagefilename2date`.
+
+    :param filenames: Names of the HDF image files.
+    :type filenames: list or numpy.array
+    :return: Dates the images were taken.
+    :rtype: numpy.array of dtype datetime64[h]
+    """
+    return _stamps2dates(filenames)
+
+
+def imagefilenames2seqnos(filenames):
+    """ Extracts the sequence numbers from image filenames with structure
+    *YYYYMMDDHH-<typhoon id>-<satellitemodel>.h5*.
+
+    :param filenames: Names of the HDF image files.
+    :type filenames: list or numpy.array
+    :return: Sequence numbers.
+    :rtype: numpy.array of dtype int64
+    """
+    filenames = np.asarray(filenames, dtype=str)
+    if len(filenames) == 0:
+        return np.array([], dtype=np.int64)
+    return _filenames2seqnos(filenames).astype(np.int64)
+
+
+def imagefilenames2ids(filenames):
+    """ Batch version of :func:`imagefilename2id`.
+
+    :param filenames: Names of the HDF image files.
+    :type filenames: list or numpy.array
+    :return: Image frame identifiers.
+    :rtype: numpy.array of str
+    """
+    filenames = np.asarray(filenames, dtype=str)
+    if len(filenames) == 0:
+        return np.array([], dtype=str)
+    return np.char.add(np.char.add(_filenames2seqnos(filenames), '_'),
+                       filenames.astype('U10'))
+
+
+def ids2dates(identifiers):
+    """ Batch version of :func:`id2date`.
+
+    :param identifiers: Identifiers of image or best track frames.
+    :type identifiers: list or numpy.array
+    :return: Dates of the frames.
+    :rtype: numpy.array of dtype datetime64[h]
+    """
+    identifiers = np.asarray(identifiers, dtype=str)
+    if len(identifiers) == 0:
+        return np.array([], dtype='datetime64[h]')
+    return _stamps2dates(np.char.partition(identifiers, '_')[:, 2])
+
+
+def ids2seqnos(identifiers):
+    """ Batch version of :func:`id2seqno`.
+
+    :param identifiers: Typhoon unique identifiers.
+    :type identifiers: list or numpy.array
+    :return: Sequence numbers.
+    :rtype: numpy.array of dtype int64
+    """
+    identifiers = np.asarray(identifiers, dtype=str)
+    if len(identifiers) == 0:
+        return np.array([], dtype=np.int64)
+    return np.char.partition(identifiers, '_')[:, 0].astype(np.int64)
+
+
+def dates2ids(dates, seq_nos):
+    """ Batch version of :func:`date2id`.
+
+    :param dates: Dates of the samples.
+    :type dates: list or numpy.array
+    :param seq_nos: Typhoon sequence number of each sample, or a single one
+        shared by all samples.
+    :type seq_nos: list, numpy.array, int or str
+    :return: Ids of the samples.
+    :rtype: numpy.array of str
+    """
+    dates = np.asarray(dates, dtype='datetime64[h]')
+    # YYYY-MM-DDTHH -> YYYYMMDDHH
+    chars = np.datetime_as_string(dates, unit='h').astype('U13').view(
+        'U1').reshape(-1, 13)
+    stamps = np.ascontiguousarray(
+        chars[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12]]).view('U10').ravel()
+    seq_nos = np.broadcast_to(np.asarray(seq_nos).astype(str), stamps.shape)
+    return np.char.add(np.char.add(seq_nos, '_'), stamps)
+
+
+############################
+#        TIME GAPS         #
+############################
+
+def get_time_gaps(seq_nos, obs_times, time_step=None):
+    """ Finds the time gaps within typhoon sequences, i.e. consecutive
+    frames whose time difference differs from the time step of their
+    sequence. Frames must be sorted by sequence number and observation time.
+
+    :param seq_nos: Sequence number of each frame.
+    :type seq_nos: numpy.array
+    :param obs_times: Observation time of each frame.
+    :type obs_times: numpy.array of dtype datetime64
+    :param time_step: Expected time difference between consecutive frames.
+        If not used, the most frequent difference of each sequence is used
+        (the smallest one if tied).
+    :type time_step: numpy.timedelta64, default None
+    :return: Tuple with four elements:
+
+        *   *seqs*: Sorted sequence numbers.
+        *   *time_steps*: Time step of each sequence in *seqs* (NaT for
+            sequences with a single frame).
+        *   *diffs*: Time difference of each frame with the previous one
+            (NaT for the first frame of each sequence).
+        *   *gaps*: Boolean array, True for the frames preceded by a gap.
+
+        Time differences use the finer unit of **obs_times** and
+        **time_step**, hence steps are never truncated.
+    :rtype: tuple
+    """
+    seq_nos = np.asarray(seq_nos)
+    obs_times = np.asarray(obs_times)
+    if time_step is not None:
+        time_step = np.timedelta64(time_step)
+        # Finer unit of both, e.g. minutes for hourly frames and a 30 min step
+        obs_times = obs_times.astype(np.result_type(
+            obs_times.dtype, np.datetime64(0, np.datetime_data(
+                time_step.dtype)[0]).dtype))
+    n = len(seq_nos)
+    first = np.ones(n, dtype=bool)
+    first[1:] = seq_nos[1:] != seq_nos[:-1]
+    diffs = np.diff(obs_times, prepend=obs_times[:1])
+    diffs[first] = np.timedelta64('NaT')
+    seqs, starts = np.unique(seq_nos, return_index=True)
+    seq_idx = np.repeat(np.arange(len(seqs)), np.diff(np.append(starts, n)))
+
+    time_steps = np.full(len(seqs), np.timedelta64('NaT'), dtype=diffs.dtype)
+    if time_step is not None:
+        time_steps[:] = time_step
+    elif n > 0:
+        # Count each (sequence, difference) pair
+        s, d = seq_idx[~first], diffs[~first]
+        order = np.lexsort((d, s))
+        s, d = s[order], d[order]
+        new = np.ones(len(s), dtype=bool)
+        new[1:] = (s[1:] != s[:-1]) | (d[1:] != d[:-1])
+        runs = np.flatnonzero(new)
+        counts = np.diff(np.append(runs, len(s)))
+        s, d = s[runs], d[runs]
+        # Most frequent difference per sequence, smallest one if tied
+        order = np.lexsort((d, -counts, s))
+        s, d = s[order], d[order]
+        best = np.ones(len(s), dtype=bool)
+        best[1:] = s[1:] != s[:-1]
+        time_steps[s[best]] = d[best]
+
+    gaps = ~first & (diffs != time_steps[seq_idx])
+    return seqs, time_steps, diffs, gaps
@@ -0,0 +1,24 @@
+"""
+This script compares the file size and the read throughput of the storage
+profiles (see :mod:`pyphoon.io.storage`) on the frames of a typhoon sequence.
+"""
+import sys
+sys.path.insert(0, '..')
+from os.path import join
+from pyphoon.io.h5 import read_source_images_bulk
+from pyphoon.io.storage import benchmark_profiles
+
+images_dir = '/root/fs9/datasets/typhoon/wnp/image/'
+seq_no = '201725'
+tmp_dir = '/tmp'
+
+images = read_source_images_bulk(join(images_dir, seq_no), n_workers=8)
+print('{0} frames of {1}x{2}'.format(*images.shape))
+print('{0:15} {1:>10} {2:>6} {3:>8} {4:>12} {5:>12} {6:>12}'.format(
+    'profile', 'size (MB)', 'ratio', 'write', 'read (MB/s)', 'frames/s',
+    'crops/s'))
+for r in benchmark_profiles(images, tmp_dir):
+    print('{0:15} {1:10.2f} {2:6.2f} {3:8.2f} {4:12.1f} {5:12.1f} '
+          '{6:12.1f}'.format(r['profile'], r['size'] / 1e6, r['ratio'],
+                             r['write'], r['full_read'], r['frame_reads'],
+                             r['crop_reads']))
@@ -0,0 +1,15 @@
+"""
+This script packs the original image dataset (one HDF5 file per frame) into
+consolidated sequence files (one HDF5 file per typhoon sequence). See
+:mod:`pyphoon.io.sequence`.
+"""
+import sys
+sys.path.insert(0, '..')
+from pyphoon.io.sequence import pack_image_dataset
+
+src_dir = '/root/fs9/datasets/typhoon/wnp/image/'
+dst_dir = '/root/fs9/grishin/database/packed/original/'
+
+print('Start')
+pack_image_dataset(src_dir, dst_dir, n_workers=8, display=True)
+print('Done')